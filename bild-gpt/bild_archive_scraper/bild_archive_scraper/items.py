@@ -6,7 +6,15 @@
 import scrapy
 
 
+# Ein Artikel aus dem Bild-Archiv
 class BildArchiveScraperItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+    url = scrapy.Field()
+    title = scrapy.Field()
+    date_time = scrapy.Field()
+    # Bild-Artikel haben keine eigene Einleitung, das Feld bleibt leer
+    intro = scrapy.Field()
+    body = scrapy.Field()
+    category = scrapy.Field()
+    archive_date = scrapy.Field()
+    # Position des Artikels auf der Archivseite (für den Dateinamen)
+    index = scrapy.Field()
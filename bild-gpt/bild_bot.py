@@ -1,76 +1,134 @@
 import config
+import argparse
+import importlib
 import os
-from llama_index.llms.openai import OpenAI
-from llama_index.core import Settings, VectorStoreIndex, SimpleDirectoryReader, StorageContext, load_index_from_storage
-import gradio
-
-# API key aus config-Datei setzen, damit dieser hier nicht exposed ist
-os.environ["OPENAI_API_KEY"] = config.api_key
-
-
-# Funktion zum Erstellen eines Indexes aus den Trainingsdaten
-# Dabei wird ein Vektorindex basierend auf den Dokumenten in einem Verzeichnis erstellt
-# Parameter:    directory_path: Pfad zum Ordner, in dem die Trainingsdaten (Artikel) gespeichert sind
-# Rückgabe:     index: erstellter Index, der später für die Antworten genutzt wird
-def construct_index(directory_path):
-    # Modell 3.5 mit mittlerer Temperature und maximalem output tokens
-    Settings.llm = OpenAI(model="gpt-3.5-turbo", temperature=0.7, max_tokens=265)
-
-    # Prüfen, ob Index bereits vorhanden
-    PERSIST_DIR = "./bild-index/index"
-    if not os.path.exists(PERSIST_DIR):
-        print(f"Index neu erstellen")
-        # Artikel/Dokumente aus dem gegebenen Pfad laden
-        documents = SimpleDirectoryReader(directory_path).load_data()
-
-        # Index aus Artikeln erstellen
-        index = VectorStoreIndex.from_documents(documents, llm=Settings.llm)
-        # Index speichern
-        index.storage_context.persist(persist_dir=PERSIST_DIR)
-    else:
-        print(f"Index vorhanden und laden")
-        # Vorhandenen Index laden
-        storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-        index = load_index_from_storage(storage_context)
+import sys
 
-    return index
+# Projektordner zum Pfad hinzufügen, damit die gemeinsamen Module aus utils gefunden werden
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.startup import StartupTimer
 
+# Befehle:
+#   python bild_bot.py build-index  Index aus den Trainingsdaten erstellen bzw. abgleichen (einbetten) und beenden
+#   python bild_bot.py serve        nur den mit build-index erstellten und geprüften Index laden und die
+#                                   Oberfläche starten, dabei wird nichts eingebettet (schneller Start)
+#   python bild_bot.py              wie bisher: Index erstellen bzw. abgleichen und Oberfläche starten
+# Beim Import dieses Moduls wird nichts geladen oder erstellt. llama_index, gradio und openai werden erst in den
+# Befehlen importiert (build-index ohne gradio), der Start-Bericht zeigt die Dauer jeder Startphase.
+# Index, Antwort-Cache und Einstellungen aus config.py verwaltet der CorpusBot des Korpus (utils/corpus_bot.py),
+# wie im Server für mehrere Korpora (multi-gpt/multi_bot.py).
 
-# Funktion für den Chatbot
-# Lädt den zuvor erstellten Index und verwendet ihn, um auf Eingaben des Nutzers zu antworten
-# Parameter:    input_text: vom Nutzer eingegebene Frage
-# Rückgabe:     response: generierte Antwort auf die Eingabe
-def chatbot(input_text):
-    PERSIST_DIR = "./bild-index/index"
-    # Lade den Index aus dem gespeicherten Verzeichnis
-    storage_context = StorageContext.from_defaults(persist_dir=PERSIST_DIR)
-    query_engine = load_index_from_storage(storage_context).as_query_engine(llm=Settings.llm)
+# Name des Korpus in utils/corpus_bot.py, Index und Trainingsdaten liegen im Ordner dieses Skripts
+# (bild-index/index, filtered_pdfs bzw. corpus_path in config.py)
+CORPUS = 'bild'
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Module, die erst beim Ausführen eines Befehls importiert werden
+MODULES = ('utils.corpus_bot', 'utils.metrics')
+UI_MODULES = ('gradio',)
 
-    # Im Index nach relevantem Inhalt suchen
-    index_response = query_engine.query(input_text)
-    relevant_content = index_response.response
+# Chatbot des Korpus, wird in setup() erstellt
+bot = None
 
-    # Prompt um Antwort basierend auf Index mit GPT-3.5 zu vergleichen und zusammenzuführen
-    prompt_with_context = f"Nutze diese Informationen aus spezifischen Bild-Artikeln: {relevant_content}. Und beantworte die folgende Frage: {input_text}"
 
-    response = Settings.llm.complete(prompt_with_context)
+# Funktion zum Importieren der großen Bibliotheken
+# Parameter:    ui: auch gradio für die Web-Oberfläche importieren
+def import_modules(ui):
+    for name in MODULES + (UI_MODULES if ui else ()):
+        importlib.import_module(name)
 
-    return response
 
+# Funktion zum Erstellen des Chatbots und der Modelle (LLM und Embedding-Modell)
+def setup():
+    global bot
+    from utils.corpus_bot import create_bot, create_models
 
-# Web-Oberfläche für Chatbot mit Gradio erstellen
-chatbot_interface = gradio.Interface(
-    fn=chatbot,
-    inputs=gradio.Textbox(lines=5, label="Stelle deine Frage"),
-    outputs="text",
-    title="GPT-3.5 ChatBot mit Bild.de-Artikeln"
-)
+    # API key aus config-Datei setzen, damit dieser hier nicht exposed ist
+    os.environ["OPENAI_API_KEY"] = config.api_key
+    bot = create_bot(CORPUS, PROJECT_DIR)
+    create_models(config)
 
-# Path zum Ordner mit den Trainingsdaten
-folder_name = 'filtered_pdfs'
 
-# Index aus den Trainingsdaten erstellen
-index = construct_index(folder_name)
+# Funktion für den Chatbot
+# Beantwortet die Frage mit dem Index des Korpus, siehe astream_answer in utils/answering.py
+# Die Antwort wird gestreamt, sodass Gradio sie bereits während der Erzeugung anzeigt
+# Parameter:    input_text: vom Nutzer eingegebene Frage
+# Rückgabe:     Async-Generator mit der bisher generierten Antwort auf die Eingabe
+async def chatbot(input_text):
+    async for partial_response in bot.astream(input_text):
+        yield partial_response
+
+
+# Funktion zum Erstellen der Web-Oberfläche für den Chatbot mit Gradio
+def create_interface():
+    import gradio
+
+    return gradio.Interface(
+        fn=chatbot,
+        inputs=gradio.Textbox(lines=5, label="Stelle deine Frage"),
+        outputs="text",
+        title="GPT-3.5 ChatBot mit Bild.de-Artikeln"
+    )
+
+
+# Befehl build-index: Index erstellen bzw. abgleichen, ohne die Oberfläche zu starten
+# Danach wird build_info.json geschrieben, sodass "serve" den Index ohne Abgleich laden kann
+def build_index(timer):
+    with timer.phase("Importe"):
+        import_modules(ui=False)
+    with timer.phase("Modelle"):
+        setup()
+    with timer.phase("Index"):
+        # build-index gleicht einen vorhandenen Index immer ab, auch mit index_refresh = False in config.py
+        bot.index_refresh = True
+        bot.start()
+    print(f"Index mit {bot.chunks} Ausschnitten in {bot.persist_dir} gespeichert")
+    timer.report()
+
+
+# Befehl serve bzw. Start ohne Befehl: Index laden und Web-Oberfläche starten
+# Parameter:    timer: StartupTimer, prebuilt: nur den geprüften Index von build-index laden (nichts einbetten)
+def serve(timer, prebuilt):
+    with timer.phase("Importe"):
+        import_modules(ui=True)
+    with timer.phase("Modelle"):
+        from utils import metrics
+        from utils.llm_client import DEFAULT_CONCURRENCY_LIMIT
+        setup()
+        # Messwerte (Dauer der Schritte, Tokens, Cache-Treffer) unter metrics_port bzw. als JSON-Zeilen in metrics_log
+        metrics.configure(config)
+    with timer.phase("Index"):
+        if prebuilt:
+            # build_info.json prüfen und Index laden, bei Fehlern mit Hinweis auf build-index beenden
+            try:
+                bot.start(prebuilt=True)
+            except (FileNotFoundError, ValueError) as e:
+                sys.exit(f"{e}\nBitte zuerst 'python bild_bot.py build-index' ausführen.")
+        else:
+            bot.start()
+    with timer.phase("Oberfläche"):
+        chatbot_interface = create_interface()
+    with timer.phase("Server"):
+        # Web-Oberfläche starten, dabei bis zu concurrency_limit Fragen gleichzeitig bearbeiten
+        chatbot_interface.queue(default_concurrency_limit=getattr(config, 'concurrency_limit', DEFAULT_CONCURRENCY_LIMIT))
+        chatbot_interface.launch(share=False, prevent_thread_lock=True)
+    timer.report()
+    chatbot_interface.block_thread()
+
+
+def main():
+    timer = StartupTimer()
+    parser = argparse.ArgumentParser(description="GPT-3.5 ChatBot mit Bild.de-Artikeln")
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('build-index', help="Index erstellen bzw. abgleichen und beenden")
+    commands.add_parser('serve', help="nur den mit build-index erstellten Index laden und die Oberfläche starten")
+    args = parser.parse_args()
+
+    if args.command == 'build-index':
+        build_index(timer)
+    else:
+        serve(timer, prebuilt=args.command == 'serve')
+
 
-# Web-Oberfläche starten
-chatbot_interface.launch(share=False)
+if __name__ == '__main__':
+    main()
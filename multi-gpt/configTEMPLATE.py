@@ -0,0 +1,31 @@
+### COPY THIS FILE AND NAME IT 'config.py' (delete 'TEMPLATE' from file name)
+# Then add your API key
+
+api_key = '' # Add your key here
+
+# Corpora served by multi_bot.py: name -> project folder (None = default folder of bild, spiegel)
+# 'plain' answers without an index. The index, training data and options (answer_mode, similarity_top_k,
+# vector_store, retrieval_mode, corpus_path, answer cache, ...) of a corpus are read from config.py in its
+# project folder; the API settings below are shared by all corpora
+corpora = {
+    'bild': None,
+    'spiegel': None,
+    'plain': None,
+}
+
+# Optional: custom OpenAI-compatible API endpoint, e.g. the local fake server for offline tests
+# (python utils/fake_openai_server.py --port 8000)
+# api_base = 'http://127.0.0.1:8000/v1'
+
+# Optional: number of questions answered at the same time and size of the HTTP connection pool to the API
+concurrency_limit = 16
+max_connections = 20
+
+# Optional: folder of the embedding cache shared by all corpora (None disables the cache)
+# embedding_cache_dir = '../embedding-cache'
+
+# Optional: per-stage latency, token and answer cache metrics
+# metrics_port - serve Prometheus histograms at http://127.0.0.1:<port>/metrics (None = off)
+# metrics_log  - append one JSON line per question with stage times, tokens and cache result ('-' = console, None = off)
+metrics_port = None
+metrics_log = None
@@ -0,0 +1,92 @@
+import config
+import argparse
+import os
+import sys
+import time
+import gradio
+
+# Projektordner zum Pfad hinzufügen, damit die gemeinsamen Module aus utils gefunden werden
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.corpus_bot import create_models, create_bot, astream_multi, print_startup_report, current_rss_mb, PLAIN
+from utils import metrics
+from utils.llm_client import DEFAULT_CONCURRENCY_LIMIT
+
+# Ein Server für mehrere Korpora (bild, spiegel, plain, ...) in einem Prozess
+# Alle Korpora teilen sich LLM, Embedding-Modell, Embedding-Cache und HTTP-Clients. Jedes Korpus hat einen
+# eigenen Tab und Endpunkt (/bild, /spiegel, /plain), der Tab "Mehrere Korpora" (/multi) durchsucht die
+# ausgewählten Korpora parallel und beantwortet die Frage mit den Artikeln aller Korpora.
+
+# API key aus config-Datei setzen, damit dieser hier nicht exposed ist
+os.environ["OPENAI_API_KEY"] = config.api_key
+
+# Korpora aus der config-Datei: Name -> Projektordner (None = Standardordner)
+CORPORA = getattr(config, 'corpora', {'bild': None, 'spiegel': None, 'plain': None})
+# Anzahl der Fragen, die gleichzeitig beantwortet werden
+CONCURRENCY_LIMIT = getattr(config, 'concurrency_limit', DEFAULT_CONCURRENCY_LIMIT)
+
+
+# Funktion zum Erstellen der Web-Oberfläche mit einem Tab pro Korpus
+# Parameter:    bots: gestartete Chatbots (CorpusBot, PlainBot)
+# Rückgabe:     Gradio-App
+def create_app(bots):
+    index_bots = {bot.name: bot for bot in bots if bot.name != PLAIN}
+
+    # Funktion für Fragen an mehrere Korpora
+    # Parameter:    input_text: Frage, names: ausgewählte Korpora
+    # Rückgabe:     Async-Generator mit der bisher generierten Antwort
+    async def multi_chatbot(input_text, names):
+        selected = [index_bots[name] for name in names if name in index_bots] or list(index_bots.values())
+        async for partial_response in astream_multi(selected, input_text):
+            yield partial_response
+
+    with gradio.Blocks(title="GPT-3.5 ChatBot") as app:
+        for bot in bots:
+            with gradio.Tab(bot.title):
+                input_text = gradio.Textbox(lines=5, label="Stelle deine Frage")
+                output = gradio.Textbox(label="Antwort")
+                button = gradio.Button("Fragen")
+                button.click(bot.astream, inputs=input_text, outputs=output, api_name=bot.name)
+        if len(index_bots) > 1:
+            with gradio.Tab("Mehrere Korpora"):
+                input_text = gradio.Textbox(lines=5, label="Stelle deine Frage")
+                names = gradio.CheckboxGroup(list(index_bots), value=list(index_bots), label="Korpora")
+                output = gradio.Textbox(label="Antwort")
+                button = gradio.Button("Fragen")
+                button.click(multi_chatbot, inputs=[input_text, names], outputs=output, api_name="multi")
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chatbots für mehrere Korpora in einem Server")
+    parser.add_argument('corpora', nargs='*', help=f"Korpora aus config.py (Standard: alle, {', '.join(CORPORA)})")
+    parser.add_argument('--port', type=int, help="Port der Web-Oberfläche (Standard: 7860)")
+    args = parser.parse_args()
+
+    unknown = set(args.corpora) - set(CORPORA)
+    if unknown:
+        parser.error(f"Unbekannte Korpora: {', '.join(sorted(unknown))}")
+
+    # Messwerte aller Korpora (Label bot) unter metrics_port bzw. als JSON-Zeilen in metrics_log
+    metrics.configure(config)
+
+    start = time.perf_counter()
+    create_models(config)
+    models_seconds = time.perf_counter() - start
+    print(f"Modelle erstellt in {models_seconds:.1f}s, Speicher {current_rss_mb():.0f}MB")
+
+    # Korpora nacheinander laden, damit Dauer und Speicher jedem Korpus zugeordnet werden können
+    bots = []
+    for name in args.corpora or CORPORA:
+        bot = create_bot(name, CORPORA[name])
+        bot.start()
+        bots.append(bot)
+    print_startup_report(bots, time.perf_counter() - start)
+
+    # Web-Oberfläche starten, dabei bis zu CONCURRENCY_LIMIT Fragen gleichzeitig bearbeiten
+    app = create_app(bots)
+    app.queue(default_concurrency_limit=CONCURRENCY_LIMIT)
+    app.launch(share=False, server_port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+# Gemeinsamer Scrapy-Code der Nachrichten-Scraper (bild-gpt/bild_archive_scraper, spiegel-gpt/spiegel_scraper)
+#
+# Generischer Archiv-Spider, Site-Konfigurationen, Middlewares und Pipelines liegen nur hier.
+# Ein Scrapy-Projekt enthält nur noch settings.py (SITE, SITES_FOLDER, ARTICLE_ITEM, Ausgabeordner),
+# items.py und seine Site-Konfigurationen in sites/*.json.
@@ -0,0 +1,105 @@
+# Link-Manifest: alle Artikel-Links der Archivseiten mit Datum, Kategorie und Filter-Ergebnis in einer CSV-Datei
+#
+# Die Datei wird nur fortgeschrieben (eine Zeile pro Link und Archivtag), statt sie pro Archivseite neu zu schreiben.
+# Die Zeilen werden gesammelt und je LINKS_BATCH_SIZE Zeilen in einem eigenen Thread angehängt.
+# Beim Start werden nur die Einträge der Archivtage im Zeitraum des Crawls geladen, sodass ein über viele Crawls
+# gewachsenes Manifest weder den Start verlangsamt noch im Speicher gehalten wird.
+# Abfragen z.B. mit: python utils/link_manifest.py training_set/links.csv --date 2016-12-20 --filtered-out
+
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from scrapy import signals
+
+FIELDS = ("archive_date", "url", "category", "filtered_out")
+
+
+class LinkManifest:
+    # Parameter:    path - CSV-Datei des Manifests, batch_size - Zeilen pro Schreibvorgang,
+    #               start_date/end_date - Zeitraum des Crawls (JJJJ-MM-TT), nur dafür werden vorhandene Einträge
+    #               geladen (ohne Zeitraum alle)
+    def __init__(self, path, batch_size, start_date=None, end_date=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        # Bereits vorhandene Einträge (z.B. aus einem früheren Crawl) nicht doppelt anhängen
+        self.keys = set()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.keys.update(read_keys(path, start_date, end_date))
+            # Eine beim Abbruch unvollständig geschriebene letzte Zeile abschließen
+            with open(path, "rb+") as file:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    file.write(b"\n")
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerow(FIELDS)
+
+        # Ein einzelner Thread, damit die Zeilen in der richtigen Reihenfolge angehängt werden
+        self.executor = ThreadPoolExecutor(1)
+
+    # Parameter:    start_date/end_date - Zeitraum des Spiders (date), siehe __init__
+    @classmethod
+    def from_crawler(cls, crawler, start_date=None, end_date=None):
+        settings = crawler.settings
+        default_path = os.path.join(settings.get("OUTPUT_FOLDER", "../training_set"), "links.csv")
+        manifest = cls(settings.get("LINKS_FILE") or default_path, settings.getint("LINKS_BATCH_SIZE", 500),
+                       start_date.isoformat() if start_date else None, end_date.isoformat() if end_date else None)
+        crawler.signals.connect(manifest.close, signal=signals.spider_closed)
+        return manifest
+
+    # Funktion zum Vermerken der Links einer Archivseite
+    # Parameter:    archive_date - Datum der Archivseite (JJJJ-MM-TT),
+    #               links - Liste von (URL, Kategorie, herausgefiltert: True/False)
+    def add(self, archive_date, links):
+        for url, category, filtered_out in links:
+            key = (archive_date, url)
+            if key in self.keys:
+                continue
+            self.keys.add(key)
+            self.batch.append((archive_date, url, category, int(filtered_out)))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        future = self.executor.submit(append_rows, self.path, self.batch)
+        self.batch = []
+
+        def report_error(future):
+            if future.exception() is not None:
+                print(f"Links konnten nicht an {self.path} angehängt werden: {future.exception()}")
+        future.add_done_callback(report_error)
+
+    def close(self, spider=None):
+        self.flush()
+        self.executor.shutdown(wait=True)
+
+
+# Funktion zum Lesen der Schlüssel (archive_date, url) der vorhandenen Einträge
+# Das Datum steht am Anfang jeder Zeile, daher werden nur Zeilen im Zeitraum als CSV geparst
+# Parameter:    path - CSV-Datei des Manifests, start_date/end_date - Zeitraum (JJJJ-MM-TT, optional)
+# Rückgabe:     Generator über (archive_date, url)
+def read_keys(path, start_date=None, end_date=None):
+    with open(path, newline="", encoding="utf-8") as file:
+        next(file, None)
+        lines = file
+        if start_date is not None or end_date is not None:
+            first, last = start_date or "0000-00-00", end_date or "9999-99-99"
+            lines = (line for line in file if first <= line[:10] <= last)
+        for row in csv.reader(lines):
+            if len(row) >= 2 and row[1]:
+                yield row[0], row[1]
+
+
+# Funktion zum Anhängen mehrerer Zeilen an das Manifest (ein einziger Schreibvorgang)
+def append_rows(path, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    with open(path, "a", newline="", encoding="utf-8") as file:
+        file.write(buffer.getvalue())
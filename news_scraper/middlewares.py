@@ -0,0 +1,98 @@
+# Downloader-Middlewares der Scraper
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from scrapy.exceptions import NotConfigured
+
+from news_scraper.response_cache import ResponseCache, url_class
+
+
+# Downloader-Middleware als Cache der Antworten (siehe response_cache.py): gespeicherte Antworten werden ohne
+# Netzwerkzugriff zurückgegeben, sodass ein erneuter Crawl nur noch durch das Parsen begrenzt ist.
+# Sie liegt hinter RetryMiddleware und RedirectMiddleware und vor HttpCompressionMiddleware, gespeichert werden also
+# nur endgültige Antworten mit Status 200 und entpacktem Body (kein 304 einer bedingten Anfrage, keine Fehler).
+class ResponseCacheMiddleware:
+    def __init__(self, cache, expiration, fingerprinter, stats):
+        self.cache = cache
+        # URL-Klasse -> Sekunden, die eine gespeicherte Antwort verwendet wird (0 = unbegrenzt),
+        # Klassen ohne Eintrag werden nicht gespeichert
+        self.expiration = expiration
+        self.fingerprinter = fingerprinter
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("RESPONSE_CACHE_ENABLED"):
+            raise NotConfigured
+        expiration = settings.getdict("RESPONSE_CACHE_EXPIRATION", {"archive": 0, "article": 0})
+        return cls(ResponseCache.from_crawler(crawler), expiration, crawler.request_fingerprinter, crawler.stats)
+
+    def process_request(self, request, spider):
+        request_class = url_class(request)
+        if request_class not in self.expiration:
+            return None
+        response = self.cache.get(self.fingerprinter.fingerprint(request).hex(), self.expiration[request_class])
+        if response is None:
+            self.stats.inc_value(f"response_cache/miss/{request_class}", spider=spider)
+            return None
+        self.stats.inc_value(f"response_cache/hit/{request_class}", spider=spider)
+        return response
+
+    def process_response(self, request, response, spider):
+        request_class = url_class(request)
+        if response.status != 200 or "cached" in response.flags or request_class not in self.expiration:
+            return response
+        self.cache.put(self.fingerprinter.fingerprint(request).hex(), request_class, response)
+        self.stats.inc_value(f"response_cache/store/{request_class}", spider=spider)
+        return response
+
+
+# Downloader-Middleware zum Bremsen pro Domain, wenn die Seite mit 429 (Too Many Requests) oder 503 antwortet
+# Statt time.sleep() im Spider (blockiert den ganzen Reactor) wird die Wartezeit des Download-Slots der Domain
+# vervielfacht bzw. auf Retry-After gesetzt. AutoThrottle verringert sie danach anhand der Antwortzeiten wieder.
+# Die abgelehnte Anfrage selbst stellt die RetryMiddleware erneut.
+class AdaptiveThrottleMiddleware:
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.backoff_codes = {int(code) for code in settings.getlist("THROTTLE_BACKOFF_HTTP_CODES", [429, 503])}
+        self.backoff_factor = settings.getfloat("THROTTLE_BACKOFF_FACTOR", 2.0)
+        self.min_backoff = settings.getfloat("AUTOTHROTTLE_START_DELAY", 5.0)
+        self.max_delay = settings.getfloat("AUTOTHROTTLE_MAX_DELAY", 60.0)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def process_response(self, request, response, spider):
+        if response.status not in self.backoff_codes:
+            return response
+
+        slot_key = request.meta.get("download_slot")
+        slot = self.crawler.engine.downloader.slots.get(slot_key)
+        if slot is not None:
+            delay = max(slot.delay * self.backoff_factor, self.min_backoff, retry_after(response))
+            slot.delay = min(delay, self.max_delay)
+            self.crawler.stats.inc_value(f"throttle/backoff/{response.status}", spider=spider)
+            spider.logger.info(f"{response.status} von {slot_key}, Wartezeit jetzt {slot.delay:.1f}s")
+        return response
+
+
+# Funktion zum Auslesen des Retry-After-Headers (Sekunden oder HTTP-Datum)
+# Rückgabe:     Wartezeit in Sekunden, 0 wenn der Header fehlt oder ungültig ist
+def retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 0.0
+    value = value.decode("latin-1").strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,101 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from scrapy.http import HtmlResponse
+from scrapy.utils.project import get_project_settings
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from news_scraper.site_config import SiteConfig, site_path
+
+# Benchmark: wie viele Seiten pro Sekunde der ArchiveSpider für eine Site parst
+# Gemessen wird auf gespeicherten Seiten (z.B. scrapy fetch --nolog <URL> > pages/archiv-2016-12-19.html),
+# jeweils inkl. Parsen des HTML:
+#   nur HTML  - nur das Parsen des HTML durch lxml
+#   parsel    - Selektoren als Strings über response.xpath (wie in den bisherigen Spidern)
+#   kompiliert - vorkompilierte Selektoren der Site-Konfiguration (SiteConfig)
+#
+# Beispiel (im Ordner mit scrapy.cfg, der Name der Site wird in SITES_FOLDER des Projekts gesucht):
+#   python ../../news_scraper/parse_benchmark.py --site bild --archive-pages "pages/archiv-*.html" --article-pages "pages/artikel-*.html"
+
+
+def load_pages(pattern):
+    pages = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'rb') as file:
+            pages.append(file.read())
+    return pages
+
+
+def parse_only(response):
+    return response.selector
+
+
+# Selektoren als Strings wie in den bisherigen Spidern, zum Vergleich
+def parsel_archive(spec):
+    scope = spec.get('archive_scope')
+
+    def extract(response):
+        selector = response.xpath(scope) if scope else response
+        return selector.xpath(spec['link_xpath']).getall()
+    return extract
+
+
+def parsel_article(spec):
+    scope = spec.get('article_scope')
+
+    def extract(response):
+        selector = response.xpath(scope) if scope else response
+        article = {}
+        for field, field_spec in spec['fields'].items():
+            values = selector.xpath(field_spec['xpath']).getall()
+            join = field_spec.get('join')
+            article[field] = (join.join(values) if join is not None else values[0]) if values else field_spec.get('default', '')
+        return article
+    return extract
+
+
+# Funktion zum Messen der Seiten pro Sekunde einer Extraktionsfunktion
+# Jede Runde erzeugt neue Antworten, damit das Parsen des HTML mitgemessen wird
+def pages_per_second(pages, extract, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for body in pages:
+            extract(HtmlResponse('https://example.org/', body=body, encoding='utf-8'))
+    return rounds * len(pages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seiten pro Sekunde beim Parsen der Archiv- und Artikelseiten einer Site")
+    parser.add_argument('--site', required=True, help="Name einer Site-Konfiguration in SITES_FOLDER oder Pfad zu einer JSON-Datei")
+    parser.add_argument('--archive-pages', help="Glob-Muster gespeicherter Archivseiten")
+    parser.add_argument('--article-pages', help="Glob-Muster gespeicherter Artikelseiten")
+    parser.add_argument('--rounds', type=int, default=5, help="Durchläufe über alle Seiten")
+    args = parser.parse_args()
+
+    # Einstellungen des Scrapy-Projekts im aktuellen Ordner (für SITES_FOLDER)
+    sys.path.insert(0, os.getcwd())
+    sites_folder = get_project_settings().get('SITES_FOLDER')
+    site = SiteConfig.load(args.site, sites_folder)
+    with open(site_path(args.site, sites_folder), encoding='utf-8') as file:
+        spec = json.load(file)
+
+    print(f"{'Site':<10} {'Seiten':<8} {'Anzahl':>6} {'nur HTML':>10} {'parsel':>10} {'kompiliert':>10}")
+    for kind, pattern, parsel_extract, compiled_extract in (
+            ('archiv', args.archive_pages, parsel_archive(spec), site.archive_links),
+            ('artikel', args.article_pages, parsel_article(spec), site.extract_article)):
+        if not pattern:
+            continue
+        pages = load_pages(pattern)
+        if not pages:
+            print(f"Keine Seiten für {pattern} gefunden")
+            continue
+        results = [pages_per_second(pages, extract, args.rounds) for extract in (parse_only, parsel_extract, compiled_extract)]
+        print(f"{site.name:<10} {kind:<8} {len(pages):>6} " + ' '.join(f"{result:>8.0f}/s" for result in results))
+
+
+if __name__ == '__main__':
+    main()
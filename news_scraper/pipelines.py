@@ -0,0 +1,205 @@
+# Define your item pipelines here
+#
+# Don't forget to add your pipeline to the ITEM_PIPELINES setting
+# See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# useful for handling different item types with a single interface
+from itemadapter import ItemAdapter
+from fpdf import FPDF
+from scrapy.exceptions import NotConfigured
+
+from news_scraper.seen_urls import SeenUrlStore
+from utils.corpus import CorpusWriter
+
+
+# Pipeline zum Anhängen der Artikel an den Korpus (gzip-komprimiertes JSONL, geschrieben vom CorpusWriter
+# aus utils/corpus.py). Die Artikel werden gesammelt und je CORPUS_BATCH_SIZE Artikel als ein gzip-Block in einem
+# eigenen Thread komprimiert und angehängt. Aktiv, wenn "corpus" in OUTPUT_FORMATS steht.
+# Erst nach dem Schreiben eines Blocks werden dessen Artikel im SeenUrlStore als geschrieben gemeldet.
+class CorpusPipeline:
+    def __init__(self, path, batch_size, seen_urls=None):
+        self.path = path
+        self.writer = None
+        self.batch_size = batch_size
+        self.seen_urls = seen_urls
+        self.batch = []
+        self.executor = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if "corpus" not in settings.getlist("OUTPUT_FORMATS", ["pdf"]):
+            raise NotConfigured
+        default_path = os.path.join(settings.get("OUTPUT_FOLDER", "../training_set"), "articles.jsonl.gz")
+        return cls(settings.get("CORPUS_FILE") or default_path, settings.getint("CORPUS_BATCH_SIZE", 100),
+                   SeenUrlStore.from_crawler(crawler))
+
+    def open_spider(self, spider):
+        self.writer = CorpusWriter(self.path)
+        # Ein einzelner Thread, damit die Blöcke in der richtigen Reihenfolge angehängt werden
+        self.executor = ThreadPoolExecutor(1)
+
+    def close_spider(self, spider):
+        self.flush(spider)
+        self.executor.shutdown(wait=True)
+
+    def process_item(self, item, spider):
+        record = ItemAdapter(item).asdict()
+        record.pop("index", None)
+        record["source"] = spider.name
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_size:
+            self.flush(spider)
+        return item
+
+    def flush(self, spider):
+        if not self.batch:
+            return
+        future = self.executor.submit(self.writer.write_many, self.batch)
+        urls = [record["url"] for record in self.batch]
+        self.batch = []
+
+        def finished(future):
+            if future.exception() is not None:
+                spider.logger.error(f"Artikel konnten nicht an {self.path} angehängt werden: {future.exception()}")
+            elif self.seen_urls is not None:
+                for url in urls:
+                    self.seen_urls.written(url, "corpus")
+        future.add_done_callback(finished)
+
+
+# Pipeline zum Speichern der Artikel als PDF, aktiv wenn "pdf" in OUTPUT_FORMATS steht
+# Das Erstellen der PDF (FPDF-Layout, CPU-lastig) und das Schreiben laufen in einem begrenzten Prozess- bzw.
+# Thread-Pool, sodass Herunterladen und Parsen im Reactor weiterlaufen. Sind PDF_MAX_PENDING Artikel in Arbeit,
+# wartet process_item, bis wieder ein Platz frei ist. Die wartenden Artikel bremsen über den Scraper-Slot von
+# Scrapy auch das Herunterladen (Backpressure).
+class PdfPipeline:
+    def __init__(self, output_folder, pool, workers, max_pending, seen_urls=None):
+        self.output_folder = output_folder
+        self.pool = pool
+        self.workers = workers
+        self.max_pending = max_pending
+        self.seen_urls = seen_urls
+        self.executor = None
+        self.slots = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if "pdf" not in settings.getlist("OUTPUT_FORMATS", ["pdf"]):
+            raise NotConfigured
+        workers = settings.getint("PDF_WORKERS") or os.cpu_count() or 1
+        return cls(
+            output_folder=settings.get("OUTPUT_FOLDER", "../training_set"),
+            pool=settings.get("PDF_POOL", "process"),
+            workers=workers,
+            max_pending=settings.getint("PDF_MAX_PENDING") or 2 * workers,
+            seen_urls=SeenUrlStore.from_crawler(crawler),
+        )
+
+    def open_spider(self, spider):
+        os.makedirs(self.output_folder, exist_ok=True)
+        if self.pool == "process":
+            # spawn statt fork: der Crawler-Prozess hat bereits laufende Threads
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.executor = ThreadPoolExecutor(self.workers)
+        self.slots = asyncio.Semaphore(self.max_pending)
+
+    def close_spider(self, spider):
+        self.executor.shutdown(wait=True)
+
+    async def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        file_name = pdf_file_name(adapter)
+        file_path = os.path.join(self.output_folder, file_name)
+
+        async with self.slots:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, generate_pdf_from_texts, adapter["title"],
+                                       adapter["date_time"], adapter.get("intro"), adapter["body"], file_path)
+        if self.seen_urls is not None:
+            self.seen_urls.written(adapter["url"], "pdf")
+
+        print(f"Downloaded and saved as: {file_name}")
+        return item
+
+
+# Funktion zum Erstellen des PDF-Dateinamens aus Datum, Index, Kategorie und ersten 3 Wörtern vom Link
+def pdf_file_name(adapter):
+    slug = '-'.join(adapter["url"].rsplit('/', 1)[-1].split('-')[:3])
+    return f"{adapter['archive_date']}_{adapter['index'] + 1:02d}_{adapter['category']}_{slug}.pdf"
+
+
+# Funktion zum Bereinigung von Sonderzeichen im Text
+# Parameter:    text - Textbaustein aus dem Artikel z.b. Titel
+# Rückgabe:     text - Bereinigter Text
+def sanitize_text(text):
+    # Bestimmte Zeichen ersetzen, die eventuell für Kontext relevant sind
+    replacements = {
+        '\u201c': '"',      # “ - Right Double Quotation Mark
+        '\u201d': '"',      # " - Right Double Quotation Mark
+        '\u201e': '"',      # „ - Left Double Quotation Mark
+        '\u2060': ' ',      # Word Joiner - a zero width non-breaking space
+        '\u2013': '-',      # – - En Dash
+        '\u2014': '--',     # — - Em Dash
+        '\u2018': "'",      # ' - Left Single Quotation Mark
+        '\u2019': "'",      # ' - Right Single Quotation Mark
+        '\u2022': '*',      # • - Bullet
+        '\u2026': '...'     # … - Horizontal Ellipsis
+    }
+
+    # Im übergebenen Text jedes Zeichen durch Zeichen ersetzen, welches in replacements festgelegt wurde
+    for unicode_char, replacement in replacements.items():
+        text = text.replace(unicode_char, replacement)
+
+    try:
+        # Encodieren in latin-1
+        text = text.encode('latin-1', 'replace').decode('latin-1')
+    except UnicodeEncodeError as e:
+        print(f"Fehler bei latin-1 Encoding: {str(e)}")
+        try:
+            # Wenn latin-1 fehlschlägt, versuche utf-8
+            text = text.encode('utf-8', 'ignore').decode('utf-8')
+        except UnicodeEncodeError as e:
+            print(f"Fehler bei utf-8 Encoding: {str(e)}")
+            return text  # Falls alles fehlschlägt, Originaltext zurückgeben
+
+    return text
+
+
+# Funktion zum Generieren der PDF und Speichern im hinterlegten Pfad
+# Läuft im Pool der PdfPipeline und muss daher eine Funktion auf Modulebene sein
+# Parameter:    title, date_time, intro, article_text, pdf_path - Textabschnitte aus Artikel,
+#               intro wird nur eingefügt, wenn der Artikel eine Einleitung hat (Bild-Artikel haben keine)
+def generate_pdf_from_texts(title, date_time, intro, article_text, pdf_path):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Arial", size=12)
+
+    # Titel hinzufügen
+    pdf.multi_cell(0, 10, txt=sanitize_text(title), align='C')
+    pdf.ln()
+
+    # Datum und Uhrzeit hinzufügen
+    pdf.multi_cell(0, 10, txt=sanitize_text(date_time))
+    pdf.ln()
+
+    # Einleitung hinzufügen
+    if intro:
+        pdf.multi_cell(0, 10, txt=sanitize_text(intro))
+        pdf.ln()
+
+    # Haupttext hinzufügen
+    pdf.multi_cell(0, 10, txt=sanitize_text(article_text))
+    pdf.ln()
+
+    # PDF erst unter temporärem Namen speichern, damit kein halbes PDF im Ordner liegt
+    pdf.output(pdf_path + '.tmp')
+    os.replace(pdf_path + '.tmp', pdf_path)
@@ -0,0 +1,129 @@
+# Cache der heruntergeladenen Antworten (SQLite), damit ein erneuter Crawl, z.B. nach einer Änderung an den
+# Selektoren, die Archiv- und Artikelseiten nicht noch einmal herunterlädt
+#
+# Die Bodies werden inhaltsadressiert gespeichert (SHA-1 des Bodys, gleiche Seiten nur einmal) und komprimiert,
+# mit zstd oder brotli, falls installiert (pip install zstandard / brotli), sonst mit zlib. Das Verfahren steht pro
+# Body in der Datenbank, sodass ein Cache auch nach einem Wechsel des Verfahrens lesbar bleibt.
+# Jede Antwort gehört zu einer URL-Klasse ("archive" oder "article", siehe url_class), für die in
+# RESPONSE_CACHE_EXPIRATION festgelegt ist, wie lange eine gespeicherte Antwort verwendet wird.
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from scrapy import signals
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Kompressionsverfahren: Name -> (komprimieren, dekomprimieren), nur installierte Verfahren
+CODECS = {"zlib": (lambda data: zlib.compress(data, 9), zlib.decompress)}
+if brotli is not None:
+    CODECS["brotli"] = (lambda data: brotli.compress(data, quality=9), brotli.decompress)
+if zstandard is not None:
+    CODECS["zstd"] = (zstandard.ZstdCompressor(level=12).compress,
+                      lambda data: zstandard.ZstdDecompressor().decompress(data))
+# Bevorzugte Reihenfolge, wenn RESPONSE_CACHE_CODEC nicht gesetzt ist
+CODEC_PREFERENCE = ("zstd", "brotli", "zlib")
+# Anzahl gespeicherter Antworten, nach denen in die Datenbank geschrieben wird
+COMMIT_INTERVAL = 100
+
+
+# Funktion zum Bestimmen der URL-Klasse einer Anfrage
+# Rückgabe:     "article" für Artikel-Anfragen der Spider (meta "article"), sonst "archive"
+def url_class(request):
+    return "article" if request.meta.get("article") else "archive"
+
+
+class ResponseCache:
+    # Parameter:    path - SQLite-Datei, codec - Kompressionsverfahren für neue Bodies (siehe CODECS)
+    def __init__(self, path, codec=None):
+        codec = codec or next(name for name in CODEC_PREFERENCE if name in CODECS)
+        if codec not in CODECS:
+            raise ValueError(f"Kompressionsverfahren '{codec}' nicht verfügbar, installiert: {', '.join(CODECS)}")
+        self.path = path
+        self.codec = codec
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )""")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                fingerprint TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                url_class TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )""")
+        self.connection.commit()
+        self._pending = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        default_path = os.path.join(settings.get("OUTPUT_FOLDER", "../training_set"), "response_cache.sqlite")
+        cache = cls(settings.get("RESPONSE_CACHE_FILE") or default_path, settings.get("RESPONSE_CACHE_CODEC"))
+        crawler.signals.connect(cache.close, signal=signals.spider_closed)
+        return cache
+
+    # Funktion zum Laden einer gespeicherten Antwort
+    # Parameter:    fingerprint - Fingerprint der Anfrage, max_age - Höchstalter in Sekunden (0 = unbegrenzt)
+    # Rückgabe:     Response oder None, wenn keine (ausreichend frische, lesbare) Antwort gespeichert ist
+    def get(self, fingerprint, max_age=0):
+        row = self.connection.execute(
+            "SELECT r.url, r.status, r.headers, r.fetched_at, b.codec, b.data FROM responses r "
+            "JOIN bodies b ON b.hash = r.body_hash WHERE r.fingerprint = ?", (fingerprint,)).fetchone()
+        if row is None:
+            return None
+        url, status, headers, fetched_at, codec, data = row
+        if max_age and time.time() - fetched_at > max_age:
+            return None
+        if codec not in CODECS:
+            return None
+        body = CODECS[codec][1](data)
+        headers = Headers(json.loads(headers))
+        response_class = responsetypes.from_args(headers=headers, url=url, body=body)
+        return response_class(url=url, status=status, headers=headers, body=body, flags=["cached"])
+
+    # Funktion zum Speichern einer Antwort (ersetzt eine ältere Antwort derselben Anfrage)
+    def put(self, fingerprint, request_class, response):
+        body_hash = hashlib.sha1(response.body).hexdigest()
+        if self.connection.execute("SELECT 1 FROM bodies WHERE hash = ?", (body_hash,)).fetchone() is None:
+            self.connection.execute(
+                "INSERT INTO bodies (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                (body_hash, self.codec, len(response.body), CODECS[self.codec][0](response.body)))
+        headers = {key.decode("latin-1"): [value.decode("latin-1") for value in values]
+                   for key, values in response.headers.items()}
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses (fingerprint, url, url_class, status, headers, body_hash, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (fingerprint, response.url, request_class, response.status, json.dumps(headers), body_hash, time.time()))
+        self._pending += 1
+        if self._pending >= COMMIT_INTERVAL:
+            self.connection.commit()
+            self._pending = 0
+
+    def close(self, spider=None):
+        # Bodies, auf die nach dem Ersetzen veralteter Antworten keine Antwort mehr verweist, entfernen
+        self.connection.execute("DELETE FROM bodies WHERE hash NOT IN (SELECT body_hash FROM responses)")
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,201 @@
+# Speicher der bereits gespeicherten Artikel (SQLite), damit ein erneuter Crawl nur neue oder geänderte Artikel
+# herunterlädt und schreibt
+#
+# Pro Artikel-URL werden der Hash des Artikeltextes, ETag/Last-Modified der letzten Antwort und die Zeitpunkte
+# gespeichert. Bekannte Artikel werden je nach SEEN_URLS_MODE gar nicht mehr angefragt ("skip") oder bedingt
+# angefragt ("conditional", If-None-Match/If-Modified-Since). Ein Artikel gilt erst als gespeichert, wenn alle
+# Ausgaben aus OUTPUT_FORMATS ihn sicher geschrieben haben (PDF umbenannt, Korpus-Block per fsync geschrieben),
+# sodass nach einem Abbruch kein Artikel fehlt, der als gespeichert eingetragen ist.
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from itemadapter import ItemAdapter
+from scrapy import signals
+from scrapy.exceptions import DropItem, IgnoreRequest, NotConfigured
+
+SEEN_URL_MODES = ("conditional", "skip")
+# Ausgaben, die einen Artikel schreiben und ihn danach als geschrieben melden
+OUTPUTS = ("corpus", "pdf")
+
+
+# Funktion zum Berechnen des Hashs über den Text eines Artikels (wie article_hash in utils/corpus.py)
+# Parameter:    adapter - ItemAdapter eines Artikels
+# Rückgabe:     SHA-256 als Hex-String
+def content_hash(adapter):
+    parts = [adapter.get("title"), adapter.get("date_time"), adapter.get("intro"), adapter.get("body")]
+    return hashlib.sha256("\n\n".join(part for part in parts if part).encode("utf-8")).hexdigest()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class SeenUrlStore:
+    # Parameter:    path - SQLite-Datei, outputs - Ausgaben, die jeden Artikel schreiben müssen
+    def __init__(self, path, outputs):
+        self.path = path
+        self.outputs = frozenset(outputs)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Die Korpus-Pipeline meldet geschriebene Artikel aus ihrem Schreib-Thread, daher eine Verbindung mit Lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at TEXT NOT NULL,
+                written_at TEXT NOT NULL
+            )""")
+        self.connection.commit()
+        # ETag/Last-Modified der Antworten, deren Artikel noch nicht durch die Pipelines gelaufen sind
+        self.validators = {}
+        # Geänderte Artikel, die noch nicht von allen Ausgaben geschrieben wurden: url -> (Eintrag, offene Ausgaben)
+        self.pending = {}
+
+    # Funktion zum Holen der gemeinsamen Instanz eines Crawlers (Middleware und Pipelines nutzen denselben Speicher)
+    # Rückgabe:     SeenUrlStore oder None, wenn SEEN_URLS_MODE = "off"
+    @classmethod
+    def from_crawler(cls, crawler):
+        if hasattr(crawler, "seen_url_store"):
+            return crawler.seen_url_store
+        settings = crawler.settings
+        mode = settings.get("SEEN_URLS_MODE", "conditional")
+        store = None
+        if mode != "off":
+            if mode not in SEEN_URL_MODES:
+                raise ValueError(f"Unbekannter SEEN_URLS_MODE '{mode}', erlaubt: off, {', '.join(SEEN_URL_MODES)}")
+            default_path = os.path.join(settings.get("OUTPUT_FOLDER", "../training_set"), "seen_urls.sqlite")
+            outputs = [output for output in settings.getlist("OUTPUT_FORMATS", ["pdf"]) if output in OUTPUTS]
+            store = cls(settings.get("SEEN_URLS_FILE") or default_path, outputs)
+            crawler.signals.connect(store.close, signal=signals.spider_closed)
+        crawler.seen_url_store = store
+        return store
+
+    # Funktion zum Nachschlagen eines gespeicherten Artikels
+    # Rückgabe:     (content_hash, etag, last_modified) oder None
+    def get(self, url):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT content_hash, etag, last_modified FROM articles WHERE url = ?", (url,)).fetchone()
+
+    def remember_validators(self, url, etag, last_modified):
+        with self.lock:
+            self.validators[url] = (etag, last_modified)
+
+    # Funktion zum Prüfen eines heruntergeladenen Artikels
+    # Unveränderte Artikel bekommen nur die neuen ETag/Last-Modified-Werte, geänderte warten auf ihre Ausgaben
+    # Rückgabe:     True, wenn der Artikel neu oder geändert ist und geschrieben werden soll
+    def begin(self, url, article_hash):
+        row = self.get(url)
+        with self.lock:
+            etag, last_modified = self.validators.pop(url, (None, None))
+            if row is not None and row[0] == article_hash:
+                self.connection.execute(
+                    "UPDATE articles SET etag = ?, last_modified = ?, fetched_at = ? WHERE url = ?",
+                    (etag, last_modified, _now(), url))
+                self.connection.commit()
+                return False
+            self.pending[url] = ((url, article_hash, etag, last_modified, _now()), set(self.outputs))
+        if not self.outputs:
+            self._commit(url)
+        return True
+
+    # Funktion, mit der eine Ausgabe meldet, dass ein Artikel sicher geschrieben wurde
+    # Parameter:    url - Artikel-URL, output - "corpus" oder "pdf"
+    def written(self, url, output):
+        with self.lock:
+            entry = self.pending.get(url)
+            if entry is None:
+                return
+            entry[1].discard(output)
+            if entry[1]:
+                return
+        self._commit(url)
+
+    def _commit(self, url):
+        with self.lock:
+            record, _ = self.pending.pop(url)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO articles (url, content_hash, etag, last_modified, fetched_at, written_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", record + (_now(),))
+            self.connection.commit()
+
+    def close(self, spider=None):
+        with self.lock:
+            if self.pending:
+                print(f"{len(self.pending)} Artikel wurden nicht vollständig geschrieben und werden beim nächsten Crawl erneut geladen")
+            self.connection.close()
+
+
+# Downloader-Middleware für die Artikel-Anfragen (meta "article"): bekannte Artikel überspringen oder bedingt
+# anfragen. Antwortet der Server mit 304 Not Modified, wird der Artikel nicht weiter verarbeitet.
+class SeenUrlMiddleware:
+    def __init__(self, store, mode, stats):
+        self.store = store
+        self.mode = mode
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        store = SeenUrlStore.from_crawler(crawler)
+        if store is None:
+            raise NotConfigured
+        return cls(store, crawler.settings.get("SEEN_URLS_MODE", "conditional"), crawler.stats)
+
+    def process_request(self, request, spider):
+        if not request.meta.get("article"):
+            return None
+        row = self.store.get(request.url)
+        if row is None:
+            return None
+        if self.mode == "skip":
+            self.stats.inc_value("seen_urls/skipped", spider=spider)
+            raise IgnoreRequest(f"Artikel bereits gespeichert: {request.url}")
+
+        _, etag, last_modified = row
+        if etag:
+            request.headers.setdefault("If-None-Match", etag)
+        if last_modified:
+            request.headers.setdefault("If-Modified-Since", last_modified)
+        return None
+
+    def process_response(self, request, response, spider):
+        if not request.meta.get("article"):
+            return response
+        if response.status == 304:
+            self.stats.inc_value("seen_urls/not_modified", spider=spider)
+            raise IgnoreRequest(f"Artikel unverändert (304): {request.url}")
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        self.store.remember_validators(request.url,
+                                       etag.decode("latin-1") if etag else None,
+                                       last_modified.decode("latin-1") if last_modified else None)
+        return response
+
+
+# Pipeline, die unveränderte Artikel verwirft, bevor sie an die Ausgaben (Korpus, PDF) gehen
+class SeenUrlPipeline:
+    def __init__(self, store, stats):
+        self.store = store
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        store = SeenUrlStore.from_crawler(crawler)
+        if store is None:
+            raise NotConfigured
+        return cls(store, crawler.stats)
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        if not self.store.begin(adapter["url"], content_hash(adapter)):
+            self.stats.inc_value("seen_urls/unchanged", spider=spider)
+            raise DropItem(f"Artikel unverändert: {adapter['url']}")
+        return item
@@ -0,0 +1,145 @@
+# Site-Konfigurationen für den generischen ArchiveSpider (spiders/archive_spider.py)
+#
+# Eine Site wird durch eine JSON-Datei im Ordner sites/ eines Scrapy-Projekts beschrieben (SITES_FOLDER in
+# settings.py, z.B. bild-gpt/bild_archive_scraper/bild_archive_scraper/sites/bild.json):
+#   name                 - Name der Site, wird als source im Korpus gespeichert
+#   archive_url          - URL der Archivseite eines Tages, {date} wird durch das Datum ersetzt
+#   date_format          - Format des Datums in archive_url (strftime, z.B. "%d.%m.%Y")
+#   default_start_date,
+#   default_end_date     - Zeitraum ohne Spider-Argumente (JJJJ-MM-TT)
+#   allowed_domains      - Domains, auf die der Spider Anfragen stellen darf (optional)
+#   archive_scope        - XPath des Teilbaums der Archivseite mit den Artikel-Links (optional)
+#   link_xpath           - XPath der Artikel-Links, relativ zu archive_scope (z.B. ".//article/a/@href")
+#   article_scope        - XPath des Teilbaums der Artikelseite mit den Feldern (optional)
+#   fields               - Felder des Artikels (title, date_time, intro, body) mit
+#                          xpath (relativ zu article_scope), join (Trenner, sonst nur der erste Treffer) und default
+#   category_segment     - Position der Kategorie im Pfad der Artikel-URL (0 = erster Teil, z.B. /politik/...)
+#   unwanted_categories  - Kategorien, deren Artikel nicht gescrapt werden
+#
+# Alle XPath-Ausdrücke werden beim Laden einmal kompiliert und ohne Umweg über parsel direkt auf den
+# lxml-Baum der Antwort angewendet. Mit einem Scope werden nur die Knoten dieses Teilbaums durchsucht,
+# die XPath-Ausdrücke darin müssen dafür relativ sein (".//..." bzw. ohne führenden "/"). Findet der Scope auf
+# einer Seite nichts (z.B. nach einer Änderung des Layouts), wird das ganze Dokument durchsucht und
+# on_scope_empty aufgerufen, damit der Spider das melden kann.
+
+import json
+import os
+from urllib.parse import urlparse
+
+from lxml import etree
+
+ARTICLE_FIELDS = ("title", "date_time", "intro", "body")
+
+
+# Vorkompilierter XPath eines Feldes und wie mehrere Treffer zusammengefügt werden
+class FieldSelector:
+    def __init__(self, xpath, join=None, default=""):
+        self.xpath = etree.XPath(xpath)
+        self.join = join
+        self.default = default
+
+    # Funktion zum Auslesen aller Treffer in den Scope-Knoten
+    def values(self, nodes):
+        return [str(value) for node in nodes for value in self.xpath(node)]
+
+    # Funktion zum Auslesen des Feldwerts: alle Treffer verbunden mit join, sonst nur der erste Treffer
+    def extract(self, nodes):
+        values = self.values(nodes)
+        if not values:
+            return self.default
+        if self.join is None:
+            return values[0]
+        return self.join.join(values)
+
+
+# Funktion zum Bestimmen der JSON-Datei einer Site (Name einer Datei in sites_folder oder Pfad)
+def site_path(site, sites_folder=None):
+    if site.endswith(".json"):
+        return site
+    if sites_folder is None:
+        raise ValueError(f"Site '{site}' ist kein Pfad zu einer JSON-Datei und SITES_FOLDER ist nicht gesetzt")
+    return os.path.join(sites_folder, site + ".json")
+
+
+class SiteConfig:
+    def __init__(self, name, archive_url, date_format, link_xpath, fields, default_start_date, default_end_date,
+                 allowed_domains=(), archive_scope=None, article_scope=None, category_segment=0,
+                 unwanted_categories=()):
+        unknown_fields = set(fields) - set(ARTICLE_FIELDS)
+        if unknown_fields:
+            raise ValueError(f"Unbekannte Felder in der Site-Konfiguration {name}: {', '.join(sorted(unknown_fields))}")
+        # Ein absoluter XPath (z.B. "//h2") durchsucht trotz Scope das ganze Dokument
+        for scope, scope_name, xpaths in ((archive_scope, 'archive_scope', {'link_xpath': link_xpath}),
+                                          (article_scope, 'article_scope',
+                                           {field: spec['xpath'] for field, spec in fields.items()})):
+            absolute = [key for key, xpath in xpaths.items() if xpath.startswith('/')]
+            if scope and absolute:
+                raise ValueError(f"XPath von {', '.join(absolute)} in der Site-Konfiguration {name} muss relativ "
+                                 f"zu {scope_name} sein (z.B. \".//h2\")")
+
+        self.name = name
+        self.archive_url = archive_url
+        self.date_format = date_format
+        self.default_start_date = default_start_date
+        self.default_end_date = default_end_date
+        self.allowed_domains = list(allowed_domains)
+        self.archive_scope = etree.XPath(archive_scope) if archive_scope else None
+        self.links = FieldSelector(link_xpath)
+        self.article_scope = etree.XPath(article_scope) if article_scope else None
+        self.fields = {field: FieldSelector(**spec) for field, spec in fields.items()}
+        self.category_segment = category_segment
+        self.unwanted_categories = frozenset(unwanted_categories)
+
+    # Funktion zum Laden einer Site-Konfiguration
+    # Parameter:    site - Name einer Datei in sites_folder (ohne .json) oder Pfad zu einer JSON-Datei,
+    #               sites_folder - Ordner der Site-Konfigurationen (SITES_FOLDER in settings.py)
+    # Rückgabe:     SiteConfig mit kompilierten Selektoren
+    @classmethod
+    def load(cls, site, sites_folder=None):
+        with open(site_path(site, sites_folder), encoding="utf-8") as file:
+            return cls(**json.load(file))
+
+    # Funktion zum Erstellen der URL der Archivseite eines Tages
+    def archive_page_url(self, day):
+        return self.archive_url.format(date=day.strftime(self.date_format))
+
+    # Funktion zum Extrahieren der Artikel-Links einer Archivseite
+    # Parameter:    response - Antwort der Archivseite
+    #               on_scope_empty - Funktion(scope_name, response), aufgerufen wenn archive_scope nichts findet
+    # Rückgabe:     Liste der Links (wie im HTML, evtl. relativ)
+    def archive_links(self, response, on_scope_empty=None):
+        return self.links.values(_scope_nodes(response, self.archive_scope, "archive_scope", on_scope_empty))
+
+    # Funktion zum Extrahieren der Felder einer Artikelseite
+    # Parameter:    response - Antwort der Artikelseite,
+    #               on_scope_empty - Funktion(scope_name, response), aufgerufen wenn article_scope nichts findet
+    # Rückgabe:     dict mit allen Feldern aus ARTICLE_FIELDS, nicht konfigurierte Felder sind leer
+    def extract_article(self, response, on_scope_empty=None):
+        nodes = _scope_nodes(response, self.article_scope, "article_scope", on_scope_empty)
+        article = dict.fromkeys(ARTICLE_FIELDS, "")
+        for field, selector in self.fields.items():
+            article[field] = selector.extract(nodes)
+        return article
+
+    # Funktion zur Extraktion der Kategorie aus der Artikel-URL
+    # Parameter:    url - vollständige URL wie z.B. https://www.bild.de/regional/ein-artikel
+    # Rückgabe:     Teil des Pfads an Position category_segment oder "unknown"
+    def category(self, url):
+        parts = urlparse(url).path.split("/")[1:]
+        if len(parts) > self.category_segment and parts[self.category_segment]:
+            return parts[self.category_segment]
+        return "unknown"
+
+
+# Funktion zum Bestimmen der Knoten, in denen gesucht wird (Scope-Teilbaum oder das ganze Dokument)
+# Findet der Scope nichts, wird das ganze Dokument durchsucht, statt die Felder stillschweigend leer zu lassen
+def _scope_nodes(response, scope, scope_name, on_scope_empty=None):
+    root = response.selector.root
+    if scope is None:
+        return [root]
+    nodes = scope(root)
+    if nodes:
+        return nodes
+    if on_scope_empty is not None:
+        on_scope_empty(scope_name, response)
+    return [root]
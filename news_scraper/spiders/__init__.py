@@ -0,0 +1 @@
+# Spider der Nachrichten-Scraper, in settings.py der Projekte über SPIDER_MODULES eingebunden
@@ -0,0 +1,124 @@
+import scrapy
+from datetime import date, timedelta
+from urllib.parse import urljoin
+
+from scrapy.utils.misc import load_object
+
+from news_scraper.links import LinkManifest
+from news_scraper.site_config import SiteConfig
+
+# Generischer Spider für Nachrichtenarchive mit einer Archivseite pro Tag
+# URLs, Selektoren und Filter stehen in einer Site-Konfiguration (sites/<site>.json, siehe site_config.py).
+# Welche Site ein Projekt crawlt, steht in SITE in settings.py, eine weitere Nachrichtenseite braucht daher nur
+# eine neue JSON-Datei, z.B.
+#   scrapy crawl archive_spider -a start_date=2016-12-01 -a end_date=2016-12-31
+#   scrapy crawl archive_spider -a site=pfad/zu/welt.json -s OUTPUT_FOLDER=../welt
+class ArchiveSpider(scrapy.Spider):
+    name = "archive_spider"
+
+    # Zeitraum und Aufteilung auf mehrere Crawler-Prozesse über Spider-Argumente, z.B.
+    #   scrapy crawl archive_spider -a start_date=2016-01-01 -a end_date=2016-12-31 -a shard=3/8
+    # site: Name einer Site-Konfiguration in SITES_FOLDER oder Pfad zu einer JSON-Datei (Standard: SITE aus settings.py)
+    # start_date/end_date: erster und letzter Tag (JJJJ-MM-TT), ohne end_date wird nur start_date gecrawlt,
+    #   ohne beide der Standardzeitraum der Site
+    # shard: i/n - dieser Prozess crawlt nur jeden n-ten Tag (Teil i von n, 1 <= i <= n), die Teile überschneiden sich nicht
+    def __init__(self, site=None, start_date=None, end_date=None, shard="1/1", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.site = site
+        self.start_date = start_date
+        self.end_date = end_date
+
+        self.shard_index, self.shard_count = (int(part) for part in shard.split('/'))
+        if not 1 <= self.shard_index <= self.shard_count:
+            raise ValueError(f"Ungültiger Shard '{shard}', erwartet wird i/n mit 1 <= i <= n")
+
+    # Funktion zum Laden der Site-Konfiguration und Bestimmen des Zeitraums
+    # Parameter:    site - Name oder Pfad der Site-Konfiguration, sites_folder - Ordner der Site-Konfigurationen
+    def configure(self, site, sites_folder=None):
+        if site is None:
+            raise ValueError("Keine Site angegeben, SITE in settings.py setzen oder z.B. -a site=bild übergeben")
+        # Selektoren einmal pro Site kompilieren
+        self.site_config = SiteConfig.load(site, sites_folder)
+        if self.site_config.allowed_domains:
+            self.allowed_domains = self.site_config.allowed_domains
+
+        start_date, end_date = self.start_date, self.end_date
+        if start_date is None and end_date is None:
+            start_date, end_date = self.site_config.default_start_date, self.site_config.default_end_date
+        self.start_date = date.fromisoformat(start_date or end_date)
+        self.end_date = date.fromisoformat(end_date or start_date)
+        if self.end_date < self.start_date:
+            raise ValueError(f"end_date {self.end_date} liegt vor start_date {self.start_date}")
+
+    # Site-Konfiguration und Artikel-Klasse aus settings.py des Projekts, Link-Manifest (links.csv) für alle
+    # Archivseiten dieses Crawls
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.configure(spider.site or settings.get("SITE"), settings.get("SITES_FOLDER"))
+        # Ohne ARTICLE_ITEM werden die Artikel als dict geliefert
+        spider.item_class = load_object(settings["ARTICLE_ITEM"]) if settings.get("ARTICLE_ITEM") else dict
+        # Nur die Einträge der Archivtage dieses Crawls laden
+        spider.link_manifest = LinkManifest.from_crawler(crawler, spider.start_date, spider.end_date)
+        return spider
+
+    # Archivseiten der Tage im Zeitraum erst erzeugen, wenn Scrapy sie anfordert,
+    # sodass auch lange Zeiträume keinen Speicher belegen
+    def start_requests(self):
+        day = self.start_date
+        while day <= self.end_date:
+            # Aufteilung über die fortlaufende Tagesnummer, damit jeder Tag genau einem Shard gehört
+            if day.toordinal() % self.shard_count == self.shard_index - 1:
+                yield scrapy.Request(self.site_config.archive_page_url(day), callback=self.parse,
+                                     meta={'archive_date': day.isoformat()})
+            day += timedelta(days=1)
+
+    # Funktion zum Melden einer Seite, auf der ein Scope der Site-Konfiguration nichts findet
+    # (es wird dann das ganze Dokument durchsucht), gezählt in site_config/scope_empty/<scope_name>
+    def scope_empty(self, scope_name, response):
+        self.logger.warning(f"{scope_name} der Site {self.site_config.name} findet nichts auf {response.url}, "
+                            f"durchsucht wird das ganze Dokument")
+        self.crawler.stats.inc_value(f"site_config/scope_empty/{scope_name}")
+
+    # Funktion zum Filtern und Speichern der Links,
+    # anschließend Aufrufen der Funktion zum Scrapen pro Link
+    def parse(self, response):
+        archive_date = response.meta['archive_date']
+
+        # Artikel-Links auf Archivseite extrahieren
+        links = self.site_config.archive_links(response, on_scope_empty=self.scope_empty)
+
+        # Links filtern, sodass Links mit unwanted_categories wegfallen, und alle Links
+        # mit Kategorie und Filter-Ergebnis im Link-Manifest vermerken
+        manifest_links = []
+        filtered_links = []
+        for link in links:
+            full_link = urljoin(response.url, link)
+            category = self.site_config.category(full_link)
+            filtered_out = category in self.site_config.unwanted_categories
+            manifest_links.append((full_link, category, filtered_out))
+            if not filtered_out:
+                filtered_links.append((full_link, category))
+        self.link_manifest.add(archive_date, manifest_links)
+
+        print('All links: ', len(links))
+        print('Filtered links: ', len(filtered_links))
+
+        # Herunterladen der gefilterten Artikel
+        for i, (full_link, category) in enumerate(filtered_links):
+            yield scrapy.Request(full_link, callback=self.parse_article,
+                                 meta={'archive_date': archive_date, 'index': i, 'link': full_link,
+                                       'category': category, 'article': True})
+
+    # Funktion zum parsen pro Artikel und Extrahieren der Textbausteine
+    # Gespeichert wird der Artikel von den Pipelines (siehe pipelines.py)
+    def parse_article(self, response):
+        article = self.site_config.extract_article(response, on_scope_empty=self.scope_empty)
+        yield self.item_class(
+            url=response.meta['link'],
+            category=response.meta['category'],
+            archive_date=response.meta['archive_date'],
+            index=response.meta['index'],
+            **article,
+        )
@@ -1,4 +1,18 @@
 ### COPY THIS FILE AND NAME IT 'config.py' (delete 'TEMPLATE' from file name)
 # Then add your API key
 
-api_key = '' # Add your key here
\ No newline at end of file
+api_key = '' # Add your key here
+
+# Optional: custom OpenAI-compatible API endpoint, e.g. the local fake server for offline tests
+# (python utils/fake_openai_server.py --port 8000)
+# api_base = 'http://127.0.0.1:8000/v1'
+
+# Optional: number of questions answered at the same time and size of the HTTP connection pool to the API
+concurrency_limit = 16
+max_connections = 20
+
+# Optional: per-stage latency, token and answer cache metrics
+# metrics_port - serve Prometheus histograms at http://127.0.0.1:<port>/metrics (None = off)
+# metrics_log  - append one JSON line per question with stage times, tokens and cache result ('-' = console, None = off)
+metrics_port = None
+metrics_log = None
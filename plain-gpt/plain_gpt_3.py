@@ -1,32 +1,98 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import gradio
 import os
+import sys
+import time
 import config
 
+# Projektordner zum Pfad hinzufügen, damit die gemeinsamen Module aus utils gefunden werden
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils import metrics
+from utils.llm_client import get_http_client, get_async_http_client, DEFAULT_MAX_CONNECTIONS, DEFAULT_CONCURRENCY_LIMIT
+
 # API key aus config-Datei setzen, damit dieser hier nicht exposed ist
 os.environ["OPENAI_API_KEY"] = config.api_key
 
-# Erstellen des OpenAI-Client-Objekts
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Optional eigener API-Endpunkt, z.B. der lokale Fake-Server aus utils/fake_openai_server.py
+API_BASE = getattr(config, 'api_base', None)
+# Anzahl der Fragen, die gleichzeitig beantwortet werden, und Größe des Verbindungspools zur API
+CONCURRENCY_LIMIT = getattr(config, 'concurrency_limit', DEFAULT_CONCURRENCY_LIMIT)
+MAX_CONNECTIONS = getattr(config, 'max_connections', DEFAULT_MAX_CONNECTIONS)
+
+# Messwerte (Dauer, Tokens) unter metrics_port bzw. als JSON-Zeilen in metrics_log
+metrics.configure(config)
+
+# Erstellen der OpenAI-Client-Objekte, beide nutzen gemeinsame HTTP-Clients mit offenen Verbindungen (Keep-Alive)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=API_BASE, http_client=get_http_client(MAX_CONNECTIONS))
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=API_BASE, http_client=get_async_http_client(MAX_CONNECTIONS))
 
 
+# Antwort ohne Streaming generieren
+# Wird von der Oberfläche nicht genutzt (dort läuft stream_gpt_3_5), bleibt für Aufrufe aus eigenen Skripten
 def query_gpt_3_5(prompt):
-    # Antwort generieren über Modell 3.5, mittlerer Temperature und maximale Antwort tokens
-    response = client.chat.completions.create(
-        messages=[
-            {"role": "user", "content": prompt}
-        ],
-        model="gpt-3.5-turbo",
-        temperature=0.7,
-        max_tokens=256
-    )
-    message = response.choices[0].message.content
-    return message.strip()
+    trace = metrics.Trace('plain')
+    error = None
+    try:
+        # Antwort generieren über Modell 3.5, mittlerer Temperature und maximale Antwort tokens
+        with trace.stage('llm'):
+            response = client.chat.completions.create(
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                model="gpt-3.5-turbo",
+                temperature=0.7,
+                max_tokens=256
+            )
+        if response.usage is not None:
+            trace.tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
+        message = response.choices[0].message.content
+        return message.strip()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        trace.finish(error)
+
+
+# Antwort im Streaming-Modus generieren, sodass die ersten Wörter direkt angezeigt werden können
+# Der Aufruf ist asynchron, damit eine langsame Antwort andere Nutzer nicht blockiert
+# Rückgabe: Async-Generator, der den bisher erzeugten Antworttext nach jedem neuen Token liefert
+async def stream_gpt_3_5(prompt):
+    trace = metrics.Trace('plain')
+    error = None
+    try:
+        start = time.perf_counter()
+        with trace.stage('llm'):
+            stream = await async_client.chat.completions.create(
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                model="gpt-3.5-turbo",
+                temperature=0.7,
+                max_tokens=256,
+                stream=True
+            )
+            message = ""
+            # Beim Streaming meldet die API keine Tokens: ein Stück der Antwort entspricht etwa einem Token
+            completion_tokens = 0
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if completion_tokens == 0:
+                        trace.observe('llm_first_token', time.perf_counter() - start)
+                    completion_tokens += 1
+                    message += chunk.choices[0].delta.content
+                    yield message.lstrip()
+        trace.tokens(metrics.estimate_tokens(prompt), completion_tokens)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        trace.finish(error)
 
 
-def chatbot(input_text):
-    response = query_gpt_3_5(input_text)
-    return response
+async def chatbot(input_text):
+    async for partial_response in stream_gpt_3_5(input_text):
+        yield partial_response
 
 
 # Web-Oberfläche für Chatbot mit Gradio erstellen
@@ -37,5 +103,6 @@ chatbot_interface = gradio.Interface(
     title="GPT-3.5 Plain ChatBot"
 )
 
-# Starten der Web-UI
+# Starten der Web-UI, dabei bis zu CONCURRENCY_LIMIT Fragen gleichzeitig bearbeiten
+chatbot_interface.queue(default_concurrency_limit=CONCURRENCY_LIMIT)
 chatbot_interface.launch(share=False)
@@ -1,4 +1,61 @@
 ### COPY THIS FILE AND NAME IT 'config.py' (delete 'TEMPLATE' from file name)
 # Then add your API key
 
-api_key = '' # Add your key here
\ No newline at end of file
+api_key = '' # Add your key here
+
+# Optional: answer mode of the chatbot
+# 'single_pass' - retrieve article chunks and answer with one LLM call (default)
+# 'two_stage'   - let the query engine answer first and merge that answer with a second LLM call
+answer_mode = 'single_pass'
+
+# Optional: number of article chunks retrieved per question
+similarity_top_k = 2
+
+# Optional: custom OpenAI-compatible API endpoint, e.g. the local fake server for offline tests
+# (python utils/fake_openai_server.py --port 8000)
+# api_base = 'http://127.0.0.1:8000/v1'
+
+# Optional: number of questions answered at the same time and size of the HTTP connection pool to the API
+concurrency_limit = 16
+max_connections = 20
+
+# Optional: answer cache for repeated and near-duplicate questions (cleared whenever the index is rebuilt or
+# answer_mode, similarity_top_k or retrieval_mode change)
+answer_cache = True
+answer_cache_size = 1000                # maximum number of cached answers (least recently used are evicted)
+answer_cache_ttl = 24 * 60 * 60         # seconds until a cached answer expires
+answer_cache_threshold = 0.95           # minimum cosine similarity for near-duplicates, None = exact matches only
+# answer_cache_path = './spiegel-index/answer_cache'   # keep the cache on disk across restarts
+
+# Optional: on startup, embed only new or changed articles and remove deleted ones from an existing index
+index_refresh = True
+
+# Optional: folder of the embedding cache shared by bild-gpt and spiegel-gpt (None disables the cache)
+# embedding_cache_dir = '../embedding-cache'
+
+# Optional: vector store of the index
+# 'numpy'  - embeddings in a memory-mapped .npy matrix (default, existing JSON indexes are converted on first start)
+# 'simple' - JSON vector store of llama_index
+vector_store = 'numpy'
+
+# Optional: search in the vector store (only with vector_store = 'numpy')
+# 'exact' - compare the question with every stored chunk (default)
+# 'ivf'   - approximate search over the closest clusters only, for multi-year archives (used from 2000 chunks on)
+vector_index = 'exact'
+# Number of clusters searched per question with 'ivf' (higher = better recall, slower)
+ivf_probes = 16
+
+# Optional: how article chunks are retrieved for a question
+# 'vector' - similarity of the embeddings only (default)
+# 'hybrid' - embeddings and BM25 keyword search fused by rank, finds exact names like "Breitscheidplatz" or "Amri"
+retrieval_mode = 'vector'
+
+# Optional: build the index from the article corpus written by the spiders (OUTPUT_FORMATS = ["corpus"])
+# instead of the PDFs in filtered_pdfs, e.g. the keyword-filtered corpus from utils/corpus.py
+#corpus_path = 'filtered_corpus/articles.jsonl.gz'
+
+# Optional: per-stage latency, token and answer cache metrics
+# metrics_port - serve Prometheus histograms at http://127.0.0.1:<port>/metrics (None = off)
+# metrics_log  - append one JSON line per question with stage times, tokens and cache result ('-' = console, None = off)
+metrics_port = None
+metrics_log = None
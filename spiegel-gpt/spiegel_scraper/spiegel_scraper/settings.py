@@ -7,10 +7,21 @@
 #     https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #     https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+import sys
+
+# The spider, middlewares and pipelines are shared by all scrapers in the news_scraper package in the repository root
+# (the corpus pipeline writes with utils/corpus.py from the same root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+
 BOT_NAME = "spiegel_scraper"
 
-SPIDER_MODULES = ["spiegel_scraper.spiders"]
-NEWSPIDER_MODULE = "spiegel_scraper.spiders"
+SPIDER_MODULES = ["news_scraper.spiders"]
+
+# Site crawled by archive_spider (sites/spiegel.json) and the item class of the articles
+SITE = "spiegel"
+SITES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sites")
+ARTICLE_ITEM = "spiegel_scraper.items.SpiegelScraperItem"
 
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
@@ -20,14 +31,15 @@ NEWSPIDER_MODULE = "spiegel_scraper.spiders"
 ROBOTSTXT_OBEY = True
 
 # Configure maximum concurrent requests performed by Scrapy (default: 16)
-#CONCURRENT_REQUESTS = 32
+CONCURRENT_REQUESTS = 32
 
 # Configure a delay for requests for the same website (default: 0)
 # See https://docs.scrapy.org/en/latest/topics/settings.html#download-delay
 # See also autothrottle settings and docs
-#DOWNLOAD_DELAY = 3
+# With AutoThrottle enabled this is the lower bound of the per-domain delay
+DOWNLOAD_DELAY = 0.25
 # The download delay setting will honor only one of:
-#CONCURRENT_REQUESTS_PER_DOMAIN = 16
+CONCURRENT_REQUESTS_PER_DOMAIN = 8
 #CONCURRENT_REQUESTS_PER_IP = 16
 
 # Disable cookies (enabled by default)
@@ -45,14 +57,18 @@ ROBOTSTXT_OBEY = True
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 #SPIDER_MIDDLEWARES = {
-#    "spiegel_scraper.middlewares.SpiegelScraperSpiderMiddleware": 543,
 #}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "spiegel_scraper.middlewares.SpiegelScraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    # Runs before RetryMiddleware (550) and slows the domain down on 429/503
+    "news_scraper.middlewares.AdaptiveThrottleMiddleware": 560,
+    # Skips known articles or requests them conditionally (If-None-Match/If-Modified-Since)
+    "news_scraper.seen_urls.SeenUrlMiddleware": 570,
+    # Response cache (RESPONSE_CACHE_ENABLED), after retries/redirects and before HttpCompressionMiddleware (590)
+    "news_scraper.middlewares.ResponseCacheMiddleware": 580,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -62,23 +78,75 @@ ROBOTSTXT_OBEY = True
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "spiegel_scraper.pipelines.SpiegelScraperPipeline": 300,
-#}
+ITEM_PIPELINES = {
+    # Drops articles whose text has not changed since the last crawl
+    "news_scraper.seen_urls.SeenUrlPipeline": 100,
+    "news_scraper.pipelines.CorpusPipeline": 200,
+    "news_scraper.pipelines.PdfPipeline": 300,
+}
+
+# Folder for the article PDFs, the article corpus and link lists
+OUTPUT_FOLDER = "../test_newscript"
+# Output of the articles, one or both of:
+# "corpus" - append to a gzip-compressed JSON lines file (CORPUS_FILE), can be indexed by the bots directly
+# "pdf"    - one PDF per article
+OUTPUT_FORMATS = ["corpus", "pdf"]
+# Corpus file (default: OUTPUT_FOLDER/articles.jsonl.gz) and number of articles per appended gzip block
+#CORPUS_FILE = "../test_newscript/articles.jsonl.gz"
+CORPUS_BATCH_SIZE = 100
+# PDFs are rendered in a pool so the crawl keeps going while files are written:
+# "process" (FPDF layout is CPU-bound) or "thread"
+PDF_POOL = "process"
+# Number of workers (default: number of CPUs)
+#PDF_WORKERS = 4
+# Maximum number of articles being rendered at once, further items wait (default: 2 * workers)
+#PDF_MAX_PENDING = 8
+# Manifest of all article links found on the archive pages (default: OUTPUT_FOLDER/links.csv)
+# and number of links per append
+#LINKS_FILE = "../test_newscript/links.csv"
+LINKS_BATCH_SIZE = 500
+
+# Articles already written by an earlier crawl (SQLite, default: OUTPUT_FOLDER/seen_urls.sqlite):
+# "conditional" - request known articles with If-None-Match/If-Modified-Since, write only new or changed ones
+# "skip"        - do not request known articles at all
+# "off"         - download and write every article
+SEEN_URLS_MODE = "conditional"
+#SEEN_URLS_FILE = "../test_newscript/seen_urls.sqlite"
+# Keep the request queue on disk so a stopped or killed crawl resumes where it stopped
+# (same as passing -s JOBDIR=... on the command line)
+#JOBDIR = "crawls/" + BOT_NAME
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
-#AUTOTHROTTLE_ENABLED = True
+AUTOTHROTTLE_ENABLED = True
 # The initial download delay
-#AUTOTHROTTLE_START_DELAY = 5
+AUTOTHROTTLE_START_DELAY = 1
 # The maximum download delay to be set in case of high latencies
-#AUTOTHROTTLE_MAX_DELAY = 60
+AUTOTHROTTLE_MAX_DELAY = 60
 # The average number of requests Scrapy should be sending in parallel to
 # each remote server
-#AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
+AUTOTHROTTLE_TARGET_CONCURRENCY = 4.0
 # Enable showing throttling stats for every response received:
 #AUTOTHROTTLE_DEBUG = False
 
+# Back off on these status codes (AdaptiveThrottleMiddleware): the domain's delay is multiplied
+# by THROTTLE_BACKOFF_FACTOR, or set to Retry-After if the server sends a longer one
+THROTTLE_BACKOFF_HTTP_CODES = [429, 503]
+THROTTLE_BACKOFF_FACTOR = 2.0
+# Rate-limited requests are retried (429 and 503 are in the default RETRY_HTTP_CODES)
+RETRY_TIMES = 5
+
+# Cache of downloaded pages (SQLite, default: OUTPUT_FOLDER/response_cache.sqlite), e.g. to re-run a crawl
+# after changing the selectors without downloading again: scrapy crawl <spider> -s RESPONSE_CACHE_ENABLED=True
+# Bodies are stored once per content, compressed with zstd or brotli if installed, otherwise zlib
+RESPONSE_CACHE_ENABLED = False
+#RESPONSE_CACHE_FILE = "../test_newscript/response_cache.sqlite"
+#RESPONSE_CACHE_CODEC = "zlib"
+# Seconds a cached response is used per URL class (0 = forever), classes not listed are not cached.
+# Keep in mind that cached articles are not requested conditionally, so changed articles are only
+# noticed once their entry has expired
+RESPONSE_CACHE_EXPIRATION = {"archive": 0, "article": 0}
+
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
 #HTTPCACHE_ENABLED = True
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Module aus utils/ wie in den Skripten über den Projektordner importieren
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,77 @@
+import time
+
+from utils.answer_cache import AnswerCache, normalize_question
+
+SIGNATURE = (('docstore.json', 100, 1),)
+
+
+def test_normalize_question():
+    assert normalize_question("  Was geschah am  Breitscheidplatz?! ") == "was geschah am breitscheidplatz"
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = AnswerCache()
+    cache.store("Was geschah am Breitscheidplatz?", "Ein Anschlag.", index_signature=SIGNATURE)
+
+    assert cache.lookup_exact("was geschah am breitscheidplatz", SIGNATURE) == "Ein Anschlag."
+    assert cache.lookup("Was geschah in Berlin?", index_signature=SIGNATURE) == (None, None)
+
+
+def test_semantic_hit_above_threshold():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.store("Frage A", "Antwort A", embedding=[1.0, 0.0, 0.0])
+
+    assert cache.lookup("ganz andere Worte", embedding=[0.99, 0.1, 0.0]) == ("Antwort A", 'semantic')
+    assert cache.lookup("noch eine Frage", embedding=[0.0, 1.0, 0.0]) == (None, None)
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = AnswerCache(max_entries=2)
+    cache.store("eins", "1")
+    cache.store("zwei", "2")
+    assert cache.lookup_exact("eins") == "1"
+    cache.store("drei", "3")
+
+    assert cache.lookup_exact("zwei") is None
+    assert cache.lookup_exact("eins") == "1"
+    assert cache.lookup_exact("drei") == "3"
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = AnswerCache(ttl=60)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now)
+    cache.store("eins", "1", embedding=[1.0, 0.0])
+
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert cache.lookup_exact("eins") is None
+    assert cache.lookup("anders", embedding=[1.0, 0.0]) == (None, None)
+
+
+def test_new_index_signature_clears_cache():
+    cache = AnswerCache()
+    cache.store("eins", "1", index_signature=SIGNATURE)
+
+    assert cache.lookup_exact("eins", (('docstore.json', 200, 2),)) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_persisted_cache_survives_restart(tmp_path):
+    path = str(tmp_path / 'cache' / 'answers')
+    cache = AnswerCache(persist_path=path)
+    cache.store("eins", "1", embedding=[1.0, 0.0], index_signature=SIGNATURE)
+    cache.save()
+
+    restarted = AnswerCache(persist_path=path)
+    assert restarted.lookup_exact("eins", SIGNATURE) == "1"
+    assert restarted.lookup("anders", embedding=[1.0, 0.0], index_signature=SIGNATURE) == ("1", 'semantic')
+
+
+def test_persisted_cache_dropped_for_other_index(tmp_path):
+    path = str(tmp_path / 'answers')
+    cache = AnswerCache(persist_path=path)
+    cache.store("eins", "1", index_signature=SIGNATURE)
+    cache.save()
+
+    restarted = AnswerCache(persist_path=path)
+    assert restarted.lookup_exact("eins", (('docstore.json', 200, 2),)) is None
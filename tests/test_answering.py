@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from llama_index.core import Settings
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.llms import MockLLM
+
+from utils import metrics
+from utils.answer_cache import AnswerCache, answer_signature
+from utils.answering import astream_answer
+
+
+# Index-Halter ohne Index: gleichbleibende Signatur, der Abruf liefert keine Ausschnitte
+class StubIndexHolder:
+    signature = (('docstore.json', 1, 1),)
+    retrieval_mode = 'vector'
+
+    def get_retriever(self, similarity_top_k):
+        return self
+
+    async def aretrieve(self, query_bundle):
+        return []
+
+
+@pytest.fixture(autouse=True)
+def mock_models():
+    Settings.llm = MockLLM(max_tokens=5)
+    Settings.embed_model = MockEmbedding(embed_dim=8)
+    yield
+    Settings._llm = None
+    Settings._embed_model = None
+
+
+def answer(source_name, question, answer_cache, **kwargs):
+    async def collect():
+        result = None
+        async for result in astream_answer(StubIndexHolder(), source_name, question, answer_cache=answer_cache, **kwargs):
+            pass
+        return result
+    return asyncio.run(collect())
+
+
+def stage_count(bot, stage):
+    prefix = f'newsgpt_stage_seconds_count{{bot="{bot}",stage="{stage}"}} '
+    for line in metrics.render().splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+def test_cache_miss_times_each_cache_stage_once():
+    answer_cache = AnswerCache(similarity_threshold=0.95)
+    answer('Stagetest', "Was geschah am Breitscheidplatz?", answer_cache)
+
+    assert stage_count('stagetest', 'cache_exact') == 1
+    assert stage_count('stagetest', 'cache_semantic') == 1
+    assert stage_count('stagetest', 'cache') == 0
+
+    answer('Stagetest', "Was geschah am Breitscheidplatz?", answer_cache)
+
+    assert stage_count('stagetest', 'cache_exact') == 2
+    assert stage_count('stagetest', 'cache_semantic') == 1
+
+
+def test_changed_answer_settings_clear_the_cache():
+    answer_cache = AnswerCache(similarity_threshold=None)
+    first = answer('Settingstest', "Was geschah am Breitscheidplatz?", answer_cache, top_k=2)
+    answer('Settingstest', "Was geschah am Breitscheidplatz?", answer_cache, top_k=2)
+    assert answer_cache.exact_hits == 1
+
+    answer('Settingstest', "Was geschah am Breitscheidplatz?", answer_cache, top_k=5)
+    assert answer_cache.exact_hits == 1
+    assert answer_cache.lookup_exact("Was geschah am Breitscheidplatz?",
+                                     answer_signature(StubIndexHolder.signature, 'single_pass', 5, 'vector')) == first
+
+
+def test_answer_signature_survives_persisting(tmp_path):
+    path = str(tmp_path / 'answers')
+    signature = answer_signature(StubIndexHolder.signature, 'two_stage', 3, 'hybrid')
+    cache = AnswerCache(persist_path=path)
+    cache.store("eins", "1", index_signature=signature)
+    cache.save()
+
+    restarted = AnswerCache(persist_path=path)
+    assert restarted.lookup_exact("eins", signature) == "1"
+    assert restarted.lookup_exact("eins", answer_signature(StubIndexHolder.signature, 'single_pass', 3, 'hybrid')) is None
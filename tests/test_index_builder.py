@@ -0,0 +1,54 @@
+import pytest
+from llama_index.core import Settings
+from llama_index.core.embeddings import MockEmbedding
+
+from utils.index_builder import (build_index, load_index, load_manifest, refresh_index,
+                                 VECTOR_STORE_NUMPY, VECTOR_STORE_SIMPLE)
+
+
+@pytest.fixture(autouse=True)
+def mock_embeddings():
+    Settings.embed_model = MockEmbedding(embed_dim=8)
+    yield
+    Settings._embed_model = None
+
+
+def write_files(folder, files):
+    folder.mkdir(exist_ok=True)
+    for name, text in files.items():
+        (folder / name).write_text(text, encoding='utf-8')
+
+
+def indexed_texts(index):
+    return sorted(node.get_content() for node in index.docstore.docs.values())
+
+
+@pytest.mark.parametrize('vector_store_type', [VECTOR_STORE_NUMPY, VECTOR_STORE_SIMPLE])
+def test_refresh_adds_changes_and_removes_sources(tmp_path, vector_store_type):
+    data, persist_dir = tmp_path / 'data', str(tmp_path / 'index')
+    write_files(data, {'a.txt': "Artikel A", 'b.txt': "Artikel B", 'c.txt': "Artikel C"})
+    build_index(str(data), persist_dir, vector_store_type=vector_store_type)
+
+    write_files(data, {'b.txt': "Artikel B, geändert", 'd.txt': "Artikel D"})
+    (data / 'c.txt').unlink()
+    index = load_index(persist_dir, vector_store_type)
+    stats = refresh_index(index, str(data), persist_dir)
+
+    assert stats == {'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 1}
+    assert indexed_texts(index) == ["Artikel A", "Artikel B, geändert", "Artikel D"]
+    assert sorted(load_manifest(persist_dir)) == ['a.txt', 'b.txt', 'd.txt']
+
+    # Gespeicherter Stand: gleiche Knoten im Docstore und im Vektorspeicher
+    reloaded = load_index(persist_dir, vector_store_type)
+    assert indexed_texts(reloaded) == indexed_texts(index)
+    nodes = reloaded.as_retriever(similarity_top_k=10).retrieve("Artikel")
+    assert sorted(node.node.get_content() for node in nodes) == indexed_texts(index)
+
+
+def test_refresh_without_changes_keeps_index(tmp_path):
+    data, persist_dir = tmp_path / 'data', str(tmp_path / 'index')
+    write_files(data, {'a.txt': "Artikel A"})
+    build_index(str(data), persist_dir)
+
+    stats = refresh_index(load_index(persist_dir), str(data), persist_dir)
+    assert stats == {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 1}
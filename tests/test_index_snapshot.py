@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from utils.index_snapshot import (check_index_snapshot, load_build_info, persist_signature, save_build_info,
+                                  BUILD_INFO_FILE, SIGNATURE_EXCLUDE)
+
+SETTINGS = {'vector_store': 'numpy', 'vector_index': 'exact'}
+
+
+@pytest.fixture
+def persist_dir(tmp_path):
+    (tmp_path / 'docstore.json').write_text('{}')
+    (tmp_path / 'default__vector_store.npy').write_bytes(b'\0' * 16)
+    return str(tmp_path)
+
+
+def test_build_info_is_not_part_of_signature(persist_dir):
+    signature = persist_signature(persist_dir, exclude=SIGNATURE_EXCLUDE)
+    save_build_info(persist_dir, 2, persist_dir, False, **SETTINGS)
+
+    assert persist_signature(persist_dir, exclude=SIGNATURE_EXCLUDE) == signature
+    assert BUILD_INFO_FILE not in [name for name, _, _ in signature]
+
+
+def test_unchanged_build_info_is_not_rewritten(persist_dir):
+    assert save_build_info(persist_dir, 2, persist_dir, False, **SETTINGS)
+    mtime = os.stat(os.path.join(persist_dir, BUILD_INFO_FILE)).st_mtime_ns
+
+    assert not save_build_info(persist_dir, 2, persist_dir, False, **SETTINGS)
+    assert os.stat(os.path.join(persist_dir, BUILD_INFO_FILE)).st_mtime_ns == mtime
+    assert save_build_info(persist_dir, 3, persist_dir, False, **SETTINGS)
+
+
+def test_check_accepts_matching_snapshot(persist_dir):
+    save_build_info(persist_dir, 2, persist_dir, True, **SETTINGS)
+
+    assert check_index_snapshot(persist_dir, bm25=True, **SETTINGS) == load_build_info(persist_dir)
+
+
+def test_check_rejects_missing_changed_or_mismatched_index(persist_dir):
+    with pytest.raises(FileNotFoundError):
+        check_index_snapshot(persist_dir, **SETTINGS)
+
+    save_build_info(persist_dir, 2, persist_dir, False, **SETTINGS)
+    with pytest.raises(ValueError):
+        check_index_snapshot(persist_dir, **{**SETTINGS, 'vector_index': 'ivf'})
+    with pytest.raises(ValueError):
+        check_index_snapshot(persist_dir, bm25=True, **SETTINGS)
+
+    with open(os.path.join(persist_dir, 'docstore.json'), 'a') as file:
+        file.write(' ')
+    with pytest.raises(ValueError):
+        check_index_snapshot(persist_dir, **SETTINGS)
@@ -0,0 +1,54 @@
+import csv
+
+from news_scraper.links import LinkManifest, FIELDS
+
+
+def write_manifest(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return [tuple(row) for row in csv.reader(file)][1:]
+
+
+def test_only_keys_of_the_crawled_dates_are_loaded(tmp_path):
+    path = str(tmp_path / 'links.csv')
+    write_manifest(path, [('2016-12-18', 'https://www.bild.de/politik/a', 'politik', 0),
+                          ('2016-12-19', 'https://www.bild.de/politik/b', 'politik', 0),
+                          ('2016-12-20', 'https://www.bild.de/sport/c', 'sport', 1),
+                          ('2016-12-21', 'https://www.bild.de/news/d', 'news', 0)])
+
+    manifest = LinkManifest(path, batch_size=10, start_date='2016-12-19', end_date='2016-12-20')
+    manifest.close()
+
+    assert manifest.keys == {('2016-12-19', 'https://www.bild.de/politik/b'),
+                             ('2016-12-20', 'https://www.bild.de/sport/c')}
+
+
+def test_existing_links_are_not_appended_again(tmp_path):
+    path = str(tmp_path / 'links.csv')
+    write_manifest(path, [('2016-12-19', 'https://www.bild.de/politik/b', 'politik', 0)])
+
+    manifest = LinkManifest(path, batch_size=10, start_date='2016-12-19', end_date='2016-12-19')
+    manifest.add('2016-12-19', [('https://www.bild.de/politik/b', 'politik', False),
+                                ('https://www.bild.de/sport/e', 'sport', True)])
+    manifest.close()
+
+    assert read_rows(path) == [('2016-12-19', 'https://www.bild.de/politik/b', 'politik', '0'),
+                               ('2016-12-19', 'https://www.bild.de/sport/e', 'sport', '1')]
+
+
+def test_unfinished_last_line_is_terminated(tmp_path):
+    path = tmp_path / 'links.csv'
+    path.write_text('archive_date,url,category,filtered_out\r\n2016-12-19,https://www.bild.de/politik/b,politik,0\r\n'
+                    '2016-12-19,https://www.bild.de/pol', encoding='utf-8')
+
+    manifest = LinkManifest(str(path), batch_size=10)
+    manifest.add('2016-12-20', [('https://www.bild.de/news/f', 'news', False)])
+    manifest.close()
+
+    assert read_rows(str(path))[-1] == ('2016-12-20', 'https://www.bild.de/news/f', 'news', '0')
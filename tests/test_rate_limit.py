@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import RateLimitedTransport, TokenBucket, backoff_delay, estimate_tokens, BACKOFF_MAX
+
+
+# Uhr, die nur durch asyncio.sleep im Bucket weiterläuft, damit die Tests nicht warten
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    monkeypatch.setattr(rate_limit.asyncio, 'sleep', clock.sleep)
+    return clock
+
+
+def test_token_bucket_starts_full_then_refills(clock):
+    bucket = TokenBucket(60)
+
+    async def run():
+        for _ in range(60):
+            await bucket.acquire()
+        await bucket.acquire()
+    asyncio.run(run())
+
+    # 60 pro Minute: die 61. Einheit ist nach einer Sekunde wieder da
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_token_bucket_caps_oversized_requests(clock):
+    bucket = TokenBucket(120)
+
+    async def run():
+        await bucket.acquire(120)
+        await bucket.acquire(500)
+    asyncio.run(run())
+
+    assert sum(clock.sleeps) == pytest.approx(60.0)
+
+
+def test_backoff_delay_grows_and_is_capped(monkeypatch):
+    monkeypatch.setattr(rate_limit.random, 'uniform', lambda low, high: high)
+
+    assert [backoff_delay(attempt) for attempt in range(4)] == [1.0, 2.0, 4.0, 8.0]
+    assert backoff_delay(20) == BACKOFF_MAX
+
+
+def test_backoff_delay_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(rate_limit.random, 'uniform', lambda low, high: low)
+
+    assert backoff_delay(0, httpx.Response(429, headers={'retry-after': '7'})) == 7.0
+    assert backoff_delay(0, httpx.Response(429, headers={'retry-after-ms': '250'})) == 0.25
+    assert backoff_delay(0, httpx.Response(429, headers={'retry-after': '3600'})) == BACKOFF_MAX
+    assert backoff_delay(0, httpx.Response(429, headers={'retry-after': 'bald'})) == 0.0
+
+
+def test_estimate_tokens_counts_prompt_and_max_tokens():
+    body = {'messages': [{'role': 'user', 'content': 'x' * 40}], 'max_tokens': 100}
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions', content=json.dumps(body))
+
+    assert estimate_tokens(request) == 40 // rate_limit.CHARS_PER_TOKEN + 1 + 100
+
+
+@pytest.mark.parametrize('path, sent', [('/v1/chat/completions', 4), ('/v1/embeddings', 1)])
+def test_transport_retries_only_llm_requests(clock, monkeypatch, path, sent):
+    monkeypatch.setattr(rate_limit.random, 'uniform', lambda low, high: 0.0)
+    transport = RateLimitedTransport(max_retries=3, transport=httpx.MockTransport(lambda request: httpx.Response(429)))
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post('https://api.openai.com' + path, json={})
+    response = asyncio.run(run())
+
+    assert response.status_code == 429
+    assert transport.sent == sent
+    assert transport.retried == sent - 1
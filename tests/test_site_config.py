@@ -0,0 +1,122 @@
+import glob
+import json
+import os
+
+import pytest
+from scrapy.http import HtmlResponse
+
+from news_scraper.site_config import SiteConfig
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SITES_FOLDERS = {
+    'bild': os.path.join(ROOT, 'bild-gpt', 'bild_archive_scraper', 'bild_archive_scraper', 'sites'),
+    'spiegel': os.path.join(ROOT, 'spiegel-gpt', 'spiegel_scraper', 'spiegel_scraper', 'sites'),
+}
+
+# Selektoren der bisherigen bild_spider/spiegel_spider, die Site-Konfiguration muss dasselbe liefern
+BASELINE_LINKS = {
+    'bild': '/html/body/div/div/div[3]/main/section/div/div[2]/section/ul/li/article/a/@href',
+    'spiegel': '//main//section//div/article/header/h2/a/@href',
+}
+BASELINE_FIELDS = {
+    'bild': {
+        'title': ('//h2/span/text()', ' ', 'No Title'),
+        'date_time': ('//time/text()', None, 'No Date and Time'),
+        'body': ('//div[@class="article-body"]//p/text()', '\n', ''),
+    },
+    'spiegel': {
+        'title': ('//h2/span/text()', ' ', 'No Headline'),
+        'date_time': ('//time/text()', None, 'No Date and Time'),
+        'intro': ('//header[@data-area="intro"]//p/text()', None, 'No Introduction'),
+        'body': ('//div[@data-area="text"]//p/text()', '\n', ''),
+    },
+}
+
+# Seiten im Format von utils/crawl_benchmark.py: tests/fixtures/<site> sind von Hand nach dem Aufbau der
+# Archiv- und Artikelseiten erstellt, fixtures/<site> (python utils/crawl_benchmark.py record <site>) sind
+# aufgezeichnete Seiten und werden mitgeprüft, wenn vorhanden
+FIXTURE_FOLDERS = (os.path.join(ROOT, 'tests', 'fixtures'), os.path.join(ROOT, 'fixtures'))
+
+
+def pages(site, kind):
+    return [path for folder in FIXTURE_FOLDERS for path in sorted(glob.glob(os.path.join(folder, site, kind + '-*.html')))]
+
+
+def response(path):
+    with open(path, 'rb') as file:
+        return HtmlResponse('https://example.org/', body=file.read(), encoding='utf-8')
+
+
+def baseline_article(site, page):
+    article = {}
+    for field, (xpath, join, default) in BASELINE_FIELDS[site].items():
+        values = page.xpath(xpath).getall()
+        article[field] = (join.join(values) if join is not None else values[0]) if values else default
+    return article
+
+
+@pytest.mark.parametrize('site', sorted(SITES_FOLDERS))
+def test_archive_links_match_baseline(site):
+    config = SiteConfig.load(site, SITES_FOLDERS[site])
+    archive_pages = pages(site, 'archiv')
+    assert archive_pages
+
+    for path in archive_pages:
+        page = response(path)
+        links = config.archive_links(page)
+        assert links
+        assert links == page.xpath(BASELINE_LINKS[site]).getall()
+
+
+@pytest.mark.parametrize('site', sorted(SITES_FOLDERS))
+def test_article_fields_match_baseline(site):
+    config = SiteConfig.load(site, SITES_FOLDERS[site])
+    article_pages = pages(site, 'artikel')
+    assert article_pages
+
+    for path in article_pages:
+        page = response(path)
+        article = config.extract_article(page, on_scope_empty=pytest.fail)
+        expected = baseline_article(site, page)
+        assert {field: article[field] for field in expected} == expected
+        assert article['body']
+
+
+def test_article_fields_of_handmade_pages():
+    bild = SiteConfig.load('bild', SITES_FOLDERS['bild'])
+    article = bild.extract_article(response(os.path.join(ROOT, 'tests', 'fixtures', 'bild', 'artikel-merkel-zum-anschlag.html')))
+    assert article == {'title': 'Kanzlerin Merkel zum Anschlag', 'date_time': '20.12.2016 - 11:00 Uhr', 'intro': '',
+                       'body': 'Bundeskanzlerin Angela Merkel hat sich zu dem Anschlag geäußert.'}
+
+    spiegel = SiteConfig.load('spiegel', SITES_FOLDERS['spiegel'])
+    article = spiegel.extract_article(response(os.path.join(ROOT, 'tests', 'fixtures', 'spiegel', 'artikel-berlin-lkw-rast-in-weihnachtsmarkt.html')))
+    assert article['title'] == 'Berlin Lkw rast in Weihnachtsmarkt'
+    assert article['intro'] == 'Auf dem Breitscheidplatz ist ein Lastwagen in einen Weihnachtsmarkt gefahren.'
+    assert article['body'].split('\n') == ['Am Montagabend ist ein Lkw in den Weihnachtsmarkt an der Gedächtniskirche gefahren.',
+                                           'Die Polizei geht von einem Anschlag aus.']
+
+
+def test_empty_scope_falls_back_to_whole_document(tmp_path):
+    with open(os.path.join(SITES_FOLDERS['bild'], 'bild.json'), encoding='utf-8') as file:
+        spec = json.load(file)
+    spec['article_scope'] = '//div[@class="gibt-es-nicht"]'
+    path = tmp_path / 'bild.json'
+    path.write_text(json.dumps(spec), encoding='utf-8')
+    config = SiteConfig.load(str(path))
+    page = response(os.path.join(ROOT, 'tests', 'fixtures', 'bild', 'artikel-merkel-zum-anschlag.html'))
+
+    empty_scopes = []
+    article = config.extract_article(page, on_scope_empty=lambda scope_name, _: empty_scopes.append(scope_name))
+
+    assert empty_scopes == ['article_scope']
+    assert article == baseline_article('bild', page) | {'intro': ''}
+
+
+def test_absolute_xpath_under_scope_is_rejected():
+    with open(os.path.join(SITES_FOLDERS['bild'], 'bild.json'), encoding='utf-8') as file:
+        spec = json.load(file)
+    spec['article_scope'] = '//main//article'
+    spec['fields']['title']['xpath'] = '//h2/span/text()'
+
+    with pytest.raises(ValueError):
+        SiteConfig(**spec)
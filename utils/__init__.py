@@ -0,0 +1 @@
+# Gemeinsame Module für die Chatbots (bild-gpt, spiegel-gpt, plain-gpt)
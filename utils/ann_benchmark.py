@@ -0,0 +1,115 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.ivf_index import IVFIndex
+from utils.load_test import percentile
+from utils.numpy_vector_store import _base_path, _normalize
+
+# Vergleich der näherungsweisen Suche (IVF) mit der exakten Suche auf denselben Vektoren
+# Gemessen werden recall@k (Anteil der exakten Top-k, die IVF ebenfalls findet) und die Latenz pro Anfrage.
+# Als Anfragen dienen gespeicherte Vektoren, die dafür aus den durchsuchten Vektoren herausgenommen werden
+# (sonst fände jede Suche ihren eigenen Vektor und der recall wäre zu hoch), oder echte Embeddings von Fragen
+# aus einer .npy-Datei (--query-file).
+#
+# Beispiele:
+#   python utils/ann_benchmark.py --persist-dir bild-gpt/bild-index/index
+#   python utils/ann_benchmark.py --persist-dir bild-gpt/bild-index/index --query-file fragen.npy
+#   python utils/ann_benchmark.py --synthetic 200000 --probes 4 8 16 32
+
+
+# Funktion zum Erzeugen künstlicher Embeddings mit Themen-Clustern
+# Rückgabe:     normalisierte float32-Matrix (rows, dim)
+def synthetic_matrix(rows, dim, topics=500, seed=0):
+    random = np.random.default_rng(seed)
+    centers = random.standard_normal((topics, dim), dtype=np.float32)
+    matrix = centers[random.integers(0, topics, rows)]
+    matrix += 0.8 * random.standard_normal((rows, dim), dtype=np.float32)
+    return _normalize(matrix)
+
+
+# Funktion zum Herausnehmen zufälliger Zeilen als Anfragen
+# Rückgabe:     (durchsuchte Vektoren ohne die Anfragen, Anfragen)
+def make_queries(matrix, count, seed=1):
+    random = np.random.default_rng(seed)
+    held_out = np.zeros(matrix.shape[0], dtype=bool)
+    held_out[random.choice(matrix.shape[0], count, replace=False)] = True
+    queries = _normalize(np.asarray(matrix[held_out], dtype=np.float32))
+    return matrix[~held_out], queries
+
+
+def exact_top_k(matrix, query, k):
+    scores = np.asarray(matrix @ query, dtype=np.float32)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def ivf_top_k(matrix, ivf_index, query, k, n_probe):
+    rows = ivf_index.candidates(query, n_probe)
+    scores = np.asarray(matrix[rows] @ query, dtype=np.float32)
+    top = np.argpartition(-scores, min(k, len(rows)) - 1)[:k]
+    return rows[top[np.argsort(-scores[top])]], len(rows)
+
+
+# Funktion zum Messen der Latenz einer Suchfunktion über alle Anfragen
+# Rückgabe:     (Ergebnisse, Latenzen in Millisekunden)
+def timed(search, queries):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="recall@k und Latenz der IVF-Suche im Vergleich zur exakten Suche")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--persist-dir', help="Persist-Ordner eines Index mit NumPy-Vektorspeicher")
+    source.add_argument('--synthetic', type=int, metavar='ROWS', help="künstliche Embeddings mit ROWS Zeilen verwenden")
+    parser.add_argument('--dim', type=int, default=1536, help="Dimension der künstlichen Embeddings")
+    parser.add_argument('--query-file', help=".npy-Datei mit Embeddings echter Fragen (Zeilen, Dimension)")
+    parser.add_argument('--queries', type=int, default=200, help="Anzahl herausgenommener Anfragen ohne --query-file")
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--probes', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--n-lists', type=int, help="Anzahl IVF-Listen (Standard: 4 * Wurzel(Zeilen))")
+    args = parser.parse_args()
+
+    if args.persist_dir:
+        matrix = np.load(_base_path(args.persist_dir) + '.npy', mmap_mode='r')
+    else:
+        matrix = synthetic_matrix(args.synthetic, args.dim)
+    if args.query_file:
+        queries = _normalize(np.load(args.query_file).astype(np.float32))
+        if queries.shape[1] != matrix.shape[1]:
+            parser.error(f"Fragen haben {queries.shape[1]} Dimensionen, der Index {matrix.shape[1]}")
+    else:
+        # Mindestens eine Zeile bleibt zum Durchsuchen übrig
+        matrix, queries = make_queries(matrix, min(args.queries, matrix.shape[0] - 1))
+    k = min(args.k, matrix.shape[0])
+
+    start = time.perf_counter()
+    ivf_index = IVFIndex.build(matrix, n_lists=args.n_lists)
+    build_time = time.perf_counter() - start
+    print(f"{matrix.shape[0]} Vektoren ({matrix.shape[1]} Dimensionen, {matrix.dtype}), "
+          f"{ivf_index.n_lists} IVF-Listen, Aufbau in {build_time:.1f}s")
+
+    exact, latencies = timed(lambda query: exact_top_k(matrix, query, k), queries)
+    print(f"{'Suche':>10} {'recall@' + str(k):>10} {'Kandidaten':>10} {'p50':>8} {'p99':>8}")
+    print(f"{'exakt':>10} {1.0:>10.3f} {matrix.shape[0]:>10} "
+          f"{percentile(latencies, 50):>6.2f}ms {percentile(latencies, 99):>6.2f}ms")
+
+    for n_probe in args.probes:
+        results, latencies = timed(lambda query: ivf_top_k(matrix, ivf_index, query, k, n_probe), queries)
+        recall = np.mean([len(set(found) & set(expected)) / k for (found, _), expected in zip(results, exact)])
+        candidates = np.mean([count for _, count in results])
+        print(f"{'ivf/' + str(n_probe):>10} {recall:>10.3f} {candidates:>10.0f} "
+              f"{percentile(latencies, 50):>6.2f}ms {percentile(latencies, 99):>6.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+# Cache für Antworten der Chatbots mit zwei Stufen:
+# 1. exakt:   gleiche Frage nach Normalisierung (Groß-/Kleinschreibung, Satzzeichen, Leerzeichen)
+# 2. ähnlich: Embedding der Frage hat eine Kosinus-Ähnlichkeit über dem Schwellenwert zu einer gespeicherten Frage
+# Einträge werden nach LRU und Alter (TTL) verdrängt und bei jedem Neuaufbau des Index verworfen, ebenso wenn sich
+# Antwortmodus, Anzahl der Ausschnitte oder Abrufmodus ändern (siehe answer_signature).
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+# Mindestabstand in Sekunden zwischen zwei Speichervorgängen auf der Festplatte
+SAVE_INTERVAL = 30.0
+
+
+# Funktion zum Normalisieren einer Frage für die exakte Cache-Stufe
+# Parameter:    question: vom Nutzer eingegebene Frage
+# Rückgabe:     normalisierte Frage (klein geschrieben, ohne Satzzeichen und doppelte Leerzeichen)
+def normalize_question(question):
+    text = unicodedata.normalize('NFKC', question).casefold()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+class _CacheEntry:
+    def __init__(self, question, answer, embedding, created_at):
+        self.question = question
+        self.answer = answer
+        self.embedding = embedding
+        self.created_at = created_at
+
+
+class AnswerCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL,
+                 similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD, persist_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # None schaltet die zweite Stufe (Ähnlichkeit) ab
+        self.similarity_threshold = similarity_threshold
+        # Pfad ohne Endung, gespeichert werden <pfad>.json (Fragen/Antworten) und <pfad>.npy (Embeddings)
+        self.persist_path = persist_path
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._index_signature = None
+        # Matrix aller Embeddings für die Ähnlichkeitssuche, wird nach Änderungen neu aufgebaut
+        self._matrix = None
+        self._matrix_keys = []
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        if persist_path:
+            self._load()
+
+    @property
+    def semantic_enabled(self):
+        return self.similarity_threshold is not None
+
+    # Funktion zum Nachschlagen einer Antwort
+    # Parameter:    question: Frage, embedding: Embedding der Frage (nur für die zweite Stufe nötig),
+    #               index_signature: Signatur des aktuellen Index (mit den Antwort-Einstellungen, siehe
+    #               answer_signature), bei Änderung wird der Cache geleert
+    # Rückgabe:     (answer, tier) mit tier 'exact' oder 'semantic', bzw. (None, None) wenn nicht gefunden
+    def lookup(self, question, embedding=None, index_signature=None):
+        with self._lock:
+            self._check_index(index_signature)
+            key = normalize_question(question)
+
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.answer, 'exact'
+
+            if embedding is not None and self.semantic_enabled:
+                key = self._most_similar(embedding)
+                if key is not None:
+                    self._entries.move_to_end(key)
+                    self.semantic_hits += 1
+                    return self._entries[key].answer, 'semantic'
+
+            self.misses += 1
+            return None, None
+
+    # Funktion zum Prüfen, ob die exakte Stufe eine Antwort hat (ohne Embedding und ohne Zählen eines Fehlschlags)
+    # Damit kann das Embedding der Frage bei exakten Treffern ganz eingespart werden
+    def lookup_exact(self, question, index_signature=None):
+        with self._lock:
+            self._check_index(index_signature)
+            key = normalize_question(question)
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry):
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry.answer
+
+    # Funktion zum Speichern einer Antwort
+    # Parameter:    question: Frage, answer: generierte Antwort, embedding: Embedding der Frage (optional),
+    #               index_signature: Signatur des Index und der Einstellungen, mit denen die Antwort erzeugt wurde
+    def store(self, question, answer, embedding=None, index_signature=None):
+        if not answer:
+            return
+        with self._lock:
+            self._check_index(index_signature)
+            key = normalize_question(question)
+            if embedding is not None:
+                embedding = np.asarray(embedding, dtype=np.float32)
+                norm = np.linalg.norm(embedding)
+                embedding = embedding / norm if norm else embedding
+            self._entries[key] = _CacheEntry(question, answer, embedding, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+            self._dirty = True
+
+        if self.persist_path and time.monotonic() - self._last_save > SAVE_INTERVAL:
+            self.save()
+
+    # Funktion zum Leeren des Cache, z.B. nach einem Neuaufbau des Index
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    # Kennzahlen des Cache (Treffer je Stufe, Fehlschläge, Trefferquote, Anzahl Einträge)
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'hit_rate': (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+    # Funktion zum Speichern des Cache auf der Festplatte
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._save_lock:
+            self._save()
+
+    def _save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._drop_expired()
+            entries = list(self._entries.items())
+            index_signature = self._index_signature
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        folder = os.path.dirname(self.persist_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        dim = next((entry.embedding.shape[0] for _, entry in entries if entry.embedding is not None), 0)
+        matrix = np.zeros((len(entries), dim), dtype=np.float32)
+        records = []
+        for row, (key, entry) in enumerate(entries):
+            has_embedding = entry.embedding is not None and entry.embedding.shape[0] == dim
+            if has_embedding:
+                matrix[row] = entry.embedding
+            records.append({
+                'key': key,
+                'question': entry.question,
+                'answer': entry.answer,
+                'created_at': entry.created_at,
+                'has_embedding': has_embedding,
+            })
+
+        # Erst in temporäre Dateien schreiben und dann ersetzen, damit ein Absturz keinen halben Cache hinterlässt
+        with open(self.persist_path + '.npy.tmp', 'wb') as file:
+            np.save(file, matrix)
+        with open(self.persist_path + '.json.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'index_signature': index_signature, 'entries': records}, file, ensure_ascii=False)
+        os.replace(self.persist_path + '.npy.tmp', self.persist_path + '.npy')
+        os.replace(self.persist_path + '.json.tmp', self.persist_path + '.json')
+        print(f"Antwort-Cache gespeichert: {self.stats()}")
+
+    def _load(self):
+        try:
+            with open(self.persist_path + '.json', encoding='utf-8') as file:
+                data = json.load(file)
+            matrix = np.load(self.persist_path + '.npy')
+        except (OSError, ValueError) as e:
+            if os.path.exists(self.persist_path + '.json'):
+                print(f"Antwort-Cache konnte nicht geladen werden: {e}")
+            return
+
+        # Signatur wird als Liste gespeichert, zum Vergleichen wieder in Tupel umwandeln
+        self._index_signature = _to_tuple(data.get('index_signature'))
+        for row, record in enumerate(data['entries']):
+            embedding = matrix[row] if record['has_embedding'] and row < len(matrix) else None
+            entry = _CacheEntry(record['question'], record['answer'], embedding, record['created_at'])
+            if not self._expired(entry):
+                self._entries[record['key']] = entry
+
+    def _check_index(self, index_signature):
+        if index_signature is None or index_signature == self._index_signature:
+            return
+        if self._entries:
+            print("Index wurde neu aufgebaut, Antwort-Cache wird geleert")
+        self._clear()
+        self._index_signature = index_signature
+
+    def _clear(self):
+        if self._entries:
+            self._dirty = True
+        self._entries.clear()
+        self._matrix = None
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.time() - entry.created_at > self.ttl
+
+    def _drop_expired(self):
+        for key in [key for key, entry in self._entries.items() if self._expired(entry)]:
+            del self._entries[key]
+            self._matrix = None
+
+    # Ähnlichste gespeicherte Frage über das Skalarprodukt der normalisierten Embeddings suchen
+    def _most_similar(self, embedding):
+        if self._matrix is None:
+            self._drop_expired()
+            self._matrix_keys = [key for key, entry in self._entries.items() if entry.embedding is not None]
+            if not self._matrix_keys:
+                return None
+            self._matrix = np.stack([self._entries[key].embedding for key in self._matrix_keys])
+        if not self._matrix_keys:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        if query.shape[0] != self._matrix.shape[1]:
+            return None
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self._matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        key = self._matrix_keys[best]
+        entry = self._entries.get(key)
+        if entry is None or self._expired(entry):
+            return None
+        return key
+
+
+# Funktion zum Erstellen der Signatur, mit der der Cache abgefragt und befüllt wird (index_signature in lookup
+# und store): neben dem Stand des Index gehören die Einstellungen dazu, von denen die Antwort abhängt
+# Parameter:    index_signature: Signatur des Index (IndexHolder.signature), answer_mode: Antwortmodus,
+#               top_k: Anzahl abgerufener Ausschnitte, retrieval_mode: Abrufmodus
+# Rückgabe:     Tupel, das nach dem Speichern als JSON wieder gleich ist (siehe _to_tuple)
+def answer_signature(index_signature, answer_mode, top_k, retrieval_mode):
+    return (('index', index_signature), ('answer_mode', answer_mode), ('top_k', top_k),
+            ('retrieval_mode', retrieval_mode))
+
+
+def _to_tuple(value):
+    if isinstance(value, list):
+        return tuple(_to_tuple(item) for item in value)
+    return value
+
+
+# Funktion zum Erstellen des Antwort-Cache aus den Einstellungen in config.py
+# Parameter:    config: config-Modul des Chatbots
+# Rückgabe:     AnswerCache oder None, wenn der Cache mit answer_cache = False abgeschaltet ist
+def answer_cache_from_config(config):
+    if not getattr(config, 'answer_cache', True):
+        return None
+
+    answer_cache = AnswerCache(
+        max_entries=getattr(config, 'answer_cache_size', DEFAULT_MAX_ENTRIES),
+        ttl=getattr(config, 'answer_cache_ttl', DEFAULT_TTL),
+        similarity_threshold=getattr(config, 'answer_cache_threshold', DEFAULT_SIMILARITY_THRESHOLD),
+        persist_path=getattr(config, 'answer_cache_path', None),
+    )
+    # Beim Beenden noch nicht gespeicherte Einträge sichern
+    if answer_cache.persist_path:
+        atexit.register(answer_cache.save)
+    return answer_cache
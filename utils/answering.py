@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+from llama_index.core import Settings, QueryBundle
+
+from utils import metrics
+from utils.answer_cache import answer_signature
+
+# Antwortmodi der Chatbots
+# single_pass: relevante Artikelausschnitte abrufen und mit genau einem LLM-Aufruf beantworten
+# two_stage:   Antwort erst über die Query Engine erzeugen und danach nochmals vom LLM zusammenführen lassen
+ANSWER_MODE_SINGLE_PASS = 'single_pass'
+ANSWER_MODE_TWO_STAGE = 'two_stage'
+ANSWER_MODES = (ANSWER_MODE_SINGLE_PASS, ANSWER_MODE_TWO_STAGE)
+
+# Anzahl der Artikelausschnitte, die für eine Antwort abgerufen werden
+DEFAULT_TOP_K = 2
+
+
+# Funktion zum Erstellen des Prompts aus den abgerufenen Artikelausschnitten
+# Parameter:    nodes: abgerufene Ausschnitte (NodeWithScore), source_name: Name der Quelle z.B. "Bild",
+#               input_text: vom Nutzer eingegebene Frage
+# Rückgabe:     prompt: Prompt mit den Ausschnitten und der Frage
+def build_single_pass_prompt(nodes, source_name, input_text):
+    chunks = []
+    for i, node in enumerate(nodes):
+        file_name = node.node.metadata.get('file_name', 'unbekannt')
+        chunks.append(f"[{i + 1}] ({file_name})\n{node.node.get_content()}")
+    context = "\n\n".join(chunks)
+
+    return (f"Nutze diese Ausschnitte aus spezifischen {source_name}-Artikeln:\n\n{context}\n\n"
+            f"Und beantworte die folgende Frage: {input_text}")
+
+
+# Funktion zum Erstellen des Prompts aus den Ausschnitten mehrerer Quellen (Frage an mehrere Korpora)
+# Parameter:    results: Liste von (Name der Quelle, abgerufene Ausschnitte), input_text: vom Nutzer eingegebene Frage
+# Rückgabe:     prompt: Prompt mit den Ausschnitten aller Quellen, jeweils mit Quelle gekennzeichnet, und der Frage
+def build_multi_source_prompt(results, input_text):
+    chunks = []
+    for source_name, nodes in results:
+        for node in nodes:
+            file_name = node.node.metadata.get('file_name', 'unbekannt')
+            chunks.append(f"[{len(chunks) + 1}] ({source_name}, {file_name})\n{node.node.get_content()}")
+    context = "\n\n".join(chunks)
+    source_names = ", ".join(source_name for source_name, _ in results)
+
+    return (f"Nutze diese Ausschnitte aus spezifischen Artikeln ({source_names}):\n\n{context}\n\n"
+            f"Und beantworte die folgende Frage: {input_text}")
+
+
+# Funktion zum Erstellen des Prompts aus der bereits von der Query Engine erzeugten Antwort
+# Parameter:    relevant_content: Antwort der Query Engine, source_name: Name der Quelle z.B. "Bild",
+#               input_text: vom Nutzer eingegebene Frage
+# Rückgabe:     prompt: Prompt um die Antwort mit GPT-3.5 zu vergleichen und zusammenzuführen
+def build_two_stage_prompt(relevant_content, source_name, input_text):
+    return f"Nutze diese Informationen aus spezifischen {source_name}-Artikeln: {relevant_content}. Und beantworte die folgende Frage: {input_text}"
+
+
+# Funktion zum Erstellen der Suchanfrage an den Index
+# Ist das Embedding der Frage schon bekannt (z.B. aus dem Antwort-Cache), wird es nicht erneut berechnet
+def _query_bundle(input_text, query_embedding=None):
+    return QueryBundle(query_str=input_text, embedding=query_embedding)
+
+
+# Funktion zum Erstellen des finalen Prompts im gewählten Antwortmodus
+# Im Modus single_pass wird dabei kein LLM aufgerufen, im Modus two_stage die Query Engine
+# Abruf und LLM-Aufruf blockieren dabei nicht die Event-Loop, sodass andere Anfragen weiterlaufen
+# Parameter:    index_holder: IndexHolder mit dem geladenen Index, source_name: Name der Quelle,
+#               input_text: Frage, answer_mode: Antwortmodus, top_k: Anzahl abgerufener Ausschnitte,
+#               query_embedding: bereits berechnetes Embedding der Frage (optional),
+#               trace: Messwerte der Frage (optional, siehe utils/metrics.py)
+# Rückgabe:     prompt: Prompt für den abschließenden LLM-Aufruf
+async def abuild_prompt(index_holder, source_name, input_text, answer_mode=ANSWER_MODE_SINGLE_PASS, top_k=DEFAULT_TOP_K,
+                        query_embedding=None, trace=None):
+    if trace is None:
+        trace = metrics.Trace(source_name.lower())
+    if answer_mode == ANSWER_MODE_SINGLE_PASS:
+        # Ein evtl. nötiges Neuladen des Index findet in einem eigenen Thread statt
+        with trace.stage('index'):
+            retriever = await asyncio.to_thread(index_holder.get_retriever, similarity_top_k=top_k)
+        with trace.stage('retrieve'):
+            nodes = await retriever.aretrieve(_query_bundle(input_text, query_embedding))
+        trace.nodes(len(nodes))
+        return build_single_pass_prompt(nodes, source_name, input_text)
+
+    if answer_mode == ANSWER_MODE_TWO_STAGE:
+        with trace.stage('index'):
+            query_engine = await asyncio.to_thread(index_holder.get_query_engine, llm=Settings.llm,
+                                                   similarity_top_k=top_k)
+        with trace.stage('synthesize'):
+            index_response = await query_engine.aquery(_query_bundle(input_text, query_embedding))
+        trace.nodes(len(index_response.source_nodes))
+        return build_two_stage_prompt(index_response.response, source_name, input_text)
+
+    raise ValueError(f"Unbekannter Antwortmodus '{answer_mode}', erlaubt sind: {', '.join(ANSWER_MODES)}")
+
+
+# Funktion für den abschließenden LLM-Aufruf im Streaming-Modus, misst Dauer, Zeit bis zum ersten Token und Tokens
+# Beim Streaming meldet die API keine Tokens: ein Stück der Antwort entspricht etwa einem Token,
+# die Tokens des Prompts werden aus der Länge geschätzt
+# Parameter:    prompt: Prompt, trace: Messwerte der Frage
+# Rückgabe:     Async-Generator, der den bisher erzeugten Antworttext nach jedem neuen Token liefert
+async def astream_llm(prompt, trace):
+    completion_tokens = 0
+    start = time.perf_counter()
+    with trace.stage('llm'):
+        async for partial_response in await Settings.llm.astream_complete(prompt):
+            if completion_tokens == 0:
+                trace.observe('llm_first_token', time.perf_counter() - start)
+            completion_tokens += 1
+            yield partial_response.text
+    trace.tokens(metrics.estimate_tokens(prompt), completion_tokens)
+
+
+# Funktion zum Beantworten einer Frage mit gestreamter Antwort für die async Gradio-Handler
+# Das LLM wird im Streaming-Modus aufgerufen, sodass die ersten Wörter direkt angezeigt werden können
+# Ist ein Antwort-Cache angegeben, wird bei einem Treffer die gespeicherte Antwort direkt geliefert.
+# Das Embedding der Frage wird dabei nur einmal berechnet und auch für die Suche im Index genutzt.
+# Dauer der einzelnen Schritte, Tokens, abgerufene Ausschnitte und Cache-Treffer gehen in utils/metrics.py
+# Parameter:    siehe abuild_prompt, answer_cache: optionaler AnswerCache
+# Rückgabe:     Async-Generator, der den bisher erzeugten Antworttext nach jedem neuen Token liefert
+async def astream_answer(index_holder, source_name, input_text, answer_mode=ANSWER_MODE_SINGLE_PASS, top_k=DEFAULT_TOP_K,
+                         answer_cache=None):
+    trace = metrics.Trace(source_name.lower())
+    error = None
+    try:
+        query_embedding = None
+        cache_signature = None
+
+        if answer_cache is not None:
+            # Exakte und ähnliche Fragen als eigene Schritte messen, damit jeder Schritt einmal pro Frage zählt
+            with trace.stage('cache_exact'):
+                # Antworten gelten nur für denselben Index-Stand und dieselben Antwort-Einstellungen
+                index_signature = await asyncio.to_thread(lambda: index_holder.signature)
+                cache_signature = answer_signature(index_signature, answer_mode, top_k, index_holder.retrieval_mode)
+                answer = answer_cache.lookup_exact(input_text, cache_signature)
+            if answer is not None:
+                trace.cache('exact')
+                yield answer
+                return
+
+            if answer_cache.semantic_enabled:
+                with trace.stage('embed'):
+                    query_embedding = await Settings.embed_model.aget_query_embedding(input_text)
+            with trace.stage('cache_semantic'):
+                answer, _ = answer_cache.lookup(input_text, query_embedding, cache_signature)
+            if answer is not None:
+                trace.cache('similar')
+                yield answer
+                return
+            trace.cache('miss')
+
+        prompt = await abuild_prompt(index_holder, source_name, input_text, answer_mode, top_k, query_embedding, trace)
+        answer = ""
+        async for answer in astream_llm(prompt, trace):
+            yield answer
+
+        if answer_cache is not None:
+            answer_cache.store(input_text, answer, query_embedding, cache_signature)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        trace.finish(error)
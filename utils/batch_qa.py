@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.corpus_bot import create_bot, create_models, load_project_config, KNOWN_CORPORA, PLAIN, PLAIN_PROJECT_DIR
+from utils.llm_client import get_async_http_client, connection_limits, DEFAULT_MAX_CONNECTIONS
+from utils.rate_limit import RateLimitedTransport, DEFAULT_MAX_RETRIES
+
+# Fragen aus einer Datei gesammelt von einem Chatbot (bild, spiegel, plain) beantworten lassen, z.B. zur Auswertung
+# Eingabe:  JSONL mit einem Objekt pro Zeile oder CSV mit Kopfzeile, jeweils mit "question" und optional "id"
+# Ausgabe:  JSONL mit id, question, corpus, answer, error und den Zeiten (erstes Token, gesamt) pro Frage,
+#           jede Zeile wird geschrieben, sobald die Frage beantwortet ist
+# Die Anfragen an die API werden auf Anfragen und Tokens pro Minute begrenzt, bei 429 wird mit zufällig gestreuter,
+# wachsender Wartezeit erneut gesendet (siehe utils/rate_limit.py). API-Key, api_base und die Einstellungen des
+# Korpus kommen aus der config.py des Projektordners.
+#
+# Beispiel:
+#   python utils/batch_qa.py bild fragen.jsonl antworten.jsonl --concurrency 8 --rpm 3500 --tpm 90000
+
+
+# Funktion zum Lesen der Fragen
+# Parameter:    path: JSONL- oder CSV-Datei
+# Rückgabe:     Liste von dicts mit id und question
+def read_questions(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        if path.endswith('.csv'):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = [json.loads(line) for line in file if line.strip()]
+    return [{'id': str(row.get('id') or i + 1), 'question': row['question']} for i, row in enumerate(rows)]
+
+
+# Funktion zum Beantworten einer Frage, die Antwort wird wie in der Oberfläche gestreamt
+# Rückgabe:     dict mit Antwort bzw. Fehler und Zeiten in Sekunden
+async def answer_question(bot, question):
+    start = time.perf_counter()
+    result = {'id': question['id'], 'question': question['question'], 'corpus': bot.name,
+              'answer': None, 'error': None, 'first_token_seconds': None}
+    try:
+        async for partial_response in bot.astream(question['question']):
+            if result['first_token_seconds'] is None:
+                result['first_token_seconds'] = round(time.perf_counter() - start, 3)
+            result['answer'] = partial_response
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['total_seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+# Funktion zum Beantworten aller Fragen mit concurrency gleichzeitigen Fragen
+# Parameter:    bot: gestarteter Chatbot, questions: siehe read_questions, output_path: JSONL-Datei für die Ergebnisse
+# Rückgabe:     Liste der Ergebnisse
+async def run_batch(bot, questions, output_path, concurrency):
+    queue = asyncio.Queue()
+    for question in questions:
+        queue.put_nowait(question)
+    results = []
+
+    with open(output_path, 'w', encoding='utf-8') as output:
+        async def worker():
+            while not queue.empty():
+                result = await answer_question(bot, queue.get_nowait())
+                output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                output.flush()
+                results.append(result)
+                status = 'Fehler' if result['error'] else 'ok'
+                print(f"[{len(results)}/{len(questions)}] {result['id']}: {status} in {result['total_seconds']:.1f}s")
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(questions)))))
+    return results
+
+
+def print_summary(results, seconds, transport):
+    # Erst hier importieren, utils/load_test.py lädt gradio_client
+    from utils.load_test import percentile
+
+    answered = [result for result in results if result['error'] is None]
+    totals = [result['total_seconds'] for result in answered]
+    first_tokens = [result['first_token_seconds'] for result in answered if result['first_token_seconds'] is not None]
+    print(f"{len(answered)} von {len(results)} Fragen beantwortet in {seconds:.1f}s "
+          f"({len(results) / seconds * 60:.0f} Fragen/min), {transport.sent} API-Anfragen, {transport.retried} erneut gesendet")
+    if totals:
+        print(f"Gesamt:       p50 {percentile(totals, 50):.2f}s  p95 {percentile(totals, 95):.2f}s")
+    if first_tokens:
+        print(f"Erstes Token: p50 {percentile(first_tokens, 50):.2f}s  p95 {percentile(first_tokens, 95):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fragen aus einer JSONL- oder CSV-Datei gesammelt beantworten lassen")
+    parser.add_argument('corpus', help=f"Chatbot: {', '.join([*KNOWN_CORPORA, PLAIN])} oder weiteres Korpus mit --project-dir")
+    parser.add_argument('questions', help="JSONL- oder CSV-Datei mit den Fragen (Feld question, optional id)")
+    parser.add_argument('output', help="JSONL-Datei für die Antworten")
+    parser.add_argument('--project-dir', help="Projektordner mit config.py und Index (Standard: Ordner des Chatbots)")
+    parser.add_argument('--concurrency', type=int, default=8, help="gleichzeitig beantwortete Fragen")
+    parser.add_argument('--rpm', type=int, help="höchstens so viele API-Anfragen pro Minute")
+    parser.add_argument('--tpm', type=int, help="höchstens so viele Tokens pro Minute an das LLM (geschätzt)")
+    parser.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES, help="erneutes Senden bei 429")
+    parser.add_argument('--answer-cache', action='store_true',
+                        help="Antwort-Cache aus config.py nutzen (Standard: jede Frage wird neu beantwortet)")
+    args = parser.parse_args()
+
+    if args.corpus == PLAIN:
+        project_dir = args.project_dir or PLAIN_PROJECT_DIR
+    elif args.corpus in KNOWN_CORPORA:
+        project_dir = args.project_dir or KNOWN_CORPORA[args.corpus][0]
+    elif args.project_dir:
+        project_dir = args.project_dir
+    else:
+        parser.error(f"Unbekanntes Korpus '{args.corpus}', bitte --project-dir angeben")
+
+    config = load_project_config(args.corpus, project_dir)
+    if getattr(config, 'api_key', None):
+        os.environ["OPENAI_API_KEY"] = config.api_key
+
+    # Der gemeinsame asynchrone HTTP-Client wird mit dem begrenzenden Transport erstellt,
+    # bevor LLM und Embedding-Modell ihn abrufen. Der Transport wiederholt 429 selbst,
+    # daher sind die Wiederholungen im openai-SDK und in llama_index abgeschaltet
+    max_connections = getattr(config, 'max_connections', DEFAULT_MAX_CONNECTIONS)
+    transport = RateLimitedTransport(args.rpm, args.tpm, args.max_retries, limits=connection_limits(max_connections))
+    get_async_http_client(max_connections, transport=transport)
+    create_models(config, max_retries=0)
+
+    # Erstellen und Abgleichen des Index liefe über den synchronen HTTP-Client an den Limits vorbei,
+    # daher wird nur ein fertiger Index geladen (vorher "build-index" des Bots bzw. einmal den Bot starten)
+    bot = create_bot(args.corpus, project_dir)
+    try:
+        bot.start(prebuilt=True)
+    except (FileNotFoundError, ValueError) as error:
+        parser.error(f"{error}, bitte zuerst den Index erstellen (build-index)")
+    if not args.answer_cache and hasattr(bot, 'answer_cache'):
+        bot.answer_cache = None
+
+    questions = read_questions(args.questions)
+    start = time.perf_counter()
+    results = asyncio.run(run_batch(bot, questions, args.output, args.concurrency))
+    print_summary(results, time.perf_counter() - start, transport)
+
+
+if __name__ == '__main__':
+    main()
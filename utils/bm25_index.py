@@ -0,0 +1,172 @@
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+# Invertierter Index mit BM25-Gewichtung für die Stichwortsuche in den Artikelausschnitten
+# Die Gewichte werden beim Aufbau vorberechnet, eine Anfrage summiert nur noch die Postings ihrer Wörter.
+# Gespeichert werden im Persist-Ordner:
+#   bm25.json         - Wörter (Position = Wort-ID), Knoten-IDs (Position = Dokumentnummer) und Parameter
+#   bm25.offsets.npy  - Beginn der Postings jedes Wortes (Länge: Anzahl Wörter + 1)
+#   bm25.docs.npy     - Dokumentnummern aller Postings (int32), sortiert nach Wort
+#   bm25.weights.npy  - BM25-Gewicht jedes Postings (float16)
+# Die .npy-Dateien werden per memmap eingebunden.
+
+FILE_PREFIX = 'bm25'
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'\w+')
+UMLAUTS = str.maketrans({'ä': 'a', 'ö': 'o', 'ü': 'u'})
+# Endungen, die beim Stemming abgeschnitten werden (längste zuerst), nur bei Wörtern mit mehr als 4 Zeichen
+SUFFIXES = ('ern', 'em', 'en', 'er', 'es', 'e', 'n', 's')
+STOPWORDS = frozenset("""
+aber alle allem allen aller alles als also am an ander andere anderem anderen anderer anderes auch auf aus bei bin
+bis bist da damit dann das dass dein deine dem den denn der des dich die dies diese diesem diesen dieser dieses dir
+doch dort du durch ein eine einem einen einer eines er es etwas euch euer für gegen gewesen hab habe haben hat hatte
+hatten hier hin hinter ich ihm ihn ihnen ihr ihre im in indem ins ist jede jedem jeden jeder jedes jene jetzt kann
+kein keine können könnte man manche mein meine mich mir mit muss musste nach nicht nichts noch nun nur ob oder ohne
+sehr sein seine seit sich sie sind so solche soll sollte sondern sonst über um und uns unser unter vom von vor war
+waren warum was weil welche welchem welchen welcher welches wenn wer werde werden wie wieder will wir wird wo wollen
+wollte würde würden zu zum zur zwar zwischen
+""".split())
+
+
+def _stem(token):
+    if len(token) > 4:
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+                return token[:-len(suffix)]
+    return token
+
+
+# Funktion zum Zerlegen eines deutschen Textes in Suchbegriffe
+# Kleinschreibung, ß -> ss, Umlaute -> Grundvokal, Stoppwörter entfernen und einfache Endungen abschneiden,
+# sodass z.B. "Anschläge" und "Anschlag" oder "Amris" und "Amri" denselben Begriff ergeben
+# Parameter:    text: Text oder Frage
+# Rückgabe:     Liste der Begriffe
+def tokenize(text):
+    text = unicodedata.normalize('NFKC', text).casefold()
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        if token in STOPWORDS:
+            continue
+        tokens.append(_stem(token.translate(UMLAUTS)))
+    return tokens
+
+
+def _paths(persist_dir):
+    base = os.path.join(persist_dir, FILE_PREFIX)
+    return {name: f"{base}.{name}" for name in ('json', 'offsets.npy', 'docs.npy', 'weights.npy')}
+
+
+class BM25Index:
+    def __init__(self, terms, node_ids, offsets, docs, weights):
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.node_ids = node_ids
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    # Funktion zum Aufbauen des Index
+    # Parameter:    texts: dict Knoten-ID -> Text, k1, b: BM25-Parameter
+    # Rückgabe:     BM25Index
+    @classmethod
+    def build(cls, texts, k1=DEFAULT_K1, b=DEFAULT_B):
+        node_ids = list(texts)
+        term_ids = {}
+        posting_terms, posting_docs, posting_tfs = [], [], []
+        doc_lengths = np.zeros(len(node_ids), dtype=np.float32)
+        for doc, node_id in enumerate(node_ids):
+            counts = Counter(tokenize(texts[node_id]))
+            doc_lengths[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+                posting_docs.append(doc)
+                posting_tfs.append(tf)
+
+        posting_terms = np.asarray(posting_terms, dtype=np.int32)
+        docs = np.asarray(posting_docs, dtype=np.int32)
+        tfs = np.asarray(posting_tfs, dtype=np.float32)
+
+        # Postings nach Wort sortieren (CSR-Format), innerhalb eines Wortes bleibt die Dokumentreihenfolge erhalten
+        order = np.argsort(posting_terms, kind='stable')
+        docs, tfs = docs[order], tfs[order]
+        document_frequency = np.bincount(posting_terms, minlength=len(term_ids))
+        offsets = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=offsets[1:])
+
+        # BM25: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * Länge / mittlere Länge))
+        average_length = float(doc_lengths.mean()) if len(node_ids) else 0.0
+        idf = np.log(1 + (len(node_ids) - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * doc_lengths[docs] / max(average_length, 1e-9))
+        weights = np.repeat(idf, document_frequency) * tfs * (k1 + 1) / (tfs + norm)
+
+        terms = sorted(term_ids, key=term_ids.get)
+        return cls(terms, node_ids, offsets, docs, weights.astype(np.float16))
+
+    # Funktion zur Stichwortsuche
+    # Parameter:    query: Frage, top_k: Anzahl Ergebnisse
+    # Rückgabe:     Liste von (Knoten-ID, Score), absteigend sortiert
+    def search(self, query, top_k):
+        term_ids = [self.term_ids[term] for term in set(tokenize(query)) if term in self.term_ids]
+        if not term_ids or not len(self):
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Jedes Dokument kommt pro Wort höchstens einmal vor, daher reicht die einfache Addition
+            scores[self.docs[start:end]] += self.weights[start:end]
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.node_ids[doc], float(scores[doc])) for doc in top if scores[doc] > 0]
+
+    def save(self, persist_dir):
+        paths = _paths(persist_dir)
+        terms = sorted(self.term_ids, key=self.term_ids.get)
+        for name, array in (('offsets.npy', self.offsets), ('docs.npy', self.docs), ('weights.npy', self.weights)):
+            with open(paths[name] + '.tmp', 'wb') as file:
+                np.save(file, np.ascontiguousarray(array))
+        with open(paths['json'] + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'terms': terms, 'node_ids': self.node_ids}, file, ensure_ascii=False)
+        # bm25.json zuletzt ersetzen, es wird beim Laden mit den .npy-Dateien abgeglichen
+        for name in ('offsets.npy', 'docs.npy', 'weights.npy', 'json'):
+            os.replace(paths[name] + '.tmp', paths[name])
+
+    @classmethod
+    def load(cls, persist_dir, mmap=True):
+        paths = _paths(persist_dir)
+        with open(paths['json'], encoding='utf-8') as file:
+            data = json.load(file)
+        mmap_mode = 'r' if mmap else None
+        offsets = np.load(paths['offsets.npy'], mmap_mode=mmap_mode)
+        docs = np.load(paths['docs.npy'], mmap_mode=mmap_mode)
+        weights = np.load(paths['weights.npy'], mmap_mode=mmap_mode)
+        if len(offsets) != len(data['terms']) + 1 or len(docs) != len(weights) or len(docs) != offsets[-1]:
+            raise ValueError(f"BM25-Index in {persist_dir} ist unvollständig, Index bitte neu erstellen")
+        return cls(data['terms'], data['node_ids'], offsets, docs, weights)
+
+    @staticmethod
+    def exists(persist_dir):
+        return os.path.exists(_paths(persist_dir)['json'])
+
+
+# Funktion zum Aufbauen des BM25-Index aus allen Knoten eines Vektorindex
+# Parameter:    index: VectorStoreIndex, persist_dir: Persist-Ordner, in dem der BM25-Index gespeichert wird
+# Rückgabe:     BM25Index
+def build_bm25_index(index, persist_dir):
+    node_ids = list(index.index_struct.nodes_dict)
+    nodes = index.docstore.get_nodes(node_ids)
+    bm25_index = BM25Index.build({node.node_id: node.get_content() for node in nodes})
+    bm25_index.save(persist_dir)
+    print(f"BM25-Index mit {len(bm25_index)} Ausschnitten und {len(bm25_index.term_ids)} Begriffen erstellt")
+    return bm25_index
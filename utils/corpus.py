@@ -0,0 +1,150 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import zlib
+
+# Artikel-Korpus als Alternative zu den PDFs: eine Zeile JSON pro Artikel, gzip-komprimiert
+# Die Spider hängen neue Artikel nur an (jeder Schreibvorgang ist ein eigener gzip-Block), sodass ein
+# abgebrochener Crawl höchstens den letzten Block verliert. Kommt eine URL mehrfach vor, gilt der letzte Eintrag.
+# Felder pro Artikel: url, title, date_time, intro, body, category, archive_date, source
+
+CORPUS_SUFFIX = '.jsonl.gz'
+FIELDS = ('url', 'title', 'date_time', 'intro', 'body', 'category', 'archive_date', 'source')
+
+# Standard-Suchbegriffe für das Filtern des Korpus und der PDFs (utils/filter_pdf.py)
+DEFAULT_SEARCH_TERMS = ['breitscheid', 'breitscheidplatz', 'anschlag', 'anschläge', 'weihnachtsmarkt', 'weihnachtsmärkte',
+                        'lastwagen', 'lkw', 'terror', 'terroranschlag']
+
+
+# Funktion zum Kompilieren der Suchbegriffe zu einem einzigen Ausdruck (ganze Wörter, Groß-/Kleinschreibung egal),
+# sodass ein Text in einem Durchlauf nach allen Begriffen durchsucht wird
+def compile_search_terms(search_terms):
+    return re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in search_terms) + r')\b', re.IGNORECASE)
+
+
+# Funktion zum Prüfen, ob ein Pfad ein Korpus ist (Korpus-Datei oder Ordner mit Korpus-Dateien)
+def is_corpus(path):
+    if path.endswith(CORPUS_SUFFIX):
+        return True
+    return os.path.isdir(path) and any(name.endswith(CORPUS_SUFFIX) for name in os.listdir(path))
+
+
+# Funktion zum Auflisten der Korpus-Dateien (in fester Reihenfolge, spätere Dateien überschreiben frühere Einträge)
+def corpus_files(path):
+    if os.path.isfile(path):
+        return [path]
+    return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(CORPUS_SUFFIX))
+
+
+class CorpusWriter:
+    # Parameter:    path: Korpus-Datei, wird angelegt bzw. fortgeschrieben
+    def __init__(self, path):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+    # Funktion zum Anhängen mehrerer Artikel als ein gzip-Block
+    # Parameter:    records: Liste von dicts mit den Feldern aus FIELDS
+    def write_many(self, records):
+        if not records:
+            return
+        data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records).encode('utf-8')
+        with open(self.path, 'ab') as file:
+            file.write(gzip.compress(data, compresslevel=6))
+            file.flush()
+            os.fsync(file.fileno())
+
+
+# Funktion zum Lesen aller Artikel einer Korpus-Datei, inkl. doppelter URLs
+# Ein unvollständiger letzter Block (abgebrochener Schreibvorgang) wird übersprungen
+def _iter_file(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        try:
+            for line in file:
+                if line.endswith('\n'):
+                    yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            print(f"Korpus {path} endet mit einem unvollständigen Block ({e}), Rest wird übersprungen")
+
+
+# Funktion zum Lesen der Artikel eines Korpus
+# Parameter:    path: Korpus-Datei oder Ordner, urls: nur diese URLs liefern (optional)
+# Rückgabe:     Generator über die Artikel (dicts), pro URL nur der zuletzt geschriebene Eintrag
+def iter_articles(path, urls=None):
+    files = corpus_files(path)
+
+    # Erster Durchlauf: letzte Position jeder URL bestimmen, ohne die Texte zu behalten
+    latest = {}
+    for file_number, file_path in enumerate(files):
+        for line_number, record in enumerate(_iter_file(file_path)):
+            latest[record['url']] = (file_number, line_number)
+
+    # Zweiter Durchlauf: nur die jeweils letzten Einträge liefern
+    for file_number, file_path in enumerate(files):
+        for line_number, record in enumerate(_iter_file(file_path)):
+            if latest.get(record['url']) != (file_number, line_number):
+                continue
+            if urls is None or record['url'] in urls:
+                yield record
+
+
+# Funktion zum Zusammensetzen des Textes eines Artikels (wie er auch im PDF steht)
+def article_text(record):
+    parts = [record.get('title'), record.get('date_time'), record.get('intro'), record.get('body')]
+    return '\n\n'.join(part for part in parts if part)
+
+
+# Hash über den Text eines Artikels, um geänderte Artikel zu erkennen
+def article_hash(record):
+    return hashlib.sha256(article_text(record).encode('utf-8')).hexdigest()
+
+
+# Funktion zum Umwandeln eines Artikels in ein Dokument für llama_index
+# Die URL dient als Dokument-ID, file_name wird im Prompt als Quelle angezeigt
+def article_document(record):
+    from llama_index.core import Document
+
+    metadata = {key: record.get(key) for key in ('url', 'title', 'date_time', 'category', 'archive_date', 'source')}
+    metadata['file_name'] = record['url'].rstrip('/').rsplit('/', 1)[-1]
+    return Document(text=article_text(record), id_=record['url'], metadata=metadata,
+                    excluded_embed_metadata_keys=['url', 'date_time', 'archive_date', 'source'],
+                    excluded_llm_metadata_keys=['url', 'source'])
+
+
+# Funktion zum Filtern eines Korpus nach Suchbegriffen (ohne Umweg über PDF-Extraktion)
+# Parameter:    source: Korpus-Datei oder Ordner, destination: Ziel-Korpus-Datei, search_terms: Suchbegriffe
+# Rückgabe:     Anzahl der übernommenen Artikel
+def filter_corpus(source, destination, search_terms=DEFAULT_SEARCH_TERMS, batch_size=500):
+    pattern = compile_search_terms(search_terms)
+    writer = CorpusWriter(destination)
+    batch, count = [], 0
+    for record in iter_articles(source):
+        if pattern.search(article_text(record)):
+            batch.append(record)
+            count += 1
+        if len(batch) >= batch_size:
+            writer.write_many(batch)
+            batch = []
+    writer.write_many(batch)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Artikel-Korpus (gzip-JSONL) nach Suchbegriffen filtern")
+    parser.add_argument('source', help="Korpus-Datei oder Ordner mit Korpus-Dateien")
+    parser.add_argument('destination', help="Ziel-Korpus-Datei, z.B. filtered_corpus/articles.jsonl.gz")
+    parser.add_argument('--terms', nargs='+', default=DEFAULT_SEARCH_TERMS, help="Suchbegriffe")
+    args = parser.parse_args()
+
+    if os.path.exists(args.destination):
+        os.remove(args.destination)
+    count = filter_corpus(args.source, args.destination, args.terms)
+    print(f"{count} Artikel nach {args.destination} übernommen")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import asyncio
+import importlib.util
+import os
+import time
+import types
+
+from llama_index.core import Settings, QueryBundle
+from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.llms.openai import OpenAI
+
+from utils.answer_cache import answer_cache_from_config
+from utils import metrics
+from utils.answering import astream_answer, astream_llm, build_multi_source_prompt, ANSWER_MODE_SINGLE_PASS, DEFAULT_TOP_K
+from utils.embedding_cache import CachedEmbedding, API_BATCH_SIZE
+from utils.hybrid_retriever import RETRIEVAL_VECTOR, RETRIEVAL_HYBRID
+from utils.index_builder import construct_or_refresh_index, DEFAULT_VECTOR_STORE, DEFAULT_VECTOR_INDEX
+from utils.index_holder import IndexHolder
+from utils.index_snapshot import save_build_info
+from utils.ivf_index import DEFAULT_PROBES
+from utils.llm_client import get_http_client, get_async_http_client, DEFAULT_MAX_CONNECTIONS
+from utils.startup import current_rss_mb
+
+# Chatbots für mehrere Korpora in einem Prozess (siehe multi-gpt/multi_bot.py)
+# Alle Korpora nutzen dasselbe LLM, dasselbe Embedding-Modell mit gemeinsamem Embedding-Cache und dieselben
+# HTTP-Clients. Jedes Korpus hat seinen eigenen Index und Antwort-Cache; die Einstellungen eines Korpus
+# (Antwortmodus, Vektorspeicher, corpus_path, ...) stehen in der config.py seines Projektordners.
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_EMBEDDING_CACHE_DIR = os.path.join(ROOT, 'embedding-cache')
+
+# Korpus ohne Index: Fragen gehen direkt an das LLM (wie plain-gpt)
+PLAIN = 'plain'
+PLAIN_PROJECT_DIR = os.path.join(ROOT, 'plain-gpt')
+# Bekannte Korpora: Name -> (Projektordner, Name der Quelle im Prompt, Titel in der Oberfläche)
+KNOWN_CORPORA = {
+    'bild': (os.path.join(ROOT, 'bild-gpt'), 'Bild', 'Bild.de-Artikel'),
+    'spiegel': (os.path.join(ROOT, 'spiegel-gpt'), 'Spiegel', 'Spiegel.de-Artikel'),
+}
+# Pfade in der config.py eines Korpus, die relativ zu dessen Projektordner angegeben sind
+PROJECT_PATH_OPTIONS = ('corpus_path', 'answer_cache_path', 'embedding_cache_dir')
+
+
+# Funktion zum Laden der config.py eines Projektordners, ohne sie als Modul "config" zu importieren
+# Parameter:    name: Name des Korpus, project_dir: Projektordner
+# Rückgabe:     config-Modul oder leerer Namespace (Standardwerte), wenn es keine config.py gibt
+def load_project_config(name, project_dir):
+    path = os.path.join(project_dir, 'config.py')
+    if not os.path.exists(path):
+        return types.SimpleNamespace()
+    spec = importlib.util.spec_from_file_location(f"{name}_config", path)
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    for option in PROJECT_PATH_OPTIONS:
+        value = getattr(config, option, None)
+        if value:
+            setattr(config, option, os.path.join(project_dir, value))
+    return config
+
+
+# Funktion zum Erstellen der gemeinsamen Modelle (Settings.llm und Settings.embed_model)
+# LLM und Embeddings nutzen gemeinsame HTTP-Clients mit offenen Verbindungen (Keep-Alive)
+# Parameter:    config: config-Modul mit api_base, max_connections und embedding_cache_dir (optional),
+#               max_retries: Wiederholungen im openai-SDK und in llama_index (None = deren Standard,
+#               0 wenn der HTTP-Client selbst wiederholt, z.B. mit RateLimitedTransport)
+def create_models(config, max_retries=None):
+    api_base = getattr(config, 'api_base', None)
+    max_connections = getattr(config, 'max_connections', DEFAULT_MAX_CONNECTIONS)
+    http_client = get_http_client(max_connections)
+    async_http_client = get_async_http_client(max_connections)
+    retries = {} if max_retries is None else {'max_retries': max_retries}
+    # Modell 3.5 mit mittlerer Temperature und maximalem output tokens
+    Settings.llm = OpenAI(model="gpt-3.5-turbo", temperature=0.7, max_tokens=265, api_base=api_base,
+                          http_client=http_client, async_http_client=async_http_client, **retries)
+    embed_model = OpenAIEmbedding(api_base=api_base, embed_batch_size=API_BATCH_SIZE,
+                                  http_client=http_client, async_http_client=async_http_client, **retries)
+    # Ein Embedding-Cache für alle Korpora
+    embedding_cache_dir = getattr(config, 'embedding_cache_dir', DEFAULT_EMBEDDING_CACHE_DIR)
+    if embedding_cache_dir:
+        embed_model = CachedEmbedding(embed_model, embedding_cache_dir)
+    Settings.embed_model = embed_model
+
+
+# Chatbot für ein Korpus mit Index (z.B. bild, spiegel)
+class CorpusBot:
+    # Parameter:    name: Name des Korpus, project_dir: Projektordner mit config.py, Index (<name>-index/index)
+    #               und Trainingsdaten, source_name: Name der Quelle im Prompt, title: Titel in der Oberfläche
+    def __init__(self, name, project_dir, source_name, title):
+        self.name = name
+        self.source_name = source_name
+        self.title = title
+        config = load_project_config(name, project_dir)
+
+        self.persist_dir = os.path.join(project_dir, f"{name}-index", "index")
+        # Trainingsdaten: Ordner mit Artikeln oder Artikel-Korpus (corpus_path in config.py)
+        self.source_path = getattr(config, 'corpus_path', None) or os.path.join(project_dir, 'filtered_pdfs')
+        self.index_refresh = getattr(config, 'index_refresh', True)
+        self.vector_store = getattr(config, 'vector_store', DEFAULT_VECTOR_STORE)
+        self.vector_index = getattr(config, 'vector_index', DEFAULT_VECTOR_INDEX)
+        self.ivf_probes = getattr(config, 'ivf_probes', DEFAULT_PROBES)
+        self.retrieval_mode = getattr(config, 'retrieval_mode', RETRIEVAL_VECTOR)
+        self.answer_mode = getattr(config, 'answer_mode', ANSWER_MODE_SINGLE_PASS)
+        self.top_k = getattr(config, 'similarity_top_k', DEFAULT_TOP_K)
+
+        self.index_holder = IndexHolder(self.persist_dir, vector_store_type=self.vector_store,
+                                        vector_index=self.vector_index, ivf_probes=self.ivf_probes,
+                                        retrieval_mode=self.retrieval_mode)
+        self.answer_cache = answer_cache_from_config(config)
+
+        # Werte für den Start-Bericht (siehe print_startup_report)
+        self.chunks = None
+        self.startup_seconds = None
+        self.memory_mb = None
+
+    # Funktion zum Laden bzw. Erstellen und Abgleichen des Index, misst Dauer und zusätzlichen Speicher
+    # Parameter:    prebuilt: nur einen mit build-index erstellten Index laden, ohne Abgleich und ohne Embeddings
+    # Fehler:       mit prebuilt FileNotFoundError bzw. ValueError, siehe check_index_snapshot
+    def start(self, prebuilt=False):
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        with metrics.stage('index_load', self.name):
+            if prebuilt:
+                self.index_holder.check_snapshot()
+                self.index_holder.validate = True
+                index = self.index_holder.get_index()
+            else:
+                index = construct_or_refresh_index(self.source_path, self.persist_dir, refresh=self.index_refresh,
+                                                   llm=Settings.llm, vector_store_type=self.vector_store,
+                                                   vector_index=self.vector_index, ivf_probes=self.ivf_probes,
+                                                   bm25=self.retrieval_mode == RETRIEVAL_HYBRID)
+        if not prebuilt:
+            # Wie build-index der Bots: danach kann der Index mit "serve" ohne Abgleich geladen werden
+            save_build_info(self.persist_dir, len(index.docstore.docs), self.source_path,
+                            self.retrieval_mode == RETRIEVAL_HYBRID, vector_store=self.vector_store,
+                            vector_index=self.vector_index)
+            self.index_holder.set_index(index)
+        self.startup_seconds = time.perf_counter() - start
+        self.memory_mb = current_rss_mb() - rss_before
+        self.chunks = len(index.docstore.docs)
+
+    # Funktion zum Beantworten einer Frage mit gestreamter Antwort (auch für chatbot() in bild_bot.py und spiegel_bot.py)
+    async def astream(self, input_text):
+        async for partial_response in astream_answer(self.index_holder, self.source_name, input_text,
+                                                     self.answer_mode, self.top_k, self.answer_cache):
+            yield partial_response
+
+    # Funktion zum Abrufen der Artikelausschnitte für eine Frage an mehrere Korpora
+    # Die Suche läuft in einem eigenen Thread, sodass mehrere Korpora gleichzeitig durchsucht werden
+    # Parameter:    input_text: Frage, query_embedding: bereits berechnetes Embedding der Frage
+    # Rückgabe:     abgerufene Ausschnitte (NodeWithScore)
+    async def aretrieve(self, input_text, query_embedding):
+        retriever = await asyncio.to_thread(self.index_holder.get_retriever, similarity_top_k=self.top_k)
+        return await asyncio.to_thread(retriever.retrieve, QueryBundle(query_str=input_text, embedding=query_embedding))
+
+
+# Chatbot ohne Index, die Frage geht direkt an das LLM (wie plain-gpt)
+class PlainBot:
+    name = PLAIN
+    title = "Plain"
+    chunks = 0
+    startup_seconds = 0.0
+    memory_mb = 0.0
+
+    def start(self, prebuilt=False):
+        pass
+
+    async def astream(self, input_text):
+        trace = metrics.Trace(PLAIN)
+        error = None
+        try:
+            async for partial_response in astream_llm(input_text, trace):
+                yield partial_response.lstrip()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            trace.finish(error)
+
+
+# Funktion zum Erstellen des Chatbots für ein Korpus
+# Parameter:    name: "plain", ein Name aus KNOWN_CORPORA oder ein weiteres Korpus,
+#               project_dir: Projektordner (nur für weitere Korpora nötig)
+# Rückgabe:     CorpusBot bzw. PlainBot
+def create_bot(name, project_dir=None):
+    if name == PLAIN:
+        return PlainBot()
+    if name in KNOWN_CORPORA:
+        default_dir, source_name, title = KNOWN_CORPORA[name]
+        return CorpusBot(name, project_dir or default_dir, source_name, title)
+    if project_dir is None:
+        raise ValueError(f"Unbekanntes Korpus '{name}' ohne Projektordner, bekannt sind: "
+                         f"{', '.join([PLAIN, *KNOWN_CORPORA])}")
+    return CorpusBot(name, project_dir, name.capitalize(), f"{name.capitalize()}-Artikel")
+
+
+# Funktion zum Beantworten einer Frage mit den Artikeln mehrerer Korpora
+# Das Embedding der Frage wird einmal berechnet, danach werden alle Korpora parallel durchsucht
+# und die Ausschnitte aller Korpora mit einem LLM-Aufruf beantwortet (wie im Antwortmodus single_pass)
+# Die Messwerte laufen unter dem Namen "multi" (siehe utils/metrics.py)
+# Parameter:    bots: CorpusBots, input_text: vom Nutzer eingegebene Frage
+# Rückgabe:     Async-Generator, der den bisher erzeugten Antworttext nach jedem neuen Token liefert
+async def astream_multi(bots, input_text):
+    trace = metrics.Trace('multi')
+    error = None
+    try:
+        with trace.stage('embed'):
+            query_embedding = await Settings.embed_model.aget_query_embedding(input_text)
+        with trace.stage('retrieve'):
+            results = await asyncio.gather(*(bot.aretrieve(input_text, query_embedding) for bot in bots))
+        trace.nodes(sum(len(nodes) for nodes in results))
+        prompt = build_multi_source_prompt([(bot.source_name, nodes) for bot, nodes in zip(bots, results)], input_text)
+        async for partial_response in astream_llm(prompt, trace):
+            yield partial_response
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        trace.finish(error)
+
+
+# Funktion zum Ausgeben von Dauer und Speicherbedarf des Starts pro Korpus
+def print_startup_report(bots, total_seconds):
+    print(f"{'Korpus':<10} {'Chunks':>8} {'Start':>8} {'Speicher':>10}")
+    for bot in bots:
+        print(f"{bot.name:<10} {bot.chunks:>8} {bot.startup_seconds:>7.1f}s {bot.memory_mb:>+8.0f}MB")
+    print(f"{'gesamt':<10} {'':>8} {total_seconds:>7.1f}s {current_rss_mb():>8.0f}MB")
@@ -0,0 +1,418 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# Offline-Benchmark der Spider: Archiv- und Artikelseiten einmal aufzeichnen und danach von einem lokalen
+# HTTP-Server mit einstellbarer Latenz und Fehlerquote abspielen
+# Gemessen werden pro Spider Artikel pro Sekunde, p95 der Callback-Zeit (parse/parse_article),
+# maximaler Speicherverbrauch (RSS, Crawler-Prozess und PDF-Pool) und geschriebene Bytes im Ausgabeordner.
+#
+# Beispiele:
+#   python utils/crawl_benchmark.py record bild --start-date 2016-12-19 --end-date 2016-12-20
+#   python utils/crawl_benchmark.py run --latency 0.05 --error-rate 0.02
+#   python utils/crawl_benchmark.py serve --port 8001            (Server allein, z.B. für eigene Messungen)
+#
+# Die Fixtures liegen in fixtures/<site>/: index.jsonl (URL -> Datei, Status, Content-Type, Location),
+# crawl.json (Spider-Argumente der Aufzeichnung) und die Seiten als archiv-*.html / artikel-*.html,
+# die auch für news_scraper/parse_benchmark.py verwendet werden können.
+
+# Scrapy-Projekt pro Site, alle nutzen den generischen Spider aus news_scraper
+SPIDERS = {
+    'bild': 'bild-gpt/bild_archive_scraper',
+    'spiegel': 'spiegel-gpt/spiegel_scraper',
+}
+SPIDER_NAME = 'archive_spider'
+DEFAULT_FIXTURES = os.path.join(ROOT, 'fixtures')
+INDEX_FILE = 'index.jsonl'
+CRAWL_FILE = 'crawl.json'
+
+
+# Funktion zum Bestimmen des Schlüssels einer URL in den Fixtures (ohne Schema, der Server kennt nur HTTP)
+def fixture_key(url):
+    parts = urlsplit(url)
+    return parts.netloc + parts.path + (f"?{parts.query}" if parts.query else '')
+
+
+# Funktion zum Laden aller Fixtures (alle index.jsonl im Ordner und seinen Unterordnern)
+# Rückgabe:     dict Schlüssel -> Eintrag mit Pfad der Seite
+def load_fixtures(folder):
+    fixtures = {}
+    for directory, _, files in os.walk(folder):
+        if INDEX_FILE not in files:
+            continue
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as file:
+            for line in file:
+                entry = json.loads(line)
+                entry['path'] = os.path.join(directory, entry['file']) if entry.get('file') else None
+                fixtures[entry['key']] = entry
+    return fixtures
+
+
+# Downloader-Middleware zum Aufzeichnen der Archiv- und Artikelseiten (HTML und Weiterleitungen)
+# Läuft direkt vor dem Download (Priorität 950), sieht also die Antworten vor der RedirectMiddleware
+class FixtureRecorderMiddleware:
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.index = open(os.path.join(folder, INDEX_FILE), 'a', encoding='utf-8')
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        from scrapy import signals
+
+        middleware = cls(crawler.settings.get('FIXTURE_FOLDER'))
+        crawler.signals.connect(middleware.close, signal=signals.spider_closed)
+        return middleware
+
+    def process_response(self, request, response, spider):
+        from scrapy.http import HtmlResponse
+
+        content_type = response.headers.get('Content-Type', b'text/html; charset=utf-8').decode('latin-1')
+        location = response.headers.get('Location', b'').decode('latin-1')
+        if response.status == 200 and isinstance(response, HtmlResponse):
+            key = fixture_key(request.url)
+            kind = 'artikel' if request.meta.get('article') else 'archiv'
+            file_name = f"{kind}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.html"
+            with open(os.path.join(self.folder, file_name), 'wb') as file:
+                file.write(response.body)
+            self.write_entry(key, file_name, response.status, content_type, None)
+        elif 300 <= response.status < 400 and location:
+            self.write_entry(fixture_key(request.url), None, response.status, content_type, location)
+        return response
+
+    def write_entry(self, key, file_name, status, content_type, location):
+        entry = {'key': key, 'file': file_name, 'status': status, 'content_type': content_type, 'location': location}
+        self.index.write(json.dumps(entry) + '\n')
+
+    def close(self, spider=None):
+        self.index.close()
+
+
+# Download-Handler für http/https, der jede Anfrage an den Fixture-Server umleitet
+# Die Antwort bekommt wieder die ursprüngliche URL, Spider, Middlewares und Pipelines merken davon nichts.
+class FixtureDownloadHandler:
+    lazy = False
+
+    def __init__(self, settings, crawler):
+        from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+
+        self.server_url = settings.get('FIXTURE_SERVER').rstrip('/')
+        self.handler = HTTP11DownloadHandler(settings, crawler)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler)
+
+    def download_request(self, request, spider):
+        local_request = request.replace(url=f"{self.server_url}/{fixture_key(request.url)}")
+
+        def restore_url(response):
+            # Die Latenz wird in meta der umgeleiteten Anfrage gespeichert, AutoThrottle liest sie aus der ursprünglichen
+            request.meta['download_latency'] = local_request.meta.get('download_latency')
+            return response.replace(url=request.url, request=request)
+        return self.handler.download_request(local_request, spider).addCallback(restore_url)
+
+    def close(self):
+        return self.handler.close()
+
+
+# Spider-Middleware direkt am Spider, misst die Zeit in den Callbacks (parse, parse_article) pro Antwort
+# Die Callbacks sind Generatoren, gemessen wird daher die Zeit beim Abrufen ihrer Ergebnisse
+class CallbackTimerMiddleware:
+    def __init__(self):
+        self.times = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls()
+        crawler.callback_times = middleware.times
+        return middleware
+
+    def process_spider_output(self, response, result, spider):
+        iterator = iter(result)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield value
+        finally:
+            self.times.append(elapsed)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1, damit Scrapy die Verbindungen offen halten kann (Keep-Alive)
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.next_latency())
+        if server.inject_error():
+            headers = {'Retry-After': str(server.retry_after)} if server.retry_after is not None else {}
+            self.send_body(server.error_status, b'', 'text/plain', headers)
+            return
+
+        entry = server.fixtures.get(self.path.lstrip('/'))
+        if entry is None:
+            self.send_body(404, b'', 'text/plain')
+        elif entry['path'] is None:
+            self.send_body(entry['status'], b'', entry['content_type'] or 'text/plain', {'Location': entry['location']})
+        else:
+            with open(entry['path'], 'rb') as file:
+                self.send_body(entry['status'], file.read(), entry['content_type'])
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Parameter:    fixtures: dict aus load_fixtures, latency/jitter: Wartezeit pro Anfrage in s (latency + 0..jitter),
+    #               error_rate: Anteil der Anfragen, die mit error_status (und optional Retry-After) beantwortet werden
+    def __init__(self, address, fixtures, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, retry_after=None,
+                 seed=0, verbose=False):
+        super().__init__(address, FixtureHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_latency(self):
+        with self.lock:
+            self.requests += 1
+            return self.latency + self.jitter * self.random.random()
+
+    def inject_error(self):
+        with self.lock:
+            if self.random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+
+# Funktion zum Starten des Fixture-Servers in einem Hintergrund-Thread
+# Rückgabe:     FixtureServer (base_url enthält den tatsächlichen Port)
+def start_fixture_server(fixtures, port=0, **kwargs):
+    server = FixtureServer(('127.0.0.1', port), fixtures, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# Funktion zum Erstellen eines Crawlers im Scrapy-Projekt einer Site
+# Parameter:    settings_overrides: Einstellungen, die ersetzt werden,
+#               middlewares: Einstellung -> {Middleware: Priorität}, wird zu den Middlewares des Projekts hinzugefügt
+# Rückgabe:     (CrawlerProcess, Crawler)
+def _create_crawler(site, output_folder, settings_overrides, middlewares):
+    os.chdir(os.path.join(ROOT, SPIDERS[site]))
+    sys.path.insert(0, os.getcwd())
+
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    settings.set('OUTPUT_FOLDER', output_folder)
+    settings.set('LOG_LEVEL', 'WARNING')
+    for name, value in settings_overrides.items():
+        settings.set(name, value)
+    for name, added in middlewares.items():
+        settings.set(name, {**settings.getdict(name), **added})
+    process = CrawlerProcess(settings)
+    return process, process.create_crawler(SPIDER_NAME)
+
+
+# Funktion zum Aufzeichnen der Fixtures einer Site mit dem echten Spider (mit den Drosselungs-Einstellungen des Projekts)
+def record(site, fixtures_folder, spider_args):
+    folder = os.path.join(fixtures_folder, site)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    with tempfile.TemporaryDirectory() as output_folder:
+        process, crawler = _create_crawler(
+            site, output_folder,
+            {'FIXTURE_FOLDER': folder, 'SEEN_URLS_MODE': 'off', 'OUTPUT_FORMATS': []},
+            {'DOWNLOADER_MIDDLEWARES': {'utils.crawl_benchmark.FixtureRecorderMiddleware': 950}})
+        process.crawl(crawler, **spider_args)
+        process.start()
+    with open(os.path.join(folder, CRAWL_FILE), 'w', encoding='utf-8') as file:
+        json.dump(spider_args, file)
+    print(f"{len(load_fixtures(folder))} Seiten für {site} in {folder} aufgezeichnet")
+
+
+# Funktion für einen Crawl gegen den Fixture-Server (läuft in einem eigenen Prozess, siehe run)
+# Parameter:    throttle: "off" misst nur den Scraping-Pfad, "project" behält die Drosselung des Projekts
+# Rückgabe:     dict mit den Messwerten
+def crawl(site, server_url, output_folder, spider_args, throttle):
+    overrides = {
+        'FIXTURE_SERVER': server_url,
+        'DOWNLOAD_HANDLERS': {'http': 'utils.crawl_benchmark.FixtureDownloadHandler',
+                              'https': 'utils.crawl_benchmark.FixtureDownloadHandler'},
+    }
+    if throttle == 'off':
+        overrides.update({'AUTOTHROTTLE_ENABLED': False, 'DOWNLOAD_DELAY': 0, 'THROTTLE_BACKOFF_HTTP_CODES': []})
+    process, crawler = _create_crawler(
+        site, output_folder, overrides,
+        {'SPIDER_MIDDLEWARES': {'utils.crawl_benchmark.CallbackTimerMiddleware': 990}})
+    process.crawl(crawler, **spider_args)
+    process.start()
+
+    stats = crawler.stats.get_stats()
+    bytes_written = 0
+    for directory, _, files in os.walk(output_folder):
+        bytes_written += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+    return {
+        'site': site,
+        'articles': stats.get('item_scraped_count', 0),
+        'seconds': (stats['finish_time'] - stats['start_time']).total_seconds(),
+        'responses': stats.get('response_received_count', 0),
+        'retries': stats.get('retry/count', 0),
+        'callback_times': crawler.callback_times,
+        # ru_maxrss ist unter Linux in KB angegeben
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'peak_rss_pool_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'bytes_written': bytes_written,
+    }
+
+
+# Funktion für den Benchmark aller Sites mit Fixtures: Server starten und jeden Spider in einem eigenen Prozess
+# crawlen lassen (eigener Twisted-Reactor und eigene Speichermessung pro Spider)
+def run(args):
+    from utils.load_test import percentile
+
+    server = start_fixture_server(load_fixtures(args.fixtures), latency=args.latency, jitter=args.jitter,
+                                  error_rate=args.error_rate, error_status=args.error_status,
+                                  retry_after=args.retry_after, seed=args.seed)
+    print(f"Fixture-Server auf {server.base_url}, Latenz {args.latency * 1000:.0f}ms (+{args.jitter * 1000:.0f}ms), "
+          f"Fehlerquote {args.error_rate:.1%} ({args.error_status}), Drosselung: {args.throttle}")
+    print(f"{'Site':<10} {'Artikel':>8} {'Zeit':>8} {'Artikel/s':>10} {'p95 Callback':>13} {'RSS':>8} "
+          f"{'RSS Pool':>9} {'Geschrieben':>12} {'Retries':>8}")
+    for site in args.sites:
+        folder = os.path.join(args.fixtures, site)
+        if not os.path.exists(os.path.join(folder, CRAWL_FILE)):
+            print(f"{site:<10} keine Fixtures in {folder}, zuerst aufzeichnen: python utils/crawl_benchmark.py record {site}")
+            continue
+        with open(os.path.join(folder, CRAWL_FILE), encoding='utf-8') as file:
+            spider_args = json.load(file)
+
+        with tempfile.TemporaryDirectory() as output_folder:
+            result_path = os.path.join(output_folder, 'result.json')
+            subprocess.run([sys.executable, os.path.abspath(__file__), 'crawl', site, '--server', server.base_url,
+                            '--output', os.path.join(output_folder, 'output'), '--result', result_path,
+                            '--spider-args', json.dumps(spider_args), '--throttle', args.throttle],
+                           stdout=subprocess.DEVNULL, check=True)
+            with open(result_path, encoding='utf-8') as file:
+                result = json.load(file)
+
+        callback_p95 = percentile(result['callback_times'], 95) * 1000 if result['callback_times'] else 0.0
+        print(f"{site:<10} {result['articles']:>8} {result['seconds']:>7.1f}s {result['articles'] / result['seconds']:>10.1f} "
+              f"{callback_p95:>11.2f}ms {result['peak_rss_mb']:>6.0f}MB {result['peak_rss_pool_mb']:>7.0f}MB "
+              f"{result['bytes_written'] / 1e6:>10.1f}MB {result['retries']:>8}")
+    print(f"Server: {server.requests} Anfragen, davon {server.errors} mit Fehler beantwortet")
+    server.shutdown()
+
+
+def _add_server_arguments(parser):
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help="Ordner mit den aufgezeichneten Seiten")
+    parser.add_argument('--latency', type=float, default=0.05, help="Wartezeit in s pro Anfrage")
+    parser.add_argument('--jitter', type=float, default=0.0, help="zusätzliche zufällige Wartezeit in s (0..jitter)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Anteil der Anfragen, die fehlschlagen")
+    parser.add_argument('--error-status', type=int, default=503, help="HTTP-Status der Fehler, z.B. 429 oder 503")
+    parser.add_argument('--retry-after', type=int, help="Retry-After-Header (s) bei Fehlern")
+    parser.add_argument('--seed', type=int, default=0, help="Startwert für Latenz und Fehler")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline-Benchmark der Spider mit aufgezeichneten Seiten")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="Seiten einer Site mit dem echten Spider aufzeichnen")
+    record_parser.add_argument('site', choices=sorted(SPIDERS))
+    record_parser.add_argument('--fixtures', default=DEFAULT_FIXTURES)
+    record_parser.add_argument('--start-date', default='2016-12-19')
+    record_parser.add_argument('--end-date', default='2016-12-19')
+
+    serve_parser = commands.add_parser('serve', help="nur den Fixture-Server starten")
+    _add_server_arguments(serve_parser)
+    serve_parser.add_argument('--port', type=int, default=8001)
+    serve_parser.add_argument('--verbose', action='store_true')
+
+    run_parser = commands.add_parser('run', help="Spider gegen den Fixture-Server laufen lassen und messen")
+    _add_server_arguments(run_parser)
+    run_parser.add_argument('--sites', nargs='+', default=sorted(SPIDERS), choices=sorted(SPIDERS))
+    run_parser.add_argument('--throttle', choices=('off', 'project'), default='off',
+                            help="off: ohne Drosselung (misst den Scraping-Pfad), project: Einstellungen des Projekts")
+
+    # Ein einzelner Crawl, wird von run in einem eigenen Prozess gestartet
+    crawl_parser = commands.add_parser('crawl')
+    crawl_parser.add_argument('site', choices=sorted(SPIDERS))
+    crawl_parser.add_argument('--server', required=True)
+    crawl_parser.add_argument('--output', required=True)
+    crawl_parser.add_argument('--result', required=True)
+    crawl_parser.add_argument('--spider-args', default='{}')
+    crawl_parser.add_argument('--throttle', default='off')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.site, os.path.abspath(args.fixtures),
+               {'start_date': args.start_date, 'end_date': args.end_date})
+    elif args.command == 'serve':
+        server = FixtureServer(('127.0.0.1', args.port), load_fixtures(args.fixtures), latency=args.latency,
+                               jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+                               retry_after=args.retry_after, seed=args.seed, verbose=args.verbose)
+        print(f"Fixture-Server mit {len(server.fixtures)} Seiten auf {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == 'run':
+        args.fixtures = os.path.abspath(args.fixtures)
+        run(args)
+    else:
+        result = crawl(args.site, args.server, args.output, json.loads(args.spider_args), args.throttle)
+        with open(args.result, 'w', encoding='utf-8') as file:
+            json.dump(result, file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+try:
+    import fcntl
+except ImportError:  # Windows: keine Dateisperre, der Cache sollte dann nur von einem Prozess beschrieben werden
+    fcntl = None
+
+# Inhaltsadressierter Cache für Embeddings auf der Festplatte
+# Schlüssel ist (Modellname, SHA-1 des Textes). Pro Modell gibt es drei Dateien:
+#   <modell>.vec   - Matrix aller Vektoren als float16/float32 hintereinander (wird per memmap gelesen)
+#   <modell>.keys  - ein Hash pro Zeile, Zeile n gehört zu Vektor n
+#   <modell>.json  - Dimension und Datentyp
+# Neue Vektoren werden nur angehängt, sodass sich mehrere Indizes (Bild, Spiegel) einen Cache teilen können.
+
+DEFAULT_DTYPE = 'float16'
+# Anzahl der Texte pro Anfrage an die Embedding-API (statt 10 als Standard von llama_index)
+# OpenAI erlaubt bis zu 2048 Texte pro Anfrage, begrenzt aber auch die Tokens pro Anfrage
+API_BATCH_SIZE = 256
+
+
+# Funktion zum Berechnen des Cache-Schlüssels eines Textes
+def text_key(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingStore:
+    def __init__(self, cache_dir, model_name, dtype=DEFAULT_DTYPE):
+        os.makedirs(cache_dir, exist_ok=True)
+        base = os.path.join(cache_dir, re.sub(r'[^\w.-]', '_', model_name))
+        self.vectors_path = base + '.vec'
+        self.keys_path = base + '.keys'
+        self.meta_path = base + '.json'
+        self.lock_path = base + '.lock'
+
+        self.dim = None
+        self.dtype = np.dtype(dtype)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding='utf-8') as file:
+                meta = json.load(file)
+            self.dim = meta['dim']
+            self.dtype = np.dtype(meta['dtype'])
+
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._keys_offset = 0
+        self._matrix = None
+        with self._lock:
+            self._read_new_keys()
+
+    def __len__(self):
+        return len(self._rows)
+
+    # Funktion zum Nachschlagen mehrerer Vektoren
+    # Parameter:    keys: Liste von Schlüsseln (siehe text_key)
+    # Rückgabe:     Liste mit Vektor (Liste von floats) oder None pro Schlüssel
+    def get_many(self, keys):
+        with self._lock:
+            # Von anderen Prozessen angehängte Einträge berücksichtigen
+            if any(key not in self._rows for key in keys):
+                self._read_new_keys()
+            positions = [(i, self._rows[key]) for i, key in enumerate(keys) if key in self._rows]
+            if not positions:
+                return [None] * len(keys)
+            matrix = self._mapped_matrix()
+
+        result = [None] * len(keys)
+        vectors = np.asarray(matrix[[row for _, row in positions]], dtype=np.float32)
+        for (i, _), vector in zip(positions, vectors):
+            result[i] = vector.tolist()
+        return result
+
+    # Funktion zum Anhängen neuer Vektoren
+    # Parameter:    keys: Schlüssel, vectors: zugehörige Vektoren
+    def put_many(self, keys, vectors):
+        if not keys:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        with self._lock, self._file_lock():
+            self._read_new_keys()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with open(self.meta_path, 'w', encoding='utf-8') as file:
+                    json.dump({'dim': self.dim, 'dtype': self.dtype.name}, file)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding-Dimension {vectors.shape[1]} passt nicht zum Cache ({self.dim})")
+
+            new_rows = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._rows and key not in new_rows:
+                    new_rows[key] = vector
+            if not new_rows:
+                return
+
+            # Erst die Vektoren, dann die Schlüssel schreiben: nur Zeilen mit Schlüssel gelten als gültig,
+            # Reste eines abgebrochenen Schreibvorgangs werden beim nächsten Mal überschrieben
+            row_bytes = self.dim * self.dtype.itemsize
+            with open(self.vectors_path, 'ab') as file:
+                file.truncate(len(self._rows) * row_bytes)
+                file.write(np.stack(list(new_rows.values())).astype(self.dtype).tobytes())
+            with open(self.keys_path, 'a', encoding='ascii') as file:
+                file.write(''.join(key + '\n' for key in new_rows))
+            self._read_new_keys()
+
+    def _read_new_keys(self):
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, encoding='ascii') as file:
+            file.seek(self._keys_offset)
+            data = file.read()
+        # Nur vollständige Zeilen übernehmen
+        complete = data[:data.rfind('\n') + 1]
+        for key in complete.splitlines():
+            self._rows.setdefault(key, len(self._rows))
+        self._keys_offset += len(complete)
+
+    def _mapped_matrix(self):
+        rows = len(self._rows)
+        if self._matrix is None or self._matrix.shape[0] < rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode='r', shape=(rows, self.dim))
+        return self._matrix
+
+    def _file_lock(self):
+        return _FileLock(self.lock_path)
+
+
+# Sperre über eine Lock-Datei, damit mehrere Prozesse (z.B. bild- und spiegel-Bot) gleichzeitig anhängen können
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'w')
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+# Embedding-Modell, das vor jedem Aufruf des eigentlichen Modells im Cache nachschlägt
+# Nur Texte, die noch nicht im Cache sind, werden (in großen Gruppen) an das eigentliche Modell geschickt.
+# Anfragen (Fragen der Nutzer) werden nicht gecacht, dafür gibt es den Antwort-Cache.
+class CachedEmbedding(BaseEmbedding):
+    _inner = PrivateAttr()
+    _store = PrivateAttr()
+
+    # Parameter:    inner: eigentliches Embedding-Modell (z.B. OpenAIEmbedding(embed_batch_size=API_BATCH_SIZE)),
+    #               cache_dir: Ordner des Cache, dtype: Datentyp der gespeicherten Vektoren
+    def __init__(self, inner, cache_dir, dtype=DEFAULT_DTYPE, **kwargs):
+        # Große Batches annehmen, damit alle Fehlschläge eines Index-Aufbaus gemeinsam abgefragt werden können
+        kwargs.setdefault('embed_batch_size', 2048)
+        super().__init__(model_name=inner.model_name, callback_manager=inner.callback_manager, **kwargs)
+        self._inner = inner
+
+        # Modelle mit einstellbarer Dimension bekommen einen eigenen Cache pro Dimension
+        model_key = inner.model_name
+        if getattr(inner, 'dimensions', None):
+            model_key += f"-{inner.dimensions}"
+        self._store = EmbeddingStore(cache_dir, model_key, dtype)
+
+    @classmethod
+    def class_name(cls):
+        return "CachedEmbedding"
+
+    @property
+    def store(self):
+        return self._store
+
+    def _get_query_embedding(self, query):
+        return self._inner.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query):
+        return await self._inner.aget_query_embedding(query)
+
+    def _get_text_embedding(self, text):
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text):
+        return (await self._aget_text_embeddings([text]))[0]
+
+    # Alle fehlenden Texte gehen gemeinsam an das eigentliche Modell, das sie in Anfragen zu je
+    # embed_batch_size Texten aufteilt
+    def _get_text_embeddings(self, texts):
+        keys, result, missing = self._lookup(texts)
+        if missing:
+            vectors = self._inner.get_text_embedding_batch([texts[i] for i in missing])
+            self._store_batch(keys, result, missing, vectors)
+        return result
+
+    async def _aget_text_embeddings(self, texts):
+        keys, result, missing = self._lookup(texts)
+        if missing:
+            vectors = await self._inner.aget_text_embedding_batch([texts[i] for i in missing])
+            self._store_batch(keys, result, missing, vectors)
+        return result
+
+    # Cache abfragen, Rückgabe: Schlüssel, Ergebnisliste (None = fehlt) und Positionen der fehlenden Texte
+    # Gleiche Texte innerhalb eines Batches werden nur einmal abgefragt
+    def _lookup(self, texts):
+        keys = [text_key(text) for text in texts]
+        result = self._store.get_many(keys)
+        missing, seen = [], set()
+        for i, key in enumerate(keys):
+            if result[i] is None and key not in seen:
+                seen.add(key)
+                missing.append(i)
+        return keys, result, missing
+
+    def _store_batch(self, keys, result, batch, vectors):
+        self._store.put_many([keys[i] for i in batch], vectors)
+        by_key = {keys[i]: vector for i, vector in zip(batch, vectors)}
+        for i, key in enumerate(keys):
+            if result[i] is None and key in by_key:
+                result[i] = by_key[key]
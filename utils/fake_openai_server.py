@@ -0,0 +1,252 @@
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Lokaler Fake-Server mit OpenAI-kompatibler API, um die Chatbots offline zu testen
+# Unterstützt werden /v1/chat/completions, /v1/completions (jeweils auch mit stream=True) und /v1/embeddings.
+# Die Antworten sind deterministisch, die Embeddings basieren auf gehashten Wörtern,
+# sodass ähnliche Texte auch ähnliche Vektoren bekommen.
+# Mit --error-rate wird ein Teil der Anfragen mit 429 (Rate Limit) abgelehnt, um Retries zu testen.
+#
+# Start:    python utils/fake_openai_server.py --port 8000
+# Nutzung:  in config.py api_base = 'http://127.0.0.1:8000/v1' setzen
+
+EMBEDDING_DIM = 1536
+
+
+# Funktion zum Erzeugen eines deterministischen Embeddings aus einem Text
+# Parameter:    text: Text, der eingebettet werden soll, dim: Anzahl der Dimensionen
+# Rückgabe:     vector: normalisierter Vektor als Liste von floats
+def fake_embedding(text, dim=EMBEDDING_DIM):
+    vector = [0.0] * dim
+    for word in re.findall(r'\w+', text.lower()):
+        digest = hashlib.md5(word.encode('utf-8')).digest()
+        position = int.from_bytes(digest[:4], 'little') % dim
+        vector[position] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+# Funktion zum Erzeugen der Antwort: die Frage wird (gekürzt) wiederholt
+def fake_answer(prompt, max_words):
+    words = prompt.split()
+    answer = ["Testantwort", "auf:"] + words[-max_words:]
+    return answer
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1, damit Clients die Verbindung offen halten können (Keep-Alive)
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        if self.server.should_fail():
+            headers = {'Retry-After': str(self.server.retry_after)} if self.server.retry_after is not None else {}
+            self.send_json({'error': {'message': 'Rate limit reached (Fake-Server)', 'type': 'requests',
+                                      'code': 'rate_limit_exceeded'}}, status=self.server.error_status, headers=headers)
+            return
+
+        path = self.path.rstrip('/')
+        if path.endswith('/chat/completions'):
+            prompt = body['messages'][-1]['content']
+            self.send_completion(body, prompt, chat=True)
+        elif path.endswith('/completions'):
+            prompt = body['prompt'] if isinstance(body['prompt'], str) else body['prompt'][0]
+            self.send_completion(body, prompt, chat=False)
+        elif path.endswith('/embeddings'):
+            self.send_embeddings(body)
+        else:
+            self.send_json({'error': {'message': f'Unbekannter Pfad {self.path}'}}, status=404)
+
+    def send_json(self, payload, status=200, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_completion(self, body, prompt, chat):
+        model = body.get('model', 'gpt-3.5-turbo')
+        words = fake_answer(prompt, body.get('max_tokens') or 16)
+        completion_id = f"fake-{uuid.uuid4().hex}"
+        usage = {
+            'prompt_tokens': len(prompt.split()),
+            'completion_tokens': len(words),
+            'total_tokens': len(prompt.split()) + len(words),
+        }
+
+        time.sleep(self.server.first_token_delay)
+
+        if not body.get('stream'):
+            time.sleep(self.server.token_delay * len(words))
+            text = ' '.join(words)
+            choice = {'index': 0, 'finish_reason': 'stop'}
+            if chat:
+                choice['message'] = {'role': 'assistant', 'content': text}
+            else:
+                choice['text'] = text
+            self.send_json({
+                'id': completion_id,
+                'object': 'chat.completion' if chat else 'text_completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [choice],
+                'usage': usage,
+            })
+            return
+
+        # Server-Sent Events mit chunked Transfer-Encoding, damit die Verbindung offen bleiben kann
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        for i, word in enumerate(words):
+            if i > 0:
+                time.sleep(self.server.token_delay)
+            token = word if i == 0 else ' ' + word
+            if chat:
+                choice = {'index': 0, 'delta': {'role': 'assistant', 'content': token}, 'finish_reason': None}
+            else:
+                choice = {'index': 0, 'text': token, 'finish_reason': None}
+            self.send_event({
+                'id': completion_id,
+                'object': 'chat.completion.chunk' if chat else 'text_completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [choice],
+            })
+
+        if chat:
+            last_choice = {'index': 0, 'delta': {}, 'finish_reason': 'stop'}
+        else:
+            last_choice = {'index': 0, 'text': '', 'finish_reason': 'stop'}
+        self.send_event({
+            'id': completion_id,
+            'object': 'chat.completion.chunk' if chat else 'text_completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [last_choice],
+            'usage': usage,
+        })
+        self.send_chunk(b'data: [DONE]\n\n')
+        self.send_chunk(b'')
+
+    def send_event(self, payload):
+        self.send_chunk(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+
+    def send_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def send_embeddings(self, body):
+        inputs = body['input']
+        if isinstance(inputs, str):
+            inputs = [inputs]
+
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(text, body.get('dimensions') or self.server.embedding_dim)
+            if body.get('encoding_format') == 'base64':
+                # Der openai-Client fordert Embeddings standardmäßig als base64-codierte float32-Werte an
+                embedding = base64.b64encode(struct.pack(f'<{len(vector)}f', *vector)).decode('ascii')
+            else:
+                embedding = vector
+            data.append({'object': 'embedding', 'index': i, 'embedding': embedding})
+
+        tokens = sum(len(text.split()) for text in inputs)
+        self.send_json({
+            'object': 'list',
+            'data': data,
+            'model': body.get('model', 'text-embedding-ada-002'),
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens},
+        })
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Parameter:    error_rate: Anteil der Anfragen, die mit error_status abgelehnt werden,
+    #               retry_after: Wert des Retry-After-Headers in s (None = ohne Header), seed: Startwert des Zufalls
+    def __init__(self, address, first_token_delay=0.2, token_delay=0.02, embedding_dim=EMBEDDING_DIM, verbose=False,
+                 error_rate=0.0, error_status=429, retry_after=None, seed=0):
+        super().__init__(address, FakeOpenAIHandler)
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.embedding_dim = embedding_dim
+        self.verbose = verbose
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    # Funktion zum Zählen einer Anfrage und Entscheiden, ob sie abgelehnt wird
+    def should_fail(self):
+        with self.lock:
+            self.requests += 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+# Funktion zum Starten des Fake-Servers in einem Hintergrund-Thread (z.B. für Benchmarks)
+# Parameter:    port: Port (0 = freier Port), weitere Parameter siehe FakeOpenAIServer
+# Rückgabe:     server: laufender Server, server.base_url als api_base verwenden
+def start_fake_server(port=0, **kwargs):
+    server = FakeOpenAIServer(('127.0.0.1', port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-kompatibler Fake-Server zum Offline-Testen der Chatbots")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--first-token-delay', type=float, default=0.2, help="Wartezeit in s bis zum ersten Token")
+    parser.add_argument('--token-delay', type=float, default=0.02, help="Wartezeit in s zwischen zwei Tokens")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Anteil der Anfragen, die abgelehnt werden")
+    parser.add_argument('--error-status', type=int, default=429, help="Status der abgelehnten Anfragen")
+    parser.add_argument('--retry-after', type=int, help="Retry-After-Header der abgelehnten Anfragen in s")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(('127.0.0.1', args.port), args.first_token_delay, args.token_delay, verbose=args.verbose,
+                              error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after)
+    print(f"Fake-OpenAI-Server läuft auf {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    if server.error_rate:
+        print(f"{server.errors} von {server.requests} Anfragen abgelehnt")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,43 +1,138 @@
+import argparse
 import os
 import shutil
-import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
 from PyPDF2 import PdfReader
 
-# Ordner mit den PDFs
-source_folder = 'training_set'
-# Zielordner für gefundene PDFs
-destination_folder = 'filtered_pdfs'
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.corpus import DEFAULT_SEARCH_TERMS, compile_search_terms
+from utils.pdf_text_cache import DEFAULT_CACHE_FILE, PdfTextCache, file_signature
+
+# Filtern der gescrapten PDFs nach Suchbegriffen: PDFs, die mindestens einen der Begriffe enthalten
+# (ganze Wörter, Groß-/Kleinschreibung egal), werden in den Zielordner kopiert.
+# Die Dateien werden auf mehrere Prozesse verteilt, jede PDF wird Seite für Seite gelesen und
+# die Suche endet beim ersten Treffer. Alle Begriffe werden mit einem einzigen vorkompilierten Ausdruck gesucht.
+# Die extrahierten Seitentexte werden im Quellordner zwischengespeichert (pdf_text_cache.sqlite, siehe
+# utils/pdf_text_cache.py), sodass weitere Läufe mit anderen Suchbegriffen unveränderte PDFs nicht erneut lesen.
+#
+# Beispiele:
+#   python utils/filter_pdf.py training_set filtered_pdfs
+#   python utils/filter_pdf.py test_newscript filtered_pdfs --terms anschlag breitscheidplatz --workers 8
+
+# Suchausdruck eines Worker-Prozesses, wird beim Start des Prozesses einmal kompiliert
+_pattern = None
+
+
+def _init_worker(search_terms):
+    global _pattern
+    _pattern = compile_search_terms(search_terms)
 
-# Liste der gesuchten Wörter
-search_terms = ['breitscheid', 'breitscheidplatz', 'anschlag', 'anschläge', 'weihnachtsmarkt', 'weihnachtsmärkte', 'lastwagen', 'lkw', 'terror', 'terroranschlag']
 
-# Stelle sicher, dass der Zielordner existiert, wenn nicht, erstelle ihn
-if not os.path.exists(destination_folder):
-    os.makedirs(destination_folder)
+# Funktion zum Durchsuchen bereits extrahierter Seitentexte
+# Rückgabe:     erster gefundener Begriff (klein geschrieben) oder None
+def search_pages(pages, pattern):
+    for text in pages:
+        match = pattern.search(text)
+        if match:
+            return match.group(0).lower()
+    return None
 
-# Funktion, um den Text aus einer PDF-Datei zu extrahieren
-def extract_text_from_pdf(pdf_path):
-    text = ""
+
+# Funktion zum Durchsuchen einer PDF-Datei, Seite für Seite bis zum ersten Treffer
+# Parameter:    pdf_path: Pfad der PDF, pattern: kompilierter Suchausdruck (siehe compile_search_terms),
+#               start: erste zu lesende Seite (die Seiten davor sind schon bekannt)
+# Rückgabe:     (erster gefundener Begriff oder None, Texte der gelesenen Seiten, Seitenanzahl oder None bei Fehlern)
+def scan_pdf(pdf_path, pattern, start=0):
+    pages = []
     try:
         reader = PdfReader(pdf_path)
-        for page_num in range(len(reader.pages)):
-            text += reader.pages[page_num].extract_text()
+        for page in reader.pages[start:]:
+            pages.append(page.extract_text() or '')
+            term = search_pages(pages[-1:], pattern)
+            if term:
+                return term, pages, len(reader.pages)
+        return None, pages, len(reader.pages)
     except Exception as e:
         print(f"Fehler beim Lesen der Datei {pdf_path}: {e}")
-    return text
-
-# Durchsuche alle PDF-Dateien im Quellordner
-for filename in os.listdir(source_folder):
-    if filename.endswith('.pdf'):
-        file_path = os.path.join(source_folder, filename)
-        text = extract_text_from_pdf(file_path)
-
-        # Überprüfen, ob eines der Suchwörter im Text vorkommt
-        for term in search_terms:
-            # Verwende reguläre Ausdrücke, um nach den Wörtern zu suchen, unabhängig von Groß-/Kleinschreibung
-            if re.search(rf'\b{term}\b', text, re.IGNORECASE):
-                # Datei kopieren
-                shutil.copy(file_path, destination_folder)
-                print(f"'{filename}' enthält '{term}' und wurde kopiert.")
-                # Wenn ein Treffer gefunden wurde, hören wir auf zu suchen
-                break
+    return None, pages, None
+
+
+def _scan_in_worker(job):
+    pdf_path, start = job
+    return (pdf_path,) + scan_pdf(pdf_path, _pattern, start)
+
+
+# Funktion zum Filtern aller PDFs eines Ordners
+# Parameter:    source_folder: Ordner mit den PDFs, destination_folder: Zielordner für gefundene PDFs,
+#               search_terms: Suchbegriffe, workers: Anzahl Prozesse (None = Anzahl CPUs),
+#               cache_path: Datei des Text-Cache (None = ohne Cache)
+# Rückgabe:     Anzahl der kopierten PDFs
+def filter_pdfs(source_folder, destination_folder, search_terms=DEFAULT_SEARCH_TERMS, workers=None, cache_path=None):
+    os.makedirs(destination_folder, exist_ok=True)
+    pdf_paths = [os.path.join(source_folder, filename) for filename in sorted(os.listdir(source_folder))
+                 if filename.endswith('.pdf')]
+    pattern = compile_search_terms(search_terms)
+    cache = PdfTextCache(cache_path) if cache_path else None
+
+    copied = 0
+
+    def copy(pdf_path, term):
+        nonlocal copied
+        shutil.copy(pdf_path, destination_folder)
+        copied += 1
+        print(f"'{os.path.basename(pdf_path)}' enthält '{term}' und wurde kopiert.")
+
+    try:
+        # Zuerst die gespeicherten Seitentexte durchsuchen, nur PDFs ohne Treffer mit noch nicht
+        # extrahierten Seiten werden gelesen (ab der ersten fehlenden Seite)
+        jobs, known = [], {}
+        for pdf_path in pdf_paths:
+            if cache is None:
+                jobs.append((pdf_path, 0))
+                continue
+            signature = file_signature(pdf_path)
+            pages, page_count = cache.get(signature)
+            term = search_pages(pages, pattern)
+            if term:
+                copy(pdf_path, term)
+            elif page_count is None or len(pages) < page_count:
+                jobs.append((pdf_path, len(pages)))
+                known[pdf_path] = (signature, pages)
+        if cache is not None:
+            print(f"{len(pdf_paths) - len(jobs)} von {len(pdf_paths)} PDFs aus dem Cache durchsucht")
+
+        if jobs:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(search_terms,)) as executor:
+                # Mehrere Dateien pro Auftrag, damit bei vielen kleinen PDFs die Kommunikation nicht überwiegt
+                for pdf_path, term, pages, page_count in executor.map(_scan_in_worker, jobs, chunksize=16):
+                    if cache is not None and page_count is not None:
+                        signature, cached_pages = known.pop(pdf_path)
+                        cache.put(signature, cached_pages + pages, page_count)
+                    if term:
+                        copy(pdf_path, term)
+    finally:
+        if cache is not None:
+            cache.close()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDFs nach Suchbegriffen filtern und Treffer in einen Zielordner kopieren")
+    parser.add_argument('source', nargs='?', default='training_set', help="Ordner mit den PDFs")
+    parser.add_argument('destination', nargs='?', default='filtered_pdfs', help="Zielordner für gefundene PDFs")
+    parser.add_argument('--terms', nargs='+', default=DEFAULT_SEARCH_TERMS, help="Suchbegriffe")
+    parser.add_argument('--workers', type=int, help="Anzahl Prozesse (Standard: Anzahl CPUs)")
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument('--cache', help=f"Datei des Text-Cache (Standard: {DEFAULT_CACHE_FILE} im Quellordner)")
+    cache.add_argument('--no-cache', action='store_true', help="Texte nicht zwischenspeichern")
+    args = parser.parse_args()
+
+    cache_path = None if args.no_cache else args.cache or os.path.join(args.source, DEFAULT_CACHE_FILE)
+    count = filter_pdfs(args.source, args.destination, args.terms, args.workers, cache_path)
+    print(f"{count} PDFs nach {args.destination} kopiert")
+
+
+if __name__ == '__main__':
+    main()
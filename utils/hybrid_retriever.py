@@ -0,0 +1,60 @@
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore
+
+# Abrufmodi der Chatbots
+# vector: nur Ähnlichkeit der Embeddings
+# hybrid: Embeddings und BM25-Stichwortsuche, zusammengeführt per Reciprocal Rank Fusion (RRF)
+RETRIEVAL_VECTOR = 'vector'
+RETRIEVAL_HYBRID = 'hybrid'
+RETRIEVAL_MODES = (RETRIEVAL_VECTOR, RETRIEVAL_HYBRID)
+
+# Konstante der RRF-Formel 1 / (RRF_K + Rang)
+RRF_K = 60
+# Jede Suche liefert so viele Kandidaten pro gewünschtem Ergebnis (mindestens MIN_CANDIDATES)
+CANDIDATE_FACTOR = 5
+MIN_CANDIDATES = 20
+
+
+# Funktion zum Zusammenführen mehrerer Ranglisten per Reciprocal Rank Fusion
+# Parameter:    rankings: Listen von Knoten-IDs, jeweils bester Treffer zuerst
+# Rückgabe:     Liste von (Knoten-ID, RRF-Score), absteigend sortiert
+def reciprocal_rank_fusion(rankings, rrf_k=RRF_K):
+    scores = {}
+    for ranking in rankings:
+        for rank, node_id in enumerate(ranking):
+            scores[node_id] = scores.get(node_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+# Retriever, der die Ergebnisse der Vektorsuche und der BM25-Suche zusammenführt
+# Eigennamen wie "Breitscheidplatz" oder "Amri" werden so auch dann gefunden, wenn die Embeddings sie schlecht abbilden
+class HybridRetriever(BaseRetriever):
+    # Parameter:    index: VectorStoreIndex, bm25_index: BM25Index zum selben Index, similarity_top_k: Anzahl Ergebnisse
+    def __init__(self, index, bm25_index, similarity_top_k):
+        super().__init__()
+        self._docstore = index.docstore
+        self._bm25_index = bm25_index
+        self._top_k = similarity_top_k
+        self._candidates = max(similarity_top_k * CANDIDATE_FACTOR, MIN_CANDIDATES)
+        self._vector_retriever = index.as_retriever(similarity_top_k=self._candidates)
+
+    def _retrieve(self, query_bundle):
+        return self._fuse(self._vector_retriever.retrieve(query_bundle), query_bundle)
+
+    async def _aretrieve(self, query_bundle):
+        return self._fuse(await self._vector_retriever.aretrieve(query_bundle), query_bundle)
+
+    def _fuse(self, vector_nodes, query_bundle):
+        keyword_hits = self._bm25_index.search(query_bundle.query_str, self._candidates)
+        fused = reciprocal_rank_fusion([
+            [node.node.node_id for node in vector_nodes],
+            [node_id for node_id, _ in keyword_hits],
+        ])[:self._top_k]
+
+        # Knoten aus der Vektorsuche übernehmen, nur reine Stichworttreffer aus dem Docstore laden
+        nodes = {node.node.node_id: node.node for node in vector_nodes}
+        missing = [node_id for node_id, _ in fused if node_id not in nodes]
+        for node in self._docstore.get_nodes(missing, raise_error=False):
+            if node is not None:
+                nodes[node.node_id] = node
+        return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in fused if node_id in nodes]
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+
+from llama_index.core import Settings, VectorStoreIndex, SimpleDirectoryReader, StorageContext, load_index_from_storage
+from llama_index.core.ingestion import run_transformations
+
+from utils.bm25_index import BM25Index, build_bm25_index
+from utils.corpus import is_corpus, iter_articles, article_document, article_hash
+from utils.ivf_index import DEFAULT_PROBES
+from utils.numpy_vector_store import NumpyVectorStore, migrate_json_store
+
+# Aufbau und inkrementelle Aktualisierung des Vektorindex aus den Trainingsdaten
+# Trainingsdaten sind ein Ordner mit Dateien (z.B. PDFs) oder ein Artikel-Korpus der Spider (siehe utils/corpus.py).
+# Zu jeder Quelle (Datei bzw. Artikel-URL) werden Hash und die zugehörigen Dokument-IDs im Persist-Ordner
+# gespeichert (Manifest). Beim Aktualisieren werden nur neue oder geänderte Quellen eingebettet und gelöschte entfernt.
+
+MANIFEST_FILE = 'source_manifest.json'
+# Anzahl Dokumente, die gemeinsam zerlegt, eingebettet und in den Index eingefügt werden
+INSERT_BATCH_SIZE = 1000
+
+# Art des Vektorspeichers: 'numpy' (Matrix per memmap) oder 'simple' (JSON-Speicher von llama_index)
+VECTOR_STORE_NUMPY = 'numpy'
+VECTOR_STORE_SIMPLE = 'simple'
+DEFAULT_VECTOR_STORE = VECTOR_STORE_NUMPY
+
+# Suche im Vektorspeicher: 'exact' (alle Vektoren) oder 'ivf' (näherungsweise, nur mit dem NumPy-Vektorspeicher)
+VECTOR_INDEX_EXACT = 'exact'
+VECTOR_INDEX_IVF = 'ivf'
+DEFAULT_VECTOR_INDEX = VECTOR_INDEX_EXACT
+
+
+# Funktion zum Berechnen des Hashes einer Datei
+# Parameter:    path: Pfad zur Datei
+# Rückgabe:     SHA-256 des Dateiinhalts als Hex-String
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(persist_dir):
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_manifest(persist_dir, manifest):
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def _check_vector_index(vector_store_type, vector_index):
+    if vector_index not in (VECTOR_INDEX_EXACT, VECTOR_INDEX_IVF):
+        raise ValueError(f"Unbekannte Suche im Vektorspeicher: {vector_index}")
+    if vector_index == VECTOR_INDEX_IVF and vector_store_type != VECTOR_STORE_NUMPY:
+        raise ValueError("vector_index = 'ivf' setzt vector_store = 'numpy' voraus")
+
+
+# Funktion zum Erstellen eines leeren StorageContext für einen neuen Index
+def new_storage_context(vector_store_type=DEFAULT_VECTOR_STORE, vector_index=DEFAULT_VECTOR_INDEX,
+                        ivf_probes=DEFAULT_PROBES):
+    _check_vector_index(vector_store_type, vector_index)
+    if vector_store_type == VECTOR_STORE_NUMPY:
+        vector_store = NumpyVectorStore(ivf=vector_index == VECTOR_INDEX_IVF, ivf_probes=ivf_probes)
+        return StorageContext.from_defaults(vector_store=vector_store)
+    return StorageContext.from_defaults()
+
+
+# Funktion zum Laden eines gespeicherten Index
+# Ein mit JSON gespeicherter Vektorspeicher wird dabei einmalig in den NumPy-Speicher umgewandelt
+# Parameter:    persist_dir: Persist-Ordner, vector_store_type: 'numpy' oder 'simple',
+#               vector_index: 'exact' oder 'ivf', ivf_probes: durchsuchte IVF-Listen pro Anfrage
+# Rückgabe:     index: geladener Index
+def load_index(persist_dir, vector_store_type=DEFAULT_VECTOR_STORE, vector_index=DEFAULT_VECTOR_INDEX,
+               ivf_probes=DEFAULT_PROBES):
+    _check_vector_index(vector_store_type, vector_index)
+    if vector_store_type == VECTOR_STORE_NUMPY:
+        ivf = vector_index == VECTOR_INDEX_IVF
+        if NumpyVectorStore.exists(persist_dir):
+            vector_store = NumpyVectorStore.from_persist_dir(persist_dir, ivf=ivf, ivf_probes=ivf_probes)
+        else:
+            print(f"Vektorspeicher in {persist_dir} wird von JSON nach NumPy umgewandelt")
+            vector_store = migrate_json_store(persist_dir, ivf=ivf, ivf_probes=ivf_probes)
+        storage_context = StorageContext.from_defaults(persist_dir=persist_dir, vector_store=vector_store)
+    else:
+        storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+    return load_index_from_storage(storage_context)
+
+
+# Funktion zum Auflisten der Quelldateien, die auch SimpleDirectoryReader einlesen würde
+# Rückgabe:     dict mit relativem Dateinamen -> Pfad
+def list_source_files(directory_path):
+    reader = SimpleDirectoryReader(directory_path)
+    return {os.path.relpath(str(path), directory_path): str(path) for path in reader.input_files}
+
+
+# Funktion zum Laden der Dokumente für die übergebenen Dateien
+# Die Dokument-IDs werden aus dem Dateinamen gebildet, damit sie bei jedem Lauf gleich bleiben
+# Rückgabe:     dict mit relativem Dateinamen -> Liste der Dokumente (z.B. eine pro PDF-Seite)
+def load_documents(files):
+    documents_by_file = {name: [] for name in files}
+    if not files:
+        return documents_by_file
+
+    paths = {os.path.abspath(path): name for name, path in files.items()}
+    documents = SimpleDirectoryReader(input_files=list(files.values()), filename_as_id=True).load_data()
+    for document in documents:
+        name = paths[os.path.abspath(document.metadata['file_path'])]
+        documents_by_file[name].append(document)
+    return documents_by_file
+
+
+# Quelle der Trainingsdaten: Ordner mit Dateien (z.B. PDFs), ein Eintrag im Manifest pro Datei
+class DirectorySource:
+    # Metadaten, über die Dokumente beim Erstellen eines Manifests ihrer Quelle zugeordnet werden
+    metadata_key = 'file_name'
+    # Anzahl Dateien, die gemeinsam eingelesen werden
+    files_per_batch = 256
+
+    def __init__(self, directory_path):
+        self.files = list_source_files(directory_path)
+
+    def hashes(self):
+        return {name: file_hash(path) for name, path in self.files.items()}
+
+    # Generator über (Name, Dokumente) für die übergebenen Quellen
+    def iter_documents(self, names):
+        names = list(names)
+        for start in range(0, len(names), self.files_per_batch):
+            batch = names[start:start + self.files_per_batch]
+            yield from load_documents({name: self.files[name] for name in batch}).items()
+
+
+# Quelle der Trainingsdaten: Artikel-Korpus der Spider (gzip-JSONL, siehe utils/corpus.py), ein Eintrag pro URL
+# Die Artikel werden direkt aus dem Korpus gelesen, ohne PDFs zu erzeugen und wieder auszulesen
+class CorpusSource:
+    metadata_key = 'url'
+
+    def __init__(self, corpus_path):
+        self.corpus_path = corpus_path
+        self._hashes = None
+
+    def hashes(self):
+        if self._hashes is None:
+            self._hashes = {record['url']: article_hash(record) for record in iter_articles(self.corpus_path)}
+        return self._hashes
+
+    def iter_documents(self, names):
+        for record in iter_articles(self.corpus_path, urls=set(names)):
+            yield record['url'], [article_document(record)]
+
+
+# Funktion zum Erstellen der passenden Quelle: Korpus-Datei bzw. Ordner mit Korpus-Dateien oder Ordner mit Dateien
+def open_source(source_path):
+    if is_corpus(source_path):
+        return CorpusSource(source_path)
+    return DirectorySource(source_path)
+
+
+# Funktion zum Einfügen der Dokumente der übergebenen Quellen in den Index
+# Die Dokumente werden in Gruppen geladen, zerlegt und eingebettet (Embeddings werden je Gruppe gebündelt abgefragt),
+# sodass auch große Korpora nicht komplett im Speicher liegen müssen
+# Parameter:    index: Index, source: DirectorySource/CorpusSource, names: einzufügende Quellen,
+#               manifest: wird um die eingefügten Quellen ergänzt, hashes: Hash pro Quelle
+# Rückgabe:     Anzahl eingefügter Dokumente
+def _insert_documents(index, source, names, manifest, hashes):
+    count = 0
+    batch = []
+
+    def insert(batch):
+        documents = [document for _, documents in batch for document in documents]
+        for document in documents:
+            # Falls ein früherer Lauf vor dem Speichern des Manifests abgebrochen ist, keine Duplikate erzeugen
+            if index.docstore.get_ref_doc_info(document.doc_id) is not None:
+                index.delete_ref_doc(document.doc_id, delete_from_docstore=True)
+        # Zerlegen mit den Transformationen aus Settings, wie es der Index beim Einfügen von Dokumenten selbst täte
+        index.insert_nodes(run_transformations(documents, Settings.transformations))
+        for document in documents:
+            index.docstore.set_document_hash(document.doc_id, document.hash)
+        for name, source_documents in batch:
+            manifest[name] = {'hash': hashes[name], 'doc_ids': [document.doc_id for document in source_documents]}
+        return len(documents)
+
+    for name, documents in source.iter_documents(names):
+        batch.append((name, documents))
+        if sum(len(documents) for _, documents in batch) >= INSERT_BATCH_SIZE:
+            count += insert(batch)
+            batch = []
+    if batch:
+        count += insert(batch)
+    return count
+
+
+# Funktion zum Erstellen eines neuen Index aus allen Dateien im Ordner bzw. allen Artikeln im Korpus
+# Parameter:    source_path: Ordner mit den Trainingsdaten oder Korpus, persist_dir: Ordner zum Speichern des Index,
+#               vector_store_type, vector_index, ivf_probes: siehe load_index
+# Rückgabe:     index: erstellter Index
+def build_index(source_path, persist_dir, llm=None, vector_store_type=DEFAULT_VECTOR_STORE,
+                vector_index=DEFAULT_VECTOR_INDEX, ivf_probes=DEFAULT_PROBES):
+    source = open_source(source_path)
+    hashes = source.hashes()
+
+    storage_context = new_storage_context(vector_store_type, vector_index, ivf_probes)
+    index = VectorStoreIndex([], storage_context=storage_context, llm=llm)
+    manifest = {}
+    count = _insert_documents(index, source, hashes, manifest, hashes)
+    print(f"Es wurden {count} Dokumente geladen.")
+
+    index.storage_context.persist(persist_dir=persist_dir)
+    save_manifest(persist_dir, manifest)
+    return index
+
+
+# Funktion zum Erstellen eines Manifests für einen Index, der noch ohne Manifest gespeichert wurde
+# Die Quellen werden über die Metadaten der Dokumente (Dateiname bzw. URL) zugeordnet und als unverändert angenommen
+def _bootstrap_manifest(index, source):
+    hashes = source.hashes()
+    manifest = {}
+    for ref_doc_id, info in index.docstore.get_all_ref_doc_info().items():
+        name = info.metadata.get(source.metadata_key)
+        if name in hashes:
+            manifest.setdefault(name, {'hash': hashes[name], 'doc_ids': []})['doc_ids'].append(ref_doc_id)
+    return manifest
+
+
+# Funktion zum inkrementellen Aktualisieren eines vorhandenen Index
+# Nur neue oder geänderte Dateien bzw. Artikel werden eingebettet, Knoten gelöschter Quellen werden entfernt.
+# Gespeichert wird nur, wenn sich etwas geändert hat.
+# Parameter:    index: geladener Index, source_path: Ordner mit den Trainingsdaten oder Korpus, persist_dir: Persist-Ordner
+# Rückgabe:     dict mit der Anzahl neuer, geänderter, gelöschter und unveränderter Quellen
+def refresh_index(index, source_path, persist_dir):
+    source = open_source(source_path)
+    manifest = load_manifest(persist_dir)
+    if manifest is None:
+        print("Kein Manifest vorhanden, vorhandene Dokumente werden als aktuell übernommen")
+        manifest = _bootstrap_manifest(index, source)
+        save_manifest(persist_dir, manifest)
+
+    hashes = source.hashes()
+    added = [name for name in hashes if name not in manifest]
+    changed = [name for name in hashes if name in manifest and manifest[name]['hash'] != hashes[name]]
+    removed = [name for name in manifest if name not in hashes]
+    stats = {'added': len(added), 'changed': len(changed), 'removed': len(removed),
+             'unchanged': len(hashes) - len(added) - len(changed)}
+
+    if not (added or changed or removed):
+        return stats
+
+    # Alte Knoten geänderter und gelöschter Quellen entfernen
+    for name in changed + removed:
+        for doc_id in manifest[name]['doc_ids']:
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+        del manifest[name]
+
+    # Neue und geänderte Quellen laden, zerlegen und einbetten
+    _insert_documents(index, source, added + changed, manifest, hashes)
+
+    index.storage_context.persist(persist_dir=persist_dir)
+    save_manifest(persist_dir, manifest)
+    return stats
+
+
+# Funktion zum Laden oder Erstellen des Index
+# Parameter:    source_path: Ordner mit den Trainingsdaten oder Korpus, persist_dir: Persist-Ordner,
+#               refresh: vorhandenen Index mit neuen/geänderten/gelöschten Quellen abgleichen,
+#               vector_store_type, vector_index, ivf_probes: siehe load_index,
+#               bm25: zusätzlich den BM25-Index für die hybride Suche erstellen bzw. aktualisieren
+# Rückgabe:     index: geladener bzw. erstellter Index
+def construct_or_refresh_index(source_path, persist_dir, refresh=True, llm=None, vector_store_type=DEFAULT_VECTOR_STORE,
+                               vector_index=DEFAULT_VECTOR_INDEX, ivf_probes=DEFAULT_PROBES, bm25=False):
+    if not os.path.exists(persist_dir):
+        print(f"Index neu erstellen")
+        index = build_index(source_path, persist_dir, llm=llm, vector_store_type=vector_store_type,
+                            vector_index=vector_index, ivf_probes=ivf_probes)
+        if bm25:
+            build_bm25_index(index, persist_dir)
+        return index
+
+    print(f"Index vorhanden und laden")
+    index = load_index(persist_dir, vector_store_type, vector_index, ivf_probes)
+
+    changed = False
+    if refresh:
+        stats = refresh_index(index, source_path, persist_dir)
+        print(f"Index abgeglichen: {stats['added']} neu, {stats['changed']} geändert, "
+              f"{stats['removed']} gelöscht, {stats['unchanged']} unverändert")
+        changed = stats['added'] or stats['changed'] or stats['removed']
+    # Der BM25-Index wird bei jeder Änderung komplett neu aufgebaut (Tokenisieren ist schnell im Vergleich zum Einbetten)
+    if bm25 and (changed or not BM25Index.exists(persist_dir)):
+        build_bm25_index(index, persist_dir)
+    return index
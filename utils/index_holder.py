@@ -0,0 +1,150 @@
+import threading
+import time
+
+from llama_index.core.query_engine import RetrieverQueryEngine
+
+from utils.bm25_index import BM25Index
+from utils.hybrid_retriever import HybridRetriever, RETRIEVAL_VECTOR, RETRIEVAL_HYBRID, RETRIEVAL_MODES
+from utils.index_builder import load_index, DEFAULT_VECTOR_STORE, DEFAULT_VECTOR_INDEX
+from utils.index_snapshot import check_index_snapshot, persist_signature, SIGNATURE_EXCLUDE
+from utils.ivf_index import DEFAULT_PROBES
+
+
+# Schlüssel für abgeleitete Objekte (Query Engine, Retriever) aus den übergebenen Argumenten
+# Nicht hashbare Werte (z.B. LLM-Objekte) werden über ihre id unterschieden
+def _cache_key(kind, kwargs):
+    parts = []
+    for key, value in sorted(kwargs.items()):
+        try:
+            hash(value)
+        except TypeError:
+            value = ('id', id(value))
+        parts.append((key, value))
+    return kind, tuple(parts)
+
+
+# Ein geladener Stand des Index inkl. der daraus erstellten Query Engines und Retriever
+class _IndexSnapshot:
+    def __init__(self, index, signature):
+        self.index = index
+        self.signature = signature
+        self._derived = {}
+
+    def derived(self, kind, kwargs, factory):
+        key = _cache_key(kind, kwargs)
+        value = self._derived.get(key)
+        if value is None:
+            # Bei gleichzeitigem Erstellen gewinnt der erste Eintrag, beide Objekte sind gleichwertig
+            value = self._derived.setdefault(key, factory(**kwargs))
+        return value
+
+
+# Prozessweiter Halter für Index und Query Engine
+# Der Index wird einmal geladen und von allen Gradio-Threads gemeinsam genutzt.
+# Nur wenn sich der gespeicherte Index auf der Festplatte ändert, wird er neu geladen
+# und danach atomar ausgetauscht. Laufende Anfragen nutzen bis dahin den alten Stand.
+# Mit validate=True wird nur ein vollständig mit build-index erstellter Index geladen (siehe utils/index_snapshot.py)
+class IndexHolder:
+    def __init__(self, persist_dir, check_interval=2.0, vector_store_type=DEFAULT_VECTOR_STORE,
+                 vector_index=DEFAULT_VECTOR_INDEX, ivf_probes=DEFAULT_PROBES, retrieval_mode=RETRIEVAL_VECTOR,
+                 validate=False):
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unbekannter Abrufmodus '{retrieval_mode}', erlaubt sind: {', '.join(RETRIEVAL_MODES)}")
+        self.persist_dir = persist_dir
+        # 'hybrid' führt Vektorsuche und BM25-Suche zusammen, siehe utils/hybrid_retriever.py
+        self.retrieval_mode = retrieval_mode
+        # Art des Vektorspeichers und der Suche darin, siehe utils/index_builder.py
+        self.vector_store_type = vector_store_type
+        self.vector_index = vector_index
+        self.ivf_probes = ivf_probes
+        # Mindestabstand in Sekunden zwischen zwei Prüfungen des Persist-Ordners
+        self.check_interval = check_interval
+        self.validate = validate
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._last_check = 0.0
+
+    # Bereits geladenen Index übernehmen (z.B. aus construct_index beim Start)
+    def set_index(self, index):
+        with self._lock:
+            self._snapshot = _IndexSnapshot(index, persist_signature(self.persist_dir, exclude=SIGNATURE_EXCLUDE))
+            self._last_check = time.monotonic()
+
+    def get_index(self):
+        return self._current().index
+
+    # Query Engine zum aktuellen Index, wird pro Index-Stand nur einmal erstellt
+    def get_query_engine(self, **kwargs):
+        snapshot = self._current()
+        if self.retrieval_mode == RETRIEVAL_HYBRID:
+            return snapshot.derived('hybrid_query_engine', kwargs,
+                                    lambda similarity_top_k=2, **rest: RetrieverQueryEngine.from_args(
+                                        self._hybrid_retriever(snapshot, similarity_top_k), **rest))
+        return snapshot.derived('query_engine', kwargs, snapshot.index.as_query_engine)
+
+    # Retriever zum aktuellen Index, wird pro Index-Stand nur einmal erstellt
+    def get_retriever(self, **kwargs):
+        snapshot = self._current()
+        if self.retrieval_mode == RETRIEVAL_HYBRID:
+            return self._hybrid_retriever(snapshot, **kwargs)
+        return snapshot.derived('retriever', kwargs, snapshot.index.as_retriever)
+
+    # Hybrider Retriever, der BM25-Index liegt neben dem Vektorindex im Persist-Ordner
+    def _hybrid_retriever(self, snapshot, similarity_top_k=2):
+        bm25_index = snapshot.derived('bm25_index', {}, lambda: BM25Index.load(self.persist_dir))
+        return snapshot.derived('hybrid_retriever', {'similarity_top_k': similarity_top_k},
+                                lambda similarity_top_k: HybridRetriever(snapshot.index, bm25_index, similarity_top_k))
+
+    # Funktion zum Prüfen des gespeicherten Index vor dem Laden
+    # Rückgabe:     Inhalt der build_info.json (z.B. Anzahl der Ausschnitte)
+    def check_snapshot(self):
+        return check_index_snapshot(self.persist_dir, bm25=self.retrieval_mode == RETRIEVAL_HYBRID,
+                                    vector_store=self.vector_store_type, vector_index=self.vector_index)
+
+    # Signatur des aktuell genutzten Index-Stands (ändert sich bei jedem Neuladen)
+    @property
+    def signature(self):
+        return self._current().signature
+
+    # Aktuellen Stand zurückgeben und bei Bedarf neu laden
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._last_check < self.check_interval:
+            return snapshot
+
+        # Lädt bereits ein anderer Thread neu, wird solange der alte Stand weiter genutzt
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = self._snapshot
+            self._last_check = time.monotonic()
+            signature = persist_signature(self.persist_dir, exclude=SIGNATURE_EXCLUDE)
+            if snapshot is None or signature != snapshot.signature:
+                snapshot = self._reload(snapshot, signature)
+            return snapshot
+        finally:
+            self._lock.release()
+
+    def _reload(self, snapshot, signature):
+        if signature is None:
+            if snapshot is not None:
+                return snapshot
+            raise FileNotFoundError(f"Kein gespeicherter Index in {self.persist_dir} gefunden")
+
+        if snapshot is not None:
+            print(f"Index in {self.persist_dir} hat sich geändert und wird neu geladen")
+        try:
+            if self.validate:
+                self.check_snapshot()
+            index = load_index(self.persist_dir, self.vector_store_type, self.vector_index, self.ivf_probes)
+        except Exception as e:
+            # Index wird evtl. gerade geschrieben, dann beim nächsten Mal erneut versuchen
+            if snapshot is None:
+                raise
+            print(f"Fehler beim Neuladen des Index: {e}")
+            return snapshot
+
+        # Wurde während des Ladens weitergeschrieben, bleibt die alte Signatur stehen,
+        # sodass bei der nächsten Prüfung noch einmal geladen wird
+        self._snapshot = _IndexSnapshot(index, signature)
+        return self._snapshot
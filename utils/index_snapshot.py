@@ -0,0 +1,89 @@
+import json
+import os
+from datetime import datetime, timezone
+
+# Prüfung des gespeicherten Index vor dem Laden (ohne llama_index, damit ein Fehler sofort gemeldet wird)
+# Nach jedem Erstellen bzw. Abgleichen schreibt der Bot (build-index) als letzte Datei build_info.json in den
+# Persist-Ordner: Signatur aller Index-Dateien und die Einstellungen, mit denen der Index erstellt wurde.
+# "serve" lädt nur einen Index, dessen Dateien noch genau dieser Signatur entsprechen und dessen Einstellungen
+# zu config.py passen. Ein gerade geschriebener oder mit anderen Einstellungen erstellter Index wird abgelehnt,
+# sodass beim Start nie eingebettet, umgewandelt oder ein IVF- bzw. BM25-Index erstellt wird.
+
+BUILD_INFO_FILE = 'build_info.json'
+# Dateien, die nicht zur Signatur des Index gehören
+SIGNATURE_EXCLUDE = (BUILD_INFO_FILE, BUILD_INFO_FILE + '.tmp')
+# Einstellungen, die beim Laden zum gespeicherten Index passen müssen
+BUILD_SETTINGS = ('vector_store', 'vector_index')
+
+
+# Funktion zum Erstellen einer Signatur des gespeicherten Index
+# Dabei werden Name, Größe und Änderungszeit aller Dateien im Persist-Ordner betrachtet
+# Parameter:    persist_dir: Pfad zum Ordner, in dem der Index gespeichert ist, exclude: nicht betrachtete Dateien
+# Rückgabe:     signature: Tupel mit den Dateiangaben oder None, wenn der Ordner nicht existiert
+def persist_signature(persist_dir, exclude=()):
+    if not os.path.isdir(persist_dir):
+        return None
+
+    entries = []
+    for name in sorted(os.listdir(persist_dir)):
+        path = os.path.join(persist_dir, name)
+        if name not in exclude and os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+
+def load_build_info(persist_dir):
+    path = os.path.join(persist_dir, BUILD_INFO_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+# Funktion zum Speichern der build_info.json nach dem Erstellen bzw. Abgleichen des Index
+# Hat sich am Index und an den Einstellungen nichts geändert, bleibt die vorhandene Datei unverändert
+# Parameter:    persist_dir: Persist-Ordner, chunks: Anzahl der Ausschnitte im Index, source_path: Trainingsdaten,
+#               bm25: BM25-Index für die hybride Suche wurde erstellt, settings: vector_store, vector_index
+# Rückgabe:     True, wenn die Datei neu geschrieben wurde
+def save_build_info(persist_dir, chunks, source_path, bm25, **settings):
+    info = {
+        'source_path': os.path.abspath(source_path),
+        'chunks': chunks,
+        'bm25': bm25,
+        **{name: settings[name] for name in BUILD_SETTINGS},
+        'files': [list(entry) for entry in persist_signature(persist_dir, exclude=SIGNATURE_EXCLUDE)],
+    }
+    previous = load_build_info(persist_dir)
+    if previous is not None and {key: value for key, value in previous.items() if key != 'created'} == info:
+        return False
+
+    info = {'created': datetime.now(timezone.utc).isoformat(timespec='seconds'), **info}
+    path = os.path.join(persist_dir, BUILD_INFO_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(info, file, ensure_ascii=False, indent=1)
+    os.replace(path + '.tmp', path)
+    return True
+
+
+# Funktion zum Prüfen, ob der gespeicherte Index vollständig und mit passenden Einstellungen erstellt wurde
+# Parameter:    persist_dir: Persist-Ordner, bm25: BM25-Index wird gebraucht (hybride Suche),
+#               settings: vector_store, vector_index aus config.py
+# Rückgabe:     info: Inhalt der build_info.json
+# Fehler:       FileNotFoundError ohne Index bzw. build_info.json, ValueError bei geänderten Dateien oder Einstellungen
+def check_index_snapshot(persist_dir, bm25=False, **settings):
+    info = load_build_info(persist_dir)
+    if info is None:
+        raise FileNotFoundError(f"Kein mit build-index erstellter Index in {persist_dir} gefunden")
+
+    signature = persist_signature(persist_dir, exclude=SIGNATURE_EXCLUDE)
+    if signature != tuple(tuple(entry) for entry in info['files']):
+        raise ValueError(f"Index in {persist_dir} wurde nach build-index verändert oder wird gerade geschrieben")
+
+    for name in BUILD_SETTINGS:
+        if info.get(name) != settings[name]:
+            raise ValueError(f"Index in {persist_dir} wurde mit {name} = {info.get(name)!r} erstellt, "
+                             f"config.py verlangt {settings[name]!r}")
+    if bm25 and not info.get('bm25'):
+        raise ValueError(f"Index in {persist_dir} wurde ohne BM25-Index erstellt, retrieval_mode = 'hybrid' braucht ihn")
+    return info
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+
+# Näherungsweise Suche (IVF, "inverted file") über die normalisierten Embeddings des NumpyVectorStore
+# Die Vektoren werden per k-Means in Listen um Zentroide aufgeteilt. Bei einer Anfrage werden nur die Listen
+# der n_probe ähnlichsten Zentroide durchsucht statt aller Zeilen. Gespeichert wird eine Datei neben der Matrix:
+#   <namespace>__vector_store.ivf.npz  - Zentroide, Zeilennummern sortiert nach Liste und Beginn jeder Liste
+
+DEFAULT_PROBES = 16
+# Unterhalb dieser Anzahl Vektoren lohnt sich IVF nicht, es wird exakt gesucht
+MIN_ROWS = 2000
+KMEANS_ITERATIONS = 10
+# Höchstens so viele Vektoren pro Liste werden zum Trainieren der Zentroide verwendet
+TRAIN_ROWS_PER_LIST = 64
+# Zeilen pro Block beim Zuordnen, damit große (memmap-)Matrizen nicht komplett in den Speicher geladen werden
+ASSIGN_BLOCK = 16384
+
+
+# Funktion zum Bestimmen der Anzahl Listen für n Vektoren (ca. 4 * Wurzel(n))
+def default_n_lists(n_rows):
+    return max(1, int(4 * np.sqrt(n_rows)))
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# Funktion zum Zuordnen jeder Zeile zum ähnlichsten Zentroid (blockweise)
+def _assign(matrix, centroids):
+    assignments = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], ASSIGN_BLOCK):
+        block = np.asarray(matrix[start:start + ASSIGN_BLOCK], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    def __init__(self, centroids, rows, offsets):
+        # centroids: (n_lists, dim), rows: Zeilennummern sortiert nach Liste,
+        # offsets: Beginn jeder Liste in rows (Länge n_lists + 1)
+        self.centroids = centroids
+        self.rows = rows
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    # Funktion zum Aufbauen des Index per sphärischem k-Means
+    # Parameter:    matrix: normalisierte Vektoren (auch memmap), n_lists: Anzahl Listen (Standard: default_n_lists),
+    #               iterations: Durchläufe von k-Means, seed: Startwert für die Zufallsauswahl
+    # Rückgabe:     IVFIndex
+    @classmethod
+    def build(cls, matrix, n_lists=None, iterations=KMEANS_ITERATIONS, seed=0):
+        n_rows = matrix.shape[0]
+        n_lists = min(n_lists or default_n_lists(n_rows), n_rows)
+        random = np.random.default_rng(seed)
+
+        # Zentroide auf einer Stichprobe trainieren
+        train_size = min(n_rows, n_lists * TRAIN_ROWS_PER_LIST)
+        sample = np.asarray(matrix[np.sort(random.choice(n_rows, train_size, replace=False))], dtype=np.float32)
+        centroids = sample[random.choice(train_size, n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Leere Listen bekommen einen zufälligen Vektor der Stichprobe als neuen Zentroid
+            empty = counts == 0
+            sums[empty] = sample[random.choice(train_size, int(empty.sum()))]
+            centroids = _normalize_rows(sums)
+
+        assignments = _assign(matrix, centroids)
+        rows = np.argsort(assignments, kind='stable').astype(np.int32)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+        return cls(centroids, rows, offsets)
+
+    # Funktion zum Bestimmen der Kandidaten für eine Anfrage
+    # Parameter:    query_vector: normalisierter Anfragevektor, n_probe: Anzahl durchsuchter Listen
+    # Rückgabe:     aufsteigend sortierte Zeilennummern aller Vektoren in den durchsuchten Listen
+    def candidates(self, query_vector, n_probe=DEFAULT_PROBES):
+        n_probe = min(n_probe, self.n_lists)
+        scores = self.centroids @ np.asarray(query_vector, dtype=np.float32)
+        probes = np.argpartition(-scores, n_probe - 1)[:n_probe]
+        # Sortiert lesen, damit die memmap-Matrix möglichst der Reihe nach gelesen wird
+        return np.sort(np.concatenate([self.rows[self.offsets[i]:self.offsets[i + 1]] for i in probes]))
+
+    def save(self, path):
+        with open(path + '.tmp', 'wb') as file:
+            np.savez(file, centroids=self.centroids, rows=self.rows, offsets=self.offsets)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['centroids'], data['rows'], data['offsets'])
@@ -0,0 +1,56 @@
+import argparse
+import csv
+from collections import Counter
+
+# Abfragen des Link-Manifests der Spider (links.csv im Ausgabeordner)
+# Spalten: archive_date, url, category, filtered_out (1 = wegen unerwünschter Kategorie nicht gescrapt)
+#
+# Beispiele:
+#   python utils/link_manifest.py training_set/links.csv --date 2016-12-20 --filtered-out
+#   python utils/link_manifest.py test_newscript/links.csv --category politik --count
+
+
+# Funktion zum Lesen der Links eines Manifests
+# Parameter:    path: links.csv, archive_date/category: nur diese Werte (optional),
+#               filtered_out: True/False für nur herausgefilterte bzw. nur gescrapte Links (optional)
+# Rückgabe:     Generator über die Zeilen (dicts), filtered_out als bool
+def iter_links(path, archive_date=None, category=None, filtered_out=None):
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            # Unvollständige Zeile eines abgebrochenen Schreibvorgangs überspringen
+            if not row['url'] or row['filtered_out'] not in ('0', '1'):
+                continue
+            row['filtered_out'] = row['filtered_out'] == '1'
+            if archive_date is not None and row['archive_date'] != archive_date:
+                continue
+            if category is not None and row['category'] != category:
+                continue
+            if filtered_out is not None and row['filtered_out'] != filtered_out:
+                continue
+            yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link-Manifest (links.csv) der Spider abfragen")
+    parser.add_argument('path', help="links.csv im Ausgabeordner der Spider")
+    parser.add_argument('--date', help="nur Links dieser Archivseite (JJJJ-MM-TT)")
+    parser.add_argument('--category', help="nur Links dieser Kategorie")
+    status = parser.add_mutually_exclusive_group()
+    status.add_argument('--filtered-out', dest='filtered_out', action='store_true', default=None,
+                        help="nur herausgefilterte Links")
+    status.add_argument('--kept', dest='filtered_out', action='store_false', help="nur gescrapte Links")
+    parser.add_argument('--count', action='store_true', help="nur Anzahl pro Datum und Kategorie ausgeben")
+    args = parser.parse_args()
+
+    links = iter_links(args.path, args.date, args.category, args.filtered_out)
+    if args.count:
+        counts = Counter((row['archive_date'], row['category']) for row in links)
+        for (archive_date, category), count in sorted(counts.items()):
+            print(f"{archive_date}\t{category}\t{count}")
+    else:
+        for row in links:
+            print(row['url'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import threading
+
+import httpx
+
+# Gemeinsame HTTP-Clients für alle Aufrufe an die OpenAI-API (LLM und Embeddings)
+# Die Verbindungen bleiben offen (Keep-Alive) und werden über einen begrenzten Pool wiederverwendet,
+# sodass nicht jede Anfrage eine neue TCP/TLS-Verbindung aufbauen muss.
+
+# Maximale Anzahl gleichzeitiger Verbindungen zur API
+DEFAULT_MAX_CONNECTIONS = 20
+# Anzahl der Verbindungen, die nach einer Anfrage für die nächste offen gehalten werden
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+# Anzahl der Anfragen, die Gradio gleichzeitig bearbeitet
+DEFAULT_CONCURRENCY_LIMIT = 16
+
+# Timeouts in Sekunden (Verbindungsaufbau, gesamte Anfrage)
+CONNECT_TIMEOUT = 10.0
+REQUEST_TIMEOUT = 60.0
+
+_lock = threading.Lock()
+_http_client = None
+_async_http_client = None
+
+
+# Funktion zum Erstellen der Größe des Verbindungspools (auch für eigene Transporte, siehe utils/rate_limit.py)
+def connection_limits(max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS):
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_keepalive_connections, max_connections),
+        keepalive_expiry=30.0,
+    )
+
+
+def _timeout():
+    return httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+# Funktion zum Abrufen des gemeinsamen synchronen HTTP-Clients
+# Der Client wird beim ersten Aufruf erstellt, spätere Parameter werden ignoriert
+# Parameter:    max_connections, max_keepalive_connections: Größe des Verbindungspools
+# Rückgabe:     client: httpx.Client für OpenAI / llama_index
+def get_http_client(max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS):
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=connection_limits(max_connections, max_keepalive_connections), timeout=_timeout())
+        return _http_client
+
+
+# Funktion zum Abrufen des gemeinsamen asynchronen HTTP-Clients (für async Gradio-Handler)
+# Der Client wird beim ersten Aufruf erstellt, spätere Parameter werden ignoriert
+# Parameter:    max_connections, max_keepalive_connections: Größe des Verbindungspools,
+#               transport: eigener Transport (z.B. RateLimitedTransport), der Pool wird dann vom Transport bestimmt
+# Rückgabe:     client: httpx.AsyncClient für AsyncOpenAI / llama_index
+def get_async_http_client(max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+                          transport=None):
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(limits=connection_limits(max_connections, max_keepalive_connections),
+                                                   timeout=_timeout(), transport=transport)
+        return _async_http_client
@@ -0,0 +1,108 @@
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gradio_client import Client
+
+# Lasttest für die Chatbots: N gleichzeitige Nutzer stellen jeweils mehrere Fragen über die Gradio-API
+# Gemessen werden die Zeit bis zur ersten (gestreamten) Teilantwort und die Zeit bis zur vollständigen Antwort.
+#
+# Beispiel gegen den lokalen Fake-Server (siehe utils/fake_openai_server.py):
+#   python utils/fake_openai_server.py --port 8000
+#   python bild_bot.py                                  (mit api_base = 'http://127.0.0.1:8000/v1' in config.py)
+#   python utils/load_test.py --url http://127.0.0.1:7860/ --users 1 2 4 8 16 --requests 5
+
+
+# Funktion zum Berechnen eines Perzentils (Nearest-Rank-Methode)
+# Parameter:    values: Messwerte, percent: gewünschtes Perzentil zwischen 0 und 100
+# Rückgabe:     Wert des Perzentils
+def percentile(values, percent):
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+# Funktion für eine einzelne Frage: Frage senden und Teilantworten mitlesen
+# Rückgabe:     (Zeit bis zur ersten Teilantwort, Gesamtzeit) in Sekunden
+def ask(client, question, api_name):
+    start = time.perf_counter()
+    first_update = None
+    job = client.submit(question, api_name=api_name)
+    for _ in job:
+        if first_update is None:
+            first_update = time.perf_counter() - start
+    job.result()
+    total = time.perf_counter() - start
+    return first_update if first_update is not None else total, total
+
+
+# Funktion für einen Lastdurchlauf mit einer festen Anzahl gleichzeitiger Nutzer
+# Parameter:    client: Gradio-Client, users: Anzahl gleichzeitiger Nutzer, requests: Fragen pro Nutzer,
+#               question: gestellte Frage, api_name: Endpunkt der Gradio-App
+# Rückgabe:     dict mit den Kennzahlen des Durchlaufs
+def run_load(client, users, requests, question, api_name):
+    first_updates = []
+    totals = []
+    errors = 0
+    lock = threading.Lock()
+
+    def user_session(user_id):
+        nonlocal errors
+        for i in range(requests):
+            try:
+                first_update, total = ask(client, f"{question} ({user_id}/{i})", api_name)
+            except Exception as e:
+                print(f"Fehler bei Nutzer {user_id}: {e}")
+                with lock:
+                    errors += 1
+                continue
+            with lock:
+                first_updates.append(first_update)
+                totals.append(total)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(user_session, range(users)))
+    duration = time.perf_counter() - start
+
+    if not totals:
+        return {'users': users, 'requests': 0, 'errors': errors}
+
+    return {
+        'users': users,
+        'requests': len(totals),
+        'errors': errors,
+        'throughput': len(totals) / duration,
+        'ttft_p50': percentile(first_updates, 50),
+        'ttft_p99': percentile(first_updates, 99),
+        'p50': percentile(totals, 50),
+        'p99': percentile(totals, 99),
+        'mean': statistics.fmean(totals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest (p50/p99-Latenz) für die Gradio-Chatbots")
+    parser.add_argument('--url', default='http://127.0.0.1:7860/', help="URL der laufenden Gradio-App")
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 4, 16], help="Anzahl gleichzeitiger Nutzer (mehrere Werte möglich)")
+    parser.add_argument('--requests', type=int, default=5, help="Fragen pro Nutzer")
+    parser.add_argument('--question', default="Was geschah am Breitscheidplatz?")
+    parser.add_argument('--api-name', default='/predict')
+    args = parser.parse_args()
+
+    client = Client(args.url, verbose=False)
+
+    print(f"{'Nutzer':>6} {'Anfragen':>8} {'Fehler':>6} {'Anfr./s':>8} {'TTFT p50':>9} {'TTFT p99':>9} {'p50':>7} {'p99':>7}")
+    for users in args.users:
+        result = run_load(client, users, args.requests, args.question, args.api_name)
+        if not result['requests']:
+            print(f"{users:>6} {0:>8} {result['errors']:>6}")
+            continue
+        print(f"{result['users']:>6} {result['requests']:>8} {result['errors']:>6} {result['throughput']:>8.2f} "
+              f"{result['ttft_p50']:>8.2f}s {result['ttft_p99']:>8.2f}s {result['p50']:>6.2f}s {result['p99']:>6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
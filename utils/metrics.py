@@ -0,0 +1,224 @@
+import bisect
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.rate_limit import CHARS_PER_TOKEN
+
+# Messwerte der Chatbots: Dauer der einzelnen Schritte (Index laden, Cache, Abruf, Query Engine, LLM),
+# Tokens, Anzahl abgerufener Ausschnitte und Treffer des Antwort-Cache
+# Die Werte werden als Histogramme im Textformat von Prometheus unter http://<host>:<metrics_port>/metrics
+# bereitgestellt und optional pro Frage als JSON-Zeile geschrieben (metrics_log in config.py).
+# Ein Messwert kostet nur eine Zeitmessung und eine Addition unter einem Lock.
+
+# Grenzen der Histogramm-Buckets
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+NODE_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+class Histogram:
+    def __init__(self, name, description, buckets, labelnames):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        # Labelwerte -> [Anzahl pro Bucket (nicht kumuliert, letzter Eintrag = über allen Grenzen), Summe, Anzahl]
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in sorted(self._series.items())]
+        for key, counts, total, count in series:
+            labels = _labels(self.labelnames, key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, description, labelnames):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{{{_labels(self.labelnames, key)}}} {value}")
+        return lines
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+STAGE_SECONDS = Histogram('newsgpt_stage_seconds', "Dauer der Verarbeitungsschritte in Sekunden",
+                          SECONDS_BUCKETS, ('bot', 'stage'))
+TOKENS = Histogram('newsgpt_tokens', "Tokens pro LLM-Aufruf (prompt geschätzt, falls die API sie nicht meldet)",
+                   TOKEN_BUCKETS, ('bot', 'kind'))
+RETRIEVED_NODES = Histogram('newsgpt_retrieved_nodes', "Anzahl abgerufener Artikelausschnitte pro Frage",
+                            NODE_BUCKETS, ('bot',))
+ANSWER_CACHE = Counter('newsgpt_answer_cache_total', "Abfragen des Antwort-Cache nach Ergebnis (exact, similar, miss)",
+                       ('bot', 'result'))
+METRICS = (STAGE_SECONDS, TOKENS, RETRIEVED_NODES, ANSWER_CACHE)
+
+# Ziel der JSON-Zeilen (None = aus), siehe configure
+_json_log = None
+_json_log_lock = threading.Lock()
+
+
+# Funktion zum Schätzen der Tokens eines Textes (für gestreamte Antworten meldet die API keine Tokens)
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# Funktion zum Auslesen der Tokens aus der Antwort der API (openai-Objekt oder dict)
+# Rückgabe:     (prompt_tokens, completion_tokens) oder None
+def usage_tokens(raw):
+    usage = raw.get('usage') if isinstance(raw, dict) else getattr(raw, 'usage', None)
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage.get('prompt_tokens'), usage.get('completion_tokens')
+    return usage.prompt_tokens, usage.completion_tokens
+
+
+# Funktion zum Messen eines Verarbeitungsschritts
+# Parameter:    name: Name des Schritts, bot: Name des Chatbots, record: Eintrag einer Frage (siehe Trace, optional)
+@contextmanager
+def stage(name, bot, record=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _observe_stage(name, bot, record, time.perf_counter() - start)
+
+
+def _observe_stage(name, bot, record, seconds):
+    STAGE_SECONDS.observe(seconds, bot=bot, stage=name)
+    if record is not None:
+        record['stages'][name] = round(record['stages'].get(name, 0.0) + seconds, 4)
+
+
+# Messwerte einer Frage: jeder Wert geht sofort in die Histogramme,
+# mit finish() werden die Gesamtdauer gemessen und die JSON-Zeile geschrieben
+class Trace:
+    def __init__(self, bot):
+        self.bot = bot
+        self.start = time.perf_counter()
+        self.record = {'bot': bot, 'stages': {}}
+
+    def stage(self, name):
+        return stage(name, self.bot, self.record)
+
+    # Dauer eines Schritts, der nicht als Block gemessen werden kann (z.B. Zeit bis zum ersten Token)
+    def observe(self, name, seconds):
+        _observe_stage(name, self.bot, self.record, seconds)
+
+    def tokens(self, prompt=None, completion=None):
+        if prompt is not None:
+            TOKENS.observe(prompt, bot=self.bot, kind='prompt')
+            self.record['prompt_tokens'] = self.record.get('prompt_tokens', 0) + prompt
+        if completion is not None:
+            TOKENS.observe(completion, bot=self.bot, kind='completion')
+            self.record['completion_tokens'] = self.record.get('completion_tokens', 0) + completion
+
+    def nodes(self, count):
+        RETRIEVED_NODES.observe(count, bot=self.bot)
+        self.record['nodes'] = count
+
+    def cache(self, result):
+        ANSWER_CACHE.inc(bot=self.bot, result=result)
+        self.record['cache'] = result
+
+    def finish(self, error=None):
+        seconds = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(seconds, bot=self.bot, stage='total')
+        if _json_log is None:
+            return
+        self.record['total_seconds'] = round(seconds, 4)
+        self.record['time'] = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        if error is not None:
+            self.record['error'] = f"{type(error).__name__}: {error}"
+        line = json.dumps(self.record, ensure_ascii=False) + '\n'
+        with _json_log_lock:
+            _json_log.write(line)
+            _json_log.flush()
+
+
+# Funktion zum Erstellen aller Messwerte im Textformat von Prometheus
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        data = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Funktion zum Starten des Metrics-Endpunkts in einem Hintergrund-Thread
+# Parameter:    port: Port (0 = freier Port), host: Adresse
+# Rückgabe:     server: laufender Server
+def start_metrics_server(port, host='127.0.0.1'):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metriken unter http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+# Funktion zum Einschalten des Metrics-Endpunkts und der JSON-Zeilen aus den Einstellungen in config.py
+# Parameter:    config: config-Modul mit metrics_port (None = aus) und metrics_log (Pfad, '-' = Konsole, None = aus)
+def configure(config):
+    global _json_log
+    port = getattr(config, 'metrics_port', None)
+    if port is not None:
+        start_metrics_server(port)
+    path = getattr(config, 'metrics_log', None)
+    if path:
+        _json_log = sys.stdout if path == '-' else open(path, 'a', encoding='utf-8')
@@ -0,0 +1,279 @@
+import json
+import os
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+
+from utils.ivf_index import IVFIndex, DEFAULT_PROBES, MIN_ROWS
+
+# Vektorspeicher auf Basis einer NumPy-Matrix statt JSON
+# Gespeichert werden pro Namespace zwei Dateien im Persist-Ordner:
+#   <namespace>__vector_store.npy       - normalisierte Embeddings (Zeile n gehört zu Knoten n)
+#   <namespace>__vector_store.ids.json  - IDs der Knoten und der zugehörigen Dokumente
+#   <namespace>__vector_store.ivf.npz   - optionaler IVF-Index für die näherungsweise Suche (siehe utils/ivf_index.py)
+# Beim Laden wird die Matrix per memmap eingebunden, sodass keine Zahlen geparst und nur benötigte Seiten
+# in den Speicher geladen werden. Die Suche ist ein vektorisiertes Skalarprodukt über alle Zeilen bzw.
+# mit IVF nur über die Zeilen der ähnlichsten Listen.
+
+NAMESPACE_SEP = '__'
+DEFAULT_NAMESPACE = 'default'
+PERSIST_FNAME = 'vector_store'
+
+
+def _base_path(persist_dir, namespace=DEFAULT_NAMESPACE):
+    return os.path.join(persist_dir, f"{namespace}{NAMESPACE_SEP}{PERSIST_FNAME}")
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    stores_text: bool = False
+    is_embedding_query: bool = True
+    # Datentyp der gespeicherten Matrix, float16 halbiert Speicherbedarf und Ladezeit
+    dtype: str = 'float32'
+    # Näherungsweise Suche mit IVF-Index statt exakter Suche über alle Zeilen
+    ivf: bool = False
+    # Anzahl der durchsuchten IVF-Listen pro Anfrage (mehr = genauer, aber langsamer)
+    ivf_probes: int = DEFAULT_PROBES
+
+    _matrix = PrivateAttr()
+    _node_ids = PrivateAttr()
+    _ref_doc_ids = PrivateAttr()
+    _deleted = PrivateAttr()
+    _pending_vectors = PrivateAttr()
+    _rows_by_ref_doc = PrivateAttr()
+    _ivf_index = PrivateAttr()
+
+    def __init__(self, dtype='float32', ivf=False, ivf_probes=DEFAULT_PROBES, **kwargs):
+        super().__init__(dtype=dtype, ivf=ivf, ivf_probes=ivf_probes, **kwargs)
+        self._matrix = None
+        self._node_ids = []
+        self._ref_doc_ids = []
+        # Zeilen gelöschter Knoten, werden beim Speichern entfernt
+        self._deleted = set()
+        # Neu hinzugefügte Vektoren, die noch nicht in der Matrix sind
+        self._pending_vectors = []
+        # Zuordnung Dokument-ID -> Zeilen, wird bei Bedarf aufgebaut
+        self._rows_by_ref_doc = None
+        # IVF-Index über die ersten len(self._ivf_index) Zeilen der Matrix, später hinzugefügte Zeilen werden exakt durchsucht
+        self._ivf_index = None
+
+    @classmethod
+    def class_name(cls):
+        return "NumpyVectorStore"
+
+    @property
+    def client(self):
+        return None
+
+    def __len__(self):
+        return len(self._node_ids) - len(self._deleted)
+
+    # Auch ein leerer Speicher gilt als vorhanden (StorageContext prüft mit "if vector_store")
+    def __bool__(self):
+        return True
+
+    # Funktion zum Laden eines gespeicherten Vektorspeichers
+    # Parameter:    persist_dir: Persist-Ordner des Index, namespace: Namespace des Vektorspeichers,
+    #               mmap: Matrix nur einbinden (memmap) statt komplett in den Speicher zu lesen,
+    #               ivf: IVF-Index laden (und erstellen, falls er fehlt), ivf_probes: durchsuchte Listen pro Anfrage
+    # Rückgabe:     NumpyVectorStore
+    @classmethod
+    def from_persist_dir(cls, persist_dir, namespace=DEFAULT_NAMESPACE, mmap=True, ivf=False, ivf_probes=DEFAULT_PROBES):
+        base = _base_path(persist_dir, namespace)
+        matrix = np.load(base + '.npy', mmap_mode='r' if mmap else None)
+        with open(base + '.ids.json', encoding='utf-8') as file:
+            ids = json.load(file)
+        if len(ids['node_ids']) != matrix.shape[0]:
+            raise ValueError(f"{base}.npy und {base}.ids.json passen nicht zusammen, Index bitte neu speichern")
+
+        store = cls(dtype=matrix.dtype.name, ivf=ivf, ivf_probes=ivf_probes)
+        store._matrix = matrix
+        store._node_ids = ids['node_ids']
+        store._ref_doc_ids = ids['ref_doc_ids']
+        if ivf:
+            store._load_ivf(base)
+        return store
+
+    # Prüfen, ob im Persist-Ordner ein NumPy-Vektorspeicher vorhanden ist
+    @staticmethod
+    def exists(persist_dir, namespace=DEFAULT_NAMESPACE):
+        return os.path.exists(_base_path(persist_dir, namespace) + '.npy')
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        self._pending_vectors.append(_normalize([node.get_embedding() for node in nodes]))
+        for node in nodes:
+            self._node_ids.append(node.node_id)
+            self._ref_doc_ids.append(node.ref_doc_id)
+        self._rows_by_ref_doc = None
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        if self._rows_by_ref_doc is None:
+            self._rows_by_ref_doc = {}
+            for row, doc_id in enumerate(self._ref_doc_ids):
+                self._rows_by_ref_doc.setdefault(doc_id, []).append(row)
+        self._deleted.update(self._rows_by_ref_doc.get(ref_doc_id, []))
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters=None, **delete_kwargs: Any) -> None:
+        if filters is not None:
+            raise NotImplementedError("NumpyVectorStore unterstützt keine Metadaten-Filter")
+        node_ids = set(node_ids or [])
+        for row, node_id in enumerate(self._node_ids):
+            if node_id in node_ids:
+                self._deleted.add(row)
+
+    def clear(self) -> None:
+        self._matrix = None
+        self._node_ids = []
+        self._ref_doc_ids = []
+        self._deleted = set()
+        self._pending_vectors = []
+        self._rows_by_ref_doc = None
+        self._ivf_index = None
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.filters is not None:
+            raise NotImplementedError("NumpyVectorStore unterstützt keine Metadaten-Filter")
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"Suchmodus {query.mode} wird von NumpyVectorStore nicht unterstützt")
+
+        matrix = self._current_matrix()
+        if matrix is None or not len(self):
+            return VectorStoreQueryResult(similarities=[], ids=[])
+
+        query_vector = _normalize(query.query_embedding).astype(matrix.dtype, copy=False)
+        if self._ivf_index is not None and query.node_ids is None:
+            # Nur Zeilen der ähnlichsten IVF-Listen und seit dem Aufbau hinzugefügte Zeilen durchsuchen
+            rows = self._ivf_index.candidates(query_vector, self.ivf_probes)
+            if matrix.shape[0] > len(self._ivf_index):
+                rows = np.concatenate([rows, np.arange(len(self._ivf_index), matrix.shape[0])])
+            scores = np.asarray(matrix[rows] @ query_vector, dtype=np.float32)
+        else:
+            rows = None
+            scores = np.asarray(matrix @ query_vector, dtype=np.float32)
+
+        # Gelöschte oder nicht erlaubte Knoten ausschließen
+        if self._deleted:
+            deleted = np.fromiter(self._deleted, dtype=np.int64)
+            if rows is None:
+                scores[deleted] = -np.inf
+            else:
+                scores[np.isin(rows, deleted)] = -np.inf
+        if query.node_ids is not None:
+            allowed = set(query.node_ids)
+            mask = np.array([node_id not in allowed for node_id in self._node_ids])
+            scores[mask] = -np.inf
+
+        return self._top_k(scores, query.similarity_top_k, rows)
+
+    # Die besten k Zeilen über argpartition bestimmen (ohne die ganze Liste zu sortieren)
+    # Parameter:    scores: Ähnlichkeiten, k: Anzahl Ergebnisse, rows: Zeilennummern zu scores (None = alle Zeilen)
+    def _top_k(self, scores, k, rows=None):
+        k = min(k, len(scores))
+        if k == 0:
+            return VectorStoreQueryResult(similarities=[], ids=[])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = [i for i in top if np.isfinite(scores[i])]
+        return VectorStoreQueryResult(
+            similarities=[float(scores[i]) for i in top],
+            ids=[self._node_ids[i if rows is None else rows[i]] for i in top],
+        )
+
+    # Matrix inkl. noch nicht gespeicherter Vektoren
+    def _current_matrix(self):
+        if self._pending_vectors:
+            parts = ([self._matrix] if self._matrix is not None else []) + self._pending_vectors
+            self._matrix = np.vstack(parts).astype(self.dtype, copy=False)
+            self._pending_vectors = []
+        return self._matrix
+
+    # Funktion zum Speichern, wird von StorageContext.persist() aufgerufen
+    # Gelöschte Zeilen werden dabei entfernt. Die Dateien werden erst vollständig geschrieben und dann ersetzt.
+    # Parameter:    persist_path: Pfad, den llama_index für den JSON-Speicher vorsieht (<namespace>__vector_store.json)
+    def persist(self, persist_path, fs=None) -> None:
+        base = persist_path[:-len('.json')] if persist_path.endswith('.json') else persist_path
+        os.makedirs(os.path.dirname(base) or '.', exist_ok=True)
+
+        matrix = self._current_matrix()
+        keep = [row for row in range(len(self._node_ids)) if row not in self._deleted]
+        if matrix is None:
+            matrix = np.zeros((0, 0), dtype=self.dtype)
+        elif len(keep) != matrix.shape[0]:
+            matrix = matrix[keep]
+        node_ids = [self._node_ids[row] for row in keep]
+        ref_doc_ids = [self._ref_doc_ids[row] for row in keep]
+
+        with open(base + '.npy.tmp', 'wb') as file:
+            np.save(file, np.ascontiguousarray(matrix, dtype=self.dtype))
+        with open(base + '.ids.json.tmp', 'w', encoding='utf-8') as file:
+            json.dump({'node_ids': node_ids, 'ref_doc_ids': ref_doc_ids}, file)
+        os.replace(base + '.npy.tmp', base + '.npy')
+        os.replace(base + '.ids.json.tmp', base + '.ids.json')
+
+        # Gespeicherte Matrix wieder per memmap einbinden
+        self._matrix = np.load(base + '.npy', mmap_mode='r') if node_ids else None
+        self._node_ids = node_ids
+        self._ref_doc_ids = ref_doc_ids
+        self._deleted = set()
+        self._rows_by_ref_doc = None
+
+        # IVF-Index passend zur gespeicherten Matrix neu aufbauen bzw. veralteten Index entfernen
+        self._ivf_index = None
+        if self.ivf and len(node_ids) >= MIN_ROWS:
+            self._build_ivf(base)
+        elif os.path.exists(base + '.ivf.npz'):
+            os.remove(base + '.ivf.npz')
+
+    def _build_ivf(self, base):
+        print(f"IVF-Index für {len(self._node_ids)} Vektoren wird erstellt")
+        self._ivf_index = IVFIndex.build(self._matrix)
+        self._ivf_index.save(base + '.ivf.npz')
+
+    def _load_ivf(self, base):
+        if len(self._node_ids) < MIN_ROWS:
+            return
+        if os.path.exists(base + '.ivf.npz'):
+            ivf_index = IVFIndex.load(base + '.ivf.npz')
+            if len(ivf_index) == len(self._node_ids):
+                self._ivf_index = ivf_index
+                return
+        self._build_ivf(base)
+
+
+# Funktion zum Umwandeln eines mit JSON gespeicherten Vektorspeichers (SimpleVectorStore) in einen NumpyVectorStore
+# Die JSON-Datei wird danach in <namespace>__vector_store.json.bak umbenannt
+# Parameter:    persist_dir: Persist-Ordner des Index, namespace: Namespace des Vektorspeichers
+# Rückgabe:     NumpyVectorStore mit den übernommenen Vektoren
+def migrate_json_store(persist_dir, namespace=DEFAULT_NAMESPACE, dtype='float32', ivf=False, ivf_probes=DEFAULT_PROBES):
+    simple_store = SimpleVectorStore.from_persist_dir(persist_dir, namespace=namespace)
+    data = simple_store.data
+
+    store = NumpyVectorStore(dtype=dtype, ivf=ivf, ivf_probes=ivf_probes)
+    node_ids = list(data.embedding_dict)
+    if node_ids:
+        store._pending_vectors.append(_normalize([data.embedding_dict[node_id] for node_id in node_ids]))
+        store._node_ids = node_ids
+        store._ref_doc_ids = [data.text_id_to_ref_doc_id.get(node_id) for node_id in node_ids]
+        store._rows_by_ref_doc = None
+    json_path = _base_path(persist_dir, namespace) + '.json'
+    store.persist(json_path)
+    os.replace(json_path, json_path + '.bak')
+    return store
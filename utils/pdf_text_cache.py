@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+import zlib
+
+# Cache der aus den PDFs extrahierten Texte für utils/filter_pdf.py
+# SQLite-Datei mit einer Zeile pro PDF: Schlüssel ist der absolute Pfad, ein Eintrag gilt nur, solange Größe und
+# Änderungszeit der Datei gleich sind. Gespeichert werden die Texte der Seiten (JSON-Liste, zlib-komprimiert) und
+# die Seitenanzahl. Da die Suche beim ersten Treffer endet, kann ein Eintrag nur die ersten Seiten einer PDF enthalten;
+# ein späterer Lauf mit anderen Suchbegriffen extrahiert dann nur noch die fehlenden Seiten.
+
+DEFAULT_CACHE_FILE = 'pdf_text_cache.sqlite'
+# Anzahl neuer Einträge, nach denen in die Datenbank geschrieben wird
+COMMIT_INTERVAL = 200
+
+
+# Funktion zum Bestimmen des Cache-Schlüssels und der Gültigkeitsmerkmale einer PDF
+# Rückgabe:     (absoluter Pfad, Größe, Änderungszeit in ns)
+def file_signature(pdf_path):
+    stat = os.stat(pdf_path)
+    return os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns
+
+
+class PdfTextCache:
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pdf_text ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, page_count INTEGER, pages BLOB)")
+        self.connection.commit()
+        self._pending = 0
+
+    # Funktion zum Nachschlagen der Seitentexte einer PDF
+    # Parameter:    signature: siehe file_signature
+    # Rückgabe:     (Liste der gespeicherten Seitentexte, Seitenanzahl) oder ([], None), wenn nichts Gültiges gespeichert ist
+    def get(self, signature):
+        path, size, mtime_ns = signature
+        row = self.connection.execute(
+            "SELECT page_count, pages FROM pdf_text WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, size, mtime_ns)).fetchone()
+        if row is None:
+            return [], None
+        page_count, pages = row
+        return json.loads(zlib.decompress(pages).decode('utf-8')), page_count
+
+    # Funktion zum Speichern der Seitentexte einer PDF (ersetzt einen älteren Eintrag)
+    # Parameter:    signature: siehe file_signature (vor dem Extrahieren bestimmt), pages: Texte der ersten Seiten,
+    #               page_count: Seitenanzahl der PDF
+    def put(self, signature, pages, page_count):
+        path, size, mtime_ns = signature
+        blob = zlib.compress(json.dumps(pages, ensure_ascii=False).encode('utf-8'))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO pdf_text (path, size, mtime_ns, page_count, pages) VALUES (?, ?, ?, ?, ?)",
+            (path, size, mtime_ns, page_count, blob))
+        self._pending += 1
+        if self._pending >= COMMIT_INTERVAL:
+            self.connection.commit()
+            self._pending = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
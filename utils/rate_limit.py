@@ -0,0 +1,122 @@
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+# Begrenzung der Anfragen an die OpenAI-API auf Anfragen und Tokens pro Minute (Token-Bucket)
+# sowie erneutes Senden bei 429 (Rate Limit) mit zufällig gestreuter, exponentiell wachsender Wartezeit.
+# RateLimitedTransport wird als Transport des gemeinsamen asynchronen HTTP-Clients verwendet
+# (siehe utils/llm_client.py), sodass alle LLM- und Embedding-Aufrufe eines Prozesses darüber laufen.
+
+# Status, bei denen eine Anfrage erneut gesendet wird
+RETRY_STATUS = (429,)
+DEFAULT_MAX_RETRIES = 6
+# Wartezeit vor dem ersten erneuten Senden und Obergrenze in Sekunden
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+# Grobe Schätzung der Tokens aus der Anzahl der Zeichen (wird vor der Anfrage gebraucht)
+CHARS_PER_TOKEN = 4
+# Pfade, deren Tokens auf das Tokens-pro-Minute-Limit angerechnet werden (Limits gelten pro Modell)
+# Nur diese Anfragen werden bei 429 vom Transport erneut gesendet: Embeddings wiederholt llama_index
+# fest eingebaut selbst (bis zu 6 Versuche), ein zweiter Wiederholungs-Mechanismus würde die Anfragen vervielfachen
+LLM_PATHS = ('/chat/completions', '/completions')
+
+
+# Token-Bucket: füllt sich gleichmäßig mit per_minute / 60 Einheiten pro Sekunde bis auf per_minute auf
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        # Wartende werden der Reihe nach bedient
+        self._lock = asyncio.Lock()
+
+    # Funktion zum Entnehmen von amount Einheiten, wartet bis genug vorhanden sind
+    # Anfragen, die größer als der ganze Bucket sind, warten auf einen vollen Bucket
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.rate)
+
+
+# Funktion zum Schätzen der Tokens einer Anfrage (Prompt bzw. Eingaben plus maximale Antwortlänge)
+# Parameter:    request: httpx.Request an die OpenAI-API
+# Rückgabe:     geschätzte Anzahl Tokens
+def estimate_tokens(request):
+    try:
+        body = json.loads(request.content or b'{}')
+    except ValueError:
+        return 0
+    if 'messages' in body:
+        text = ''.join(str(message.get('content') or '') for message in body['messages'])
+    else:
+        text = body.get('prompt') or body.get('input') or ''
+        if isinstance(text, list):
+            text = ''.join(str(item) for item in text)
+    return len(text) // CHARS_PER_TOKEN + 1 + (body.get('max_tokens') or 0)
+
+
+# Funktion zum Berechnen der Wartezeit vor dem erneuten Senden
+# Zufällig zwischen 0 und BACKOFF_BASE * 2^attempt (full jitter), mindestens so lange wie Retry-After
+def backoff_delay(attempt, response=None):
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if response is not None:
+        # OpenAI sendet retry-after-ms und Retry-After (Sekunden)
+        try:
+            if 'retry-after-ms' in response.headers:
+                delay = max(delay, float(response.headers['retry-after-ms']) / 1000)
+            elif 'retry-after' in response.headers:
+                delay = max(delay, float(response.headers['retry-after']))
+        except ValueError:
+            pass
+    return min(delay, BACKOFF_MAX)
+
+
+# Transport für httpx.AsyncClient, der vor jeder Anfrage die Limits einhält und 429 an das LLM erneut sendet
+# Die Wiederholungen im openai-SDK und in llama_index sollten dabei mit max_retries=0 abgeschaltet sein
+# (siehe create_models in utils/corpus_bot.py), sonst wird jede Wiederholung mehrfach gesendet
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    # Parameter:    requests_per_minute, tokens_per_minute: Limits (None = unbegrenzt),
+    #               max_retries: wie oft eine abgelehnte Anfrage erneut gesendet wird, transport: eigentlicher Transport
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, max_retries=DEFAULT_MAX_RETRIES,
+                 transport=None, **transport_kwargs):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.transport = transport or httpx.AsyncHTTPTransport(**transport_kwargs)
+        # Zähler für den Bericht (siehe utils/batch_qa.py)
+        self.sent = 0
+        self.retried = 0
+
+    async def handle_async_request(self, request):
+        llm_request = request.url.path.endswith(LLM_PATHS)
+        tokens = estimate_tokens(request) if self.tokens and llm_request else 0
+        max_retries = self.max_retries if llm_request else 0
+        attempt = 0
+        while True:
+            if self.requests:
+                await self.requests.acquire()
+            if tokens:
+                await self.tokens.acquire(tokens)
+            self.sent += 1
+            response = await self.transport.handle_async_request(request)
+            if response.status_code not in RETRY_STATUS or attempt >= max_retries:
+                return response
+            await response.aclose()
+            delay = backoff_delay(attempt, response)
+            attempt += 1
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,39 @@
+import os
+import resource
+import time
+from contextlib import contextmanager
+
+# Zeitmessung der Startphasen der Chatbots (Importe, Modelle, Index, Oberfläche, ...)
+# Das Modul nutzt nur die Standardbibliothek, damit es vor den großen Importen geladen werden kann.
+
+
+# Funktion zum Auslesen des aktuellen Speicherverbrauchs (RSS) des Prozesses in MB
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        # Ohne /proc (z.B. macOS) nur der bisherige Höchstwert
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Misst Dauer und zusätzlichen Speicher jeder Startphase und gibt sie als Tabelle aus
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start, current_rss_mb() - rss_before))
+
+    def report(self):
+        print(f"{'Startphase':<12} {'Dauer':>8} {'Speicher':>10}")
+        for name, seconds, memory_mb in self.phases:
+            print(f"{name:<12} {seconds:>7.2f}s {memory_mb:>+8.0f}MB")
+        print(f"{'gesamt':<12} {time.perf_counter() - self.start:>7.2f}s {current_rss_mb():>8.0f}MB")